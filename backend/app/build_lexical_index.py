@@ -0,0 +1,50 @@
+"""
+Backfill the BM25 lexical index of projects indexed before hybrid search existed.
+
+Ingestion keeps the index current; this copies chunk texts from the vector store for
+chunks the index lacks, and can run while the API is up:
+    python -m app.build_lexical_index
+    python -m app.build_lexical_index --project 12
+"""
+import argparse
+
+from app.utils.lexical_index import get_lexical_index
+from app.vectorstores import get_vector_store, list_vector_store_project_ids
+
+FETCH_BATCH_SIZE = 100
+
+
+def backfill_project(project_id: int) -> int:
+    lexical_index = get_lexical_index(project_id)
+    if lexical_index is None:
+        raise SystemExit("Hybrid search is disabled (HYBRID_SEARCH_ENABLED=false)")
+    index = get_vector_store(project_id)
+    added = 0
+
+    for id_page in index.list(prefix=f"project_{project_id}_"):
+        missing = lexical_index.missing_ids(list(id_page))
+        for i in range(0, len(missing), FETCH_BATCH_SIZE):
+            fetched = index.fetch(missing[i:i + FETCH_BATCH_SIZE])
+            chunks = [
+                {"id": vector_id, "metadata": match.metadata}
+                for vector_id, match in fetched.items()
+                if match.metadata.get("text")
+            ]
+            lexical_index.add(chunks)
+            added += len(chunks)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the lexical index from the vector store")
+    parser.add_argument("--project", type=int, help="Only backfill this project")
+    args = parser.parse_args()
+
+    project_ids = [args.project] if args.project is not None else sorted(list_vector_store_project_ids())
+    for project_id in project_ids:
+        added = backfill_project(project_id)
+        print(f"project {project_id}: indexed {added} chunks, {get_lexical_index(project_id).chunk_count()} total")
+
+
+if __name__ == "__main__":
+    main()
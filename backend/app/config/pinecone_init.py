@@ -1,8 +1,13 @@
 import os
+import re
+import threading
 
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
 
+from app.vectorstores import project_namespace
+from app.vectorstores.pinecone_store import PineconeVectorStore
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -10,27 +15,112 @@ load_dotenv()
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 
+# "index_per_project" keeps the original `project-{id}` index per project (max 5 projects);
+# "namespaces" stores every project in one shared index, one namespace per project
+PINECONE_STORAGE_MODE = os.getenv("PINECONE_STORAGE_MODE", "index_per_project")
+PINECONE_SHARED_INDEX = os.getenv("PINECONE_SHARED_INDEX", "sherlock-projects")
+
+MAX_PROJECT_INDEXES = 5
+
+PROJECT_INDEX_PATTERN = re.compile(r"^project-(\d+)$")
+
 # Initialize Pinecone
 pc = Pinecone(api_key=PINECONE_API_KEY)
 
+_shared_index_ready = False
+_shared_index_lock = threading.Lock()
+
+# Index handles are reused so their host lookup and HTTP connection pool are paid once per process
+_index_handles = {}
+_index_handles_lock = threading.Lock()
+
+
+def get_index_handle(index_name):
+    """Returns the process-wide `pc.Index` handle for an index."""
+    with _index_handles_lock:
+        if index_name not in _index_handles:
+            _index_handles[index_name] = pc.Index(index_name)
+        return _index_handles[index_name]
+
+
+def _create_index(index_name):
+    pc.create_index(
+        name=index_name,
+        dimension=768,
+        metric="cosine",
+        spec=ServerlessSpec(
+            cloud="aws",
+            region="us-east-1"
+        )
+    )
+
+
+def ensure_shared_index():
+    """Creates the shared multi-tenant index once per process."""
+    global _shared_index_ready
+    if _shared_index_ready:
+        return PINECONE_SHARED_INDEX
+    with _shared_index_lock:
+        if not _shared_index_ready:
+            if PINECONE_SHARED_INDEX not in pc.list_indexes().names():
+                _create_index(PINECONE_SHARED_INDEX)
+            _shared_index_ready = True
+    return PINECONE_SHARED_INDEX
+
+
 def create_project_index(project_id):
-    """Creates a new index for the project if under limit."""
+    """Creates a new index for the project if under limit (no-op in namespace mode)."""
+    if PINECONE_STORAGE_MODE == "namespaces":
+        # Namespaces are created implicitly by the first upsert
+        return ensure_shared_index()
+
     existing_indexes = pc.list_indexes().names()
-    
-    if len(existing_indexes) >= 5:
+
+    if len(existing_indexes) >= MAX_PROJECT_INDEXES:
         raise Exception("Maximum index limit reached. Cannot create a new project.")
-    
+
     index_name = f"project-{project_id}"
     if index_name not in existing_indexes:
-        pc.create_index(
-            name=index_name,
-            dimension=768,
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud="aws",
-                region="us-east-1"
-            )
-        )
+        _create_index(index_name)
     return index_name
 
-__all__ = ["pc", "create_project_index"]
+
+def get_project_index(project_id) -> PineconeVectorStore:
+    """Resolve where a project's vectors live for the configured storage mode."""
+    if PINECONE_STORAGE_MODE == "namespaces":
+        return PineconeVectorStore(project_id, get_index_handle(ensure_shared_index()), project_namespace(project_id))
+    return PineconeVectorStore(project_id, get_index_handle(f"project-{project_id}"))
+
+
+def delete_project_index(project_id):
+    """Removes all of a project's vectors: its namespace, or its whole index."""
+    if PINECONE_STORAGE_MODE == "namespaces":
+        get_project_index(project_id).delete(delete_all=True)
+        return
+
+    index_name = f"project-{project_id}"
+    with _index_handles_lock:
+        _index_handles.pop(index_name, None)
+    if index_name in pc.list_indexes().names():
+        pc.delete_index(index_name)
+
+
+def list_project_ids():
+    """IDs of every project that has vectors stored in Pinecone for the configured mode."""
+    if PINECONE_STORAGE_MODE == "namespaces":
+        namespaces = get_index_handle(ensure_shared_index()).describe_index_stats().namespaces
+        names = namespaces.keys()
+    else:
+        names = pc.list_indexes().names()
+    return [int(match.group(1)) for match in map(PROJECT_INDEX_PATTERN.match, names) if match]
+
+
+__all__ = [
+    "pc",
+    "create_project_index",
+    "get_project_index",
+    "get_index_handle",
+    "delete_project_index",
+    "list_project_ids",
+    "project_namespace",
+]
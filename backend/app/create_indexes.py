@@ -0,0 +1,88 @@
+"""
+Create the indexes and unique constraints declared on the models that an existing
+database does not have yet.
+
+`create_tables` only creates missing tables, so indexes added to tables that already
+exist are applied with this script. Indexes are built with CREATE INDEX CONCURRENTLY,
+which does not block writes to the table while it runs. A unique constraint fails to
+apply while the table holds duplicates; remove them and run the script again.
+From the backend directory:
+    python -m app.create_indexes --dry-run
+    python -m app.create_indexes
+"""
+import argparse
+
+from sqlalchemy import inspect, UniqueConstraint
+from sqlalchemy.schema import AddConstraint
+
+from app.database import Base, engine
+
+from app.models.message import Message, ConversationSummary
+from app.models.ingestion_job import IngestionJob, IngestionJobDocument
+from app.models.project import Project, Document, DocumentChunk
+
+
+def missing_indexes():
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # create_tables creates it together with its indexes
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def missing_unique_constraints():
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        missing.extend(constraint for constraint in table.constraints
+                       if isinstance(constraint, UniqueConstraint) and constraint.name
+                       and constraint.name not in existing)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create model indexes and unique constraints missing from existing tables")
+    parser.add_argument("--dry-run", action="store_true", help="Only list what is missing")
+    args = parser.parse_args()
+
+    indexes = missing_indexes()
+    constraints = missing_unique_constraints()
+    if not indexes and not constraints:
+        print("All declared indexes and unique constraints exist.")
+        return
+
+    # CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for index in indexes:
+            columns = ", ".join(column.name for column in index.columns)
+            if args.dry_run:
+                print(f"Missing {index.name} on {index.table.name} ({columns})")
+                continue
+            print(f"Creating {index.name} on {index.table.name} ({columns})...")
+            index.dialect_kwargs["postgresql_concurrently"] = True
+            index.create(bind=connection)
+
+        for constraint in constraints:
+            columns = ", ".join(column.name for column in constraint.columns)
+            if args.dry_run:
+                print(f"Missing unique constraint {constraint.name} on {constraint.table.name} ({columns})")
+                continue
+            print(f"Adding unique constraint {constraint.name} on {constraint.table.name} ({columns})...")
+            try:
+                connection.execute(AddConstraint(constraint))
+            except Exception as e:
+                print(f"Could not add {constraint.name}: {str(e)}")
+    if not args.dry_run:
+        print(f"Created {len(indexes)} indexes, tried {len(constraints)} unique constraints.")
+
+
+if __name__ == "__main__":
+    main()
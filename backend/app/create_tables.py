@@ -1,7 +1,9 @@
 from app.database import Base, engine
 
 # from app.models.project import Project
-from app.models.message import Message
+from app.models.message import Message, ConversationSummary
+from app.models.ingestion_job import IngestionJob, IngestionJobDocument
+from app.models.project import Project, Document, DocumentChunk  # chunk manifest; projects/documents are referenced by ingestion jobs
 # from app.models.project import Document
 
 # Function to create all tables
@@ -1,18 +1,48 @@
+import asyncio
 import logging
 import os
 import secrets
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
 from dotenv import set_key, dotenv_values
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import project_routes, debug_routes, message_routes, document_routes, whatsapp_routes, auth_routes
+from app.database import engine, async_engine
+from app.routes import project_routes, debug_routes, message_routes, document_routes, whatsapp_routes, auth_routes, job_routes, search_routes
+from app.services.message_writer import message_writer
+from app.utils.pdf_extraction import shutdown_extraction_pool
+from app.workers.ingestion_worker import start_background_workers, stop_background_workers
+
+
+# Threads for blocking client calls made from async routes (vector queries, registry misses)
+ASYNC_IO_THREADS = int(os.getenv("ASYNC_IO_THREADS", "64"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS, thread_name_prefix="async-io")
+    )
+    # Process queued document ingestion in this process too (set INGESTION_INPROCESS_WORKERS=0
+    # when running dedicated `python -m app.workers.ingestion_worker` processes)
+    start_background_workers()
+    yield
+    # Buffered chat messages are written before the database pools close
+    await message_writer.close()
+    stop_background_workers()
+    shutdown_extraction_pool()
+    await async_engine.dispose()
+    engine.dispose()
+
 
 app = FastAPI(
     title="Enterprise Search API",
     description="RAG-powered enterprise search backend",
     version="0.1.0",
-    debug= True
+    debug= True,
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -22,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],  # Pagination cursors of the listings and message history
 )
 
 # Include Routes
@@ -31,6 +62,8 @@ app.include_router(debug_routes.router, prefix="")
 app.include_router(message_routes.router, prefix="")
 app.include_router(document_routes.router, prefix="")
 app.include_router(auth_routes.router, prefix="")
+app.include_router(job_routes.router, prefix="")
+app.include_router(search_routes.router, prefix="")
 # app.include_router(whatsapp_routes.router, prefix="/whatsapp")
 
 # mounting the oauth for integration
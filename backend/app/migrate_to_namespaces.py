@@ -0,0 +1,71 @@
+"""
+Copy every `project-{id}` index into its namespace of the shared index.
+
+Run before switching PINECONE_STORAGE_MODE to "namespaces":
+    python -m app.migrate_to_namespaces --dry-run
+    python -m app.migrate_to_namespaces
+    python -m app.migrate_to_namespaces --delete-source   # after verifying the copy
+"""
+import argparse
+import re
+
+from app.config.pinecone_init import pc, ensure_shared_index, project_namespace
+
+PROJECT_INDEX_PATTERN = re.compile(r"^project-(\d+)$")
+FETCH_BATCH_SIZE = 100
+
+
+def migrate_index(index_name: str, project_id: str, shared_index, dry_run: bool) -> int:
+    source = pc.Index(index_name)
+    namespace = project_namespace(project_id)
+    copied = 0
+
+    for id_page in source.list():
+        for i in range(0, len(id_page), FETCH_BATCH_SIZE):
+            ids = id_page[i:i + FETCH_BATCH_SIZE]
+            fetched = source.fetch(ids=ids)
+            vectors = [
+                {"id": vector_id, "values": vector.values, "metadata": vector.metadata or {}}
+                for vector_id, vector in fetched.vectors.items()
+            ]
+            if vectors and not dry_run:
+                shared_index.upsert(vectors=vectors, namespace=namespace)
+            copied += len(vectors)
+
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate per-project indexes into namespaces of the shared index")
+    parser.add_argument("--dry-run", action="store_true", help="Count vectors without writing anything")
+    parser.add_argument("--delete-source", action="store_true",
+                        help="Delete each per-project index once its namespace holds every vector")
+    args = parser.parse_args()
+
+    shared_index = pc.Index(ensure_shared_index()) if not args.dry_run else None
+
+    for index_name in pc.list_indexes().names():
+        match = PROJECT_INDEX_PATTERN.match(index_name)
+        if not match:
+            continue
+        project_id = match.group(1)
+
+        source_count = pc.Index(index_name).describe_index_stats().total_vector_count
+        copied = migrate_index(index_name, project_id, shared_index, args.dry_run)
+        print(f"{index_name}: {source_count} vectors, copied {copied} to namespace {project_namespace(project_id)}"
+              f"{' (dry run)' if args.dry_run else ''}")
+
+        if args.delete_source and not args.dry_run:
+            # Upserts are eventually consistent; only delete once the namespace has caught up
+            stats = shared_index.describe_index_stats()
+            namespace_stats = stats.namespaces.get(project_namespace(project_id))
+            migrated_count = namespace_stats.vector_count if namespace_stats else 0
+            if migrated_count >= source_count:
+                pc.delete_index(index_name)
+                print(f"Deleted index {index_name}")
+            else:
+                print(f"Kept index {index_name}: namespace has {migrated_count}/{source_count} vectors, re-run later")
+
+
+if __name__ == "__main__":
+    main()
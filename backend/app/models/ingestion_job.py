@@ -0,0 +1,61 @@
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer
+from datetime import datetime
+
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+# Overall status of a queued document
+JOB_STATUS_QUEUED = "QUEUED"
+JOB_STATUS_RUNNING = "RUNNING"
+JOB_STATUS_COMPLETED = "COMPLETED"
+JOB_STATUS_FAILED = "FAILED"
+
+# Pipeline stage a document has reached, in order
+STAGE_QUEUED = "queued"
+STAGE_UPLOADED = "uploaded"
+STAGE_EXTRACTED = "extracted"
+STAGE_CHUNKED = "chunked"
+STAGE_EMBEDDED = "embedded"
+STAGE_UPSERTED = "upserted"
+
+
+# One ingestion request (a project create or update carrying files)
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String, primary_key=True, index=True)  # uuid4 string handed back to the client
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    status = Column(String, default=JOB_STATUS_QUEUED, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    documents = relationship("IngestionJobDocument", back_populates="job", cascade="all, delete-orphan",
+                             order_by="IngestionJobDocument.id")
+
+
+# Work item for a single uploaded file; claimed and processed by one worker at a time
+class IngestionJobDocument(Base):
+    __tablename__ = "ingestion_job_documents"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("ingestion_jobs.id", ondelete="CASCADE"), index=True, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    file_name = Column(String, nullable=False)
+    file_extension = Column(String, nullable=True)
+    file_path = Column(String, nullable=False)  # Spooled upload on storage shared with the workers
+    content_hash = Column(String, nullable=True)  # SHA-256 of the upload, computed while it streamed in
+    status = Column(String, default=JOB_STATUS_QUEUED, nullable=False, index=True)
+    stage = Column(String, default=STAGE_QUEUED, nullable=False)
+    num_pages = Column(Integer, default=0, nullable=False)
+    num_chunks = Column(Integer, default=0, nullable=False)
+    num_embedded = Column(Integer, default=0, nullable=False)
+    num_upserted = Column(Integer, default=0, nullable=False)
+    num_deleted = Column(Integer, default=0, nullable=False)  # Chunks dropped by a new document version
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    job = relationship("IngestionJob", back_populates="documents")
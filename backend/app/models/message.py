@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, DateTime, Enum, ForeignKey, Integer, UniqueConstraint, Index
 
 
 from app.database import Base
@@ -12,3 +12,19 @@ class Message(Base):
     timestamp = Column(DateTime, nullable=False)  # Timestamp of the message
     project_id = Column(String, nullable=False)  # Project Foreign Key
     user_id = Column(String, nullable=False)  # User Foreign Key
+
+    # One conversation in (timestamp, id) order, for history pages and the chat context
+    __table_args__ = (Index("ix_messages_conversation", "project_id", "user_id", "timestamp", "id"),)
+
+
+# Rolling summary of the older turns of one user's conversation in a project
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+    __table_args__ = (UniqueConstraint("project_id", "user_id", name="uq_conversation_summary"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(String, nullable=False)
+    user_id = Column(String, nullable=False)
+    summary = Column(Text, nullable=False, default="")
+    last_message_id = Column(Integer, nullable=False, default=0)  # Messages up to this ID are in the summary
+    updated_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Table
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Table, Index, UniqueConstraint
 from datetime import datetime
 
 from sqlalchemy.orm import relationship
@@ -39,6 +39,9 @@ class Project(Base):
     # Define the relationship with the Document model
     documents = relationship("Document", back_populates="project", cascade="all, delete-orphan")
 
+    # Keyset pagination of the project listings (newest update first)
+    __table_args__ = (Index("ix_projects_updated_at_id", "updated_at", "id"),)
+
 # Define the Document model
 class Document(Base):
     __tablename__ = "documents"
@@ -53,5 +56,23 @@ class Document(Base):
     s3_url = Column(String, nullable=False)
 
     # Foreign key to link the document to a project
-    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"))
-    project = relationship("Project", back_populates="documents")
\ No newline at end of file
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    project = relationship("Project", back_populates="documents")
+
+    # Manifest of the chunk vectors currently indexed for this document
+    chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
+
+# One indexed chunk of a document; the vector ID is derived from the chunk's content hash,
+# so a new version of the document only re-embeds chunks whose text changed
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+    # A chunk is indexed once per document, however many runs touched it
+    __table_args__ = (UniqueConstraint("document_id", "chunk_hash", name="uq_document_chunks_document_hash"),)
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=False)
+    vector_id = Column(String, nullable=False)
+    chunk_hash = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)  # Chunk order within the latest version
+
+    document = relationship("Document", back_populates="chunks")
@@ -0,0 +1,42 @@
+"""
+Purge vectors (and lexical index entries) that no document accounts for, and the vector
+storage of deleted projects.
+
+Safe to run while the API and ingestion workers are up, e.g. nightly:
+    python -m app.reconcile_vectors --dry-run
+    python -m app.reconcile_vectors
+    python -m app.reconcile_vectors --project 12
+"""
+import argparse
+
+from app.database import get_db
+from app.services.vector_cleanup_service import VectorCleanupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete orphaned chunk vectors")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting anything")
+    parser.add_argument("--project", type=int, help="Only reconcile this project")
+    args = parser.parse_args()
+
+    if args.project is not None:
+        db = next(get_db())
+        try:
+            results = {args.project: VectorCleanupService.reconcile_project(db, args.project, args.dry_run)}
+        finally:
+            db.close()
+    else:
+        results = VectorCleanupService.reconcile_all(args.dry_run)
+
+    for project_id, stats in results.items():
+        if stats.get("dropped"):
+            print(f"project {project_id}: deleted project, dropped its vector storage"
+                  f"{' (dry run)' if args.dry_run else ''}")
+        else:
+            print(f"project {project_id}: scanned {stats['scanned']}, orphaned {stats['orphaned']}, "
+                  f"unrecognised {stats['unrecognised']}, lexical orphaned {stats.get('lexical_orphaned', 0)}"
+                  f"{' (dry run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 from app.database import Base, engine
 
-from app.models.project import Project, Document
-from app.models.message import Message
+from app.models.project import Project, Document, DocumentChunk
+from app.models.message import Message, ConversationSummary
+from app.models.ingestion_job import IngestionJob, IngestionJobDocument
 
 # Function to drop and recreate tables
 def recreate_tables():
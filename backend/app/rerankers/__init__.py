@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional
+
+from app.rerankers.base import Reranker
+from app.vectorstores import VectorMatch
+
+# "none" (default), "onnx" for the local cross-encoder, or "fake" for offline runs
+RERANKER = os.getenv("RERANKER", "none")
+# Candidates retrieved for the reranker to choose the top_k from
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+# Past this, the request keeps the retrieval order instead of waiting for the reranker
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+# Inference threads; requests beyond twice this many waiting skip reranking outright
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "2"))
+FAKE_RERANKER_LATENCY = float(os.getenv("FAKE_RERANKER_LATENCY", "0.0"))
+
+_reranker: Optional[Reranker] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_pending = 0
+_latencies = deque(maxlen=1000)
+_stats = {"reranked": 0, "over_budget": 0, "overloaded": 0, "errors": 0}
+
+
+def create_reranker(name: Optional[str] = None) -> Optional[Reranker]:
+    name = name or RERANKER
+    if name == "onnx":
+        from app.rerankers.cross_encoder import OnnxCrossEncoderReranker
+        return OnnxCrossEncoderReranker()
+    if name == "fake":
+        from app.rerankers.fake import FakeReranker
+        return FakeReranker(latency=FAKE_RERANKER_LATENCY)
+    if name in ("", "none"):
+        return None
+    raise ValueError(f"Unknown reranker: {name}")
+
+
+def get_reranker() -> Optional[Reranker]:
+    """
+    The process-wide reranker, or None when RERANKER is "none". The model loads on first use.
+    """
+    global _reranker, _executor
+    if RERANKER in ("", "none"):
+        return None
+    with _lock:
+        if _reranker is None:
+            _reranker = create_reranker()
+            _executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+        return _reranker
+
+
+def _score(reranker: Reranker, query: str, matches: List[VectorMatch], top_k: int) -> List[VectorMatch]:
+    global _pending
+    started = time.perf_counter()
+    try:
+        scores = reranker.score(query, [match.metadata.get("text", "") for match in matches])
+    finally:
+        with _lock:
+            _pending -= 1
+            _latencies.append(time.perf_counter() - started)
+    order = sorted(range(len(matches)), key=lambda i: scores[i], reverse=True)[:top_k]
+    return [VectorMatch(matches[i].id, float(scores[i]), matches[i].metadata) for i in order]
+
+
+def _submit(query: str, matches: List[VectorMatch], top_k: int):
+    """
+    Queue the scoring, or return None when the workers are too far behind to finish in budget.
+    """
+    global _pending
+    reranker = get_reranker()
+    with _lock:
+        if _pending >= 2 * RERANK_WORKERS:
+            _stats["overloaded"] += 1
+            return None
+        _pending += 1
+    return _executor.submit(_score, reranker, query, matches, top_k)
+
+
+def _record(outcome: str):
+    with _lock:
+        _stats[outcome] += 1
+
+
+def rerank(query: str, matches: List[VectorMatch], top_k: int) -> List[VectorMatch]:
+    """
+    The `top_k` of `matches` by reranker score, or the first `top_k` in their given order
+    when the reranker is off, overloaded, fails or exceeds RERANK_BUDGET_MS.
+    """
+    if get_reranker() is None or len(matches) <= 1:
+        return matches[:top_k]
+    future = _submit(query, matches, top_k)
+    if future is None:
+        return matches[:top_k]
+    try:
+        reranked = future.result(timeout=RERANK_BUDGET_MS / 1000)
+    except FutureTimeoutError:
+        _record("over_budget")
+        return matches[:top_k]
+    except Exception as e:
+        print(f"Reranking failed, keeping retrieval order: {str(e)}")
+        _record("errors")
+        return matches[:top_k]
+    _record("reranked")
+    return reranked
+
+
+async def rerank_async(query: str, matches: List[VectorMatch], top_k: int) -> List[VectorMatch]:
+    """
+    `rerank` without blocking the event loop.
+    """
+    if get_reranker() is None or len(matches) <= 1:
+        return matches[:top_k]
+    future = _submit(query, matches, top_k)
+    if future is None:
+        return matches[:top_k]
+    try:
+        # The inference itself is not interrupted; a late result is simply discarded
+        reranked = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), RERANK_BUDGET_MS / 1000)
+    except asyncio.TimeoutError:
+        _record("over_budget")
+        return matches[:top_k]
+    except Exception as e:
+        print(f"Reranking failed, keeping retrieval order: {str(e)}")
+        _record("errors")
+        return matches[:top_k]
+    _record("reranked")
+    return reranked
+
+
+def get_rerank_stats() -> Optional[dict]:
+    """
+    Rerank outcomes and inference latency (over the last 1000 calls) for this process,
+    or None when reranking is off.
+    """
+    if RERANKER in ("", "none"):
+        return None
+    with _lock:
+        stats = dict(_stats)
+        latencies = sorted(_latencies)
+        stats["pending"] = _pending
+    if latencies:
+        stats["p50_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.5))] * 1000, 2)
+        stats["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2)
+    stats["reranker"] = RERANKER
+    stats["budget_ms"] = RERANK_BUDGET_MS
+    return stats
+
+
+__all__ = [
+    "Reranker",
+    "RERANK_CANDIDATES",
+    "create_reranker",
+    "get_reranker",
+    "rerank",
+    "rerank_async",
+    "get_rerank_stats",
+]
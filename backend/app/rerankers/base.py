@@ -0,0 +1,15 @@
+from typing import List
+
+
+class Reranker:
+    """
+    Rescores retrieved passages against the query. Implementations score all passages
+    of a query in one call so batched models run a single inference.
+    """
+    name = "base"
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        """
+        One relevance score per passage, higher is better.
+        """
+        raise NotImplementedError
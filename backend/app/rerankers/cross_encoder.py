@@ -0,0 +1,57 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from app.rerankers.base import Reranker
+
+# A cross-encoder exported to ONNX, e.g. the int8 model_quantized.onnx of ms-marco-MiniLM-L-6-v2
+RERANKER_MODEL_PATH = os.getenv("RERANKER_MODEL_PATH", os.path.join(os.getcwd(), "models", "reranker", "model_quantized.onnx"))
+# Hugging Face tokenizer.json of the same model; defaults to the model's directory
+RERANKER_TOKENIZER_PATH = os.getenv("RERANKER_TOKENIZER_PATH", "")
+RERANKER_MAX_LENGTH = int(os.getenv("RERANKER_MAX_LENGTH", "256"))
+RERANKER_INTRA_OP_THREADS = int(os.getenv("RERANKER_INTRA_OP_THREADS", "2"))
+
+
+class OnnxCrossEncoderReranker(Reranker):
+    """
+    Cross-encoder on CPU through ONNX Runtime. The query is paired with every passage and
+    the pairs run as one padded batch, so reranking N candidates costs one inference.
+
+    onnxruntime and tokenizers are only needed when this reranker is selected.
+    """
+    name = "onnx"
+
+    def __init__(self, model_path: str = RERANKER_MODEL_PATH, tokenizer_path: Optional[str] = None,
+                 max_length: int = RERANKER_MAX_LENGTH, threads: int = RERANKER_INTRA_OP_THREADS):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        tokenizer_path = tokenizer_path or RERANKER_TOKENIZER_PATH or os.path.join(
+            os.path.dirname(model_path), "tokenizer.json"
+        )
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        if not passages:
+            return []
+        encodings = self.tokenizer.encode_batch([(query, passage) for passage in passages])
+        inputs = {
+            "input_ids": np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.asarray([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+        logits = np.asarray(logits, dtype=np.float32)
+        if logits.ndim == 2:
+            # Single relevance logit, or (not relevant, relevant) pairs
+            logits = logits[:, 0] if logits.shape[1] == 1 else logits[:, -1] - logits[:, 0]
+        return logits.tolist()
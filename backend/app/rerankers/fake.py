@@ -0,0 +1,26 @@
+import re
+import time
+from typing import List
+
+from app.rerankers.base import Reranker
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeReranker(Reranker):
+    """
+    Offline reranker for tests and benchmarks: scores by the share of query words that
+    occur in the passage, after sleeping `latency` seconds to stand in for inference.
+    """
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        terms = set(_WORD.findall(query.lower()))
+        if not terms:
+            return [0.0] * len(passages)
+        return [len(terms & set(_WORD.findall(passage.lower()))) / len(terms) for passage in passages]
@@ -1,5 +1,19 @@
 from fastapi import APIRouter
 
+from app.database import get_pool_stats
+from app.rerankers import get_rerank_stats
+from app.services.access_service import project_access
+from app.services.chat_service_registry import chat_service_registry
+from app.services.message_writer import message_writer
+from app.utils.answer_cache import get_answer_cache
+from app.utils.content_cache import get_content_cache
+from app.utils.context_builder import get_context_stats
+from app.utils.embedding_engine import get_embedding_engine
+from app.utils.lexical_index import get_lexical_index_stats
+from app.utils.pdf_extraction import get_extraction_stats
+from app.utils.query_embedding_cache import get_query_embedding_cache
+from app.vectorstores import get_local_store_stats
+
 router = APIRouter()
 
 @router.get("/debug")
@@ -10,3 +24,26 @@ async def debug_endpoint():
     return {"status": "Service is running"}
 
 
+@router.get("/debug/metrics")
+async def metrics_endpoint():
+    """
+    Throughput counters for the ingestion pipeline of this process
+    """
+    content_cache = get_content_cache()
+    answer_cache = get_answer_cache()
+    query_embedding_cache = get_query_embedding_cache()
+    return {
+        "embedding": get_embedding_engine().get_stats(),
+        "pdf_extraction": get_extraction_stats(),
+        "content_cache": content_cache.get_stats() if content_cache else None,
+        "local_vector_stores": get_local_store_stats(),
+        "lexical_indexes": get_lexical_index_stats(),
+        "db_pool": get_pool_stats(),
+        "chat_services": chat_service_registry.get_stats(),
+        "message_writer": message_writer.get_stats(),
+        "project_access": project_access.get_stats(),
+        "reranker": get_rerank_stats(),
+        "context": get_context_stats(),
+        "answer_cache": answer_cache.get_stats() if answer_cache else None,
+        "query_embedding_cache": query_embedding_cache.get_stats() if query_embedding_cache else None,
+    }
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from dotenv import load_dotenv
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -9,7 +10,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-from app.config.pinecone_init import pc
+from app.services.vector_cleanup_service import VectorCleanupService
+from app.vectorstores import get_vector_store
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import tempfile
@@ -36,24 +38,23 @@ load_dotenv()
 @router.get("/documents/{project_id}")
 async def list_documents(project_id: str, limit: int = 10):
     try:
-        # Get the Pinecone index
-        index_name = f"project-{project_id}"
-        index = pc.Index(index_name)
-
-        # Use the query method to retrieve a list of vectors
-        # Note: Pinecone does not support listing all vectors directly, so we use a dummy query
-        query_response = index.query(
-            vector=[0] * 768,  # Dummy vector (all zeros)
-            top_k=limit,  # Limit the number of results
-            include_metadata=True  # Include metadata in the response
-        )
+        # Get the project's vector store
+        index = get_vector_store(project_id)
+
+        # Page through the stored vector IDs and fetch their metadata
+        ids = []
+        for page in index.list():
+            ids.extend(page)
+            if len(ids) >= limit:
+                break
+        fetched = index.fetch(ids[:limit]) if ids else {}
 
         # Extract document IDs and metadata from the response
         documents = []
-        for match in query_response.matches:
+        for vector_id, vector in fetched.items():
             documents.append({
-                "id": match.id,
-                "metadata": match.metadata
+                "id": vector_id,
+                "metadata": vector.metadata
             })
 
         return {"documents": documents}
@@ -61,19 +62,15 @@ async def list_documents(project_id: str, limit: int = 10):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/documents/{document_id}")
-async def delete_document(document_id: str):
+@router.delete("/documents/{project_id}/{document_id}")
+async def delete_document(project_id: int, document_id: int):
     try:
-        # Initialize the Pinecone index
-        index_name = f"project-{project_id}"
-        index = pc.Index(index_name)
-
-        logger.info(f"Deleting document with ID: {document_id}")
+        logger.info(f"Deleting vectors of document with ID: {document_id}")
 
-        # Perform deletion
-        index.delete(ids=[document_id])
+        # Delete every chunk of the document, not just one vector ID; the vector store and DB calls block
+        deleted = await asyncio.to_thread(VectorCleanupService.remove_document_vectors, project_id, document_id)
 
-        return {"message": f"Document with ID '{document_id}' deleted successfully"}
+        return {"message": f"Document with ID '{document_id}' deleted successfully", "deleted_vectors": deleted}
 
     except Exception as e:
         logger.error(f"Error deleting document: {e}")
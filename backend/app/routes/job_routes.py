@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.ingestion_job import IngestionJobResponse
+from app.services.ingestion_service import IngestionService
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+def get_job(job_id: str):
+    """
+    Get an ingestion job with per-document progress
+    (uploaded, extracted, chunked, embedded, upserted).
+    """
+    job = IngestionService.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,27 +1,63 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional
 
-from app.config.pinecone_init import pc
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
 from app.schemas.gemini_chat import GeminiChatRequest
 from app.schemas.chat import ChatRequest
 from app.schemas.message import MessageResponse, MessageCreate
 from app.services.chat_service import ChatService
+from app.services.chat_service_registry import get_chat_service
+from app.services.conversation_service import ConversationService
 from app.services.gemini_chat_service import GeminiChatService
 from app.services.intent_service import IntentService
 from app.services.message_service import MessageService
+from app.services.message_writer import message_writer
+from app.utils.embeddings import get_gemini_embedding_async
 
 
 router = APIRouter()
 
+MESSAGE_PAGE_MAX = 500
+
+
 @router.get("/messages/{project_id}/{user_id}", response_model=list[MessageResponse])
-def get_messages(project_id: str, user_id: str):
+def get_messages(
+        project_id: str,
+        user_id: str,
+        response: Response,
+        limit: Optional[int] = Query(None, ge=1, le=MESSAGE_PAGE_MAX),
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        db: Session = Depends(get_db)
+):
     """
-    Endpoint to fetch all messages for a specific project.
+    Endpoint to fetch the messages of a user in a project, oldest first.
+
+    Without parameters the whole conversation is returned; `limit` returns the latest
+    messages. The `X-Prev-Cursor` header, passed as `before`, pages to older messages;
+    `X-Next-Cursor`, passed as `after`, fetches messages newer than this page.
     """
     try:
-        messages = MessageService.get_project_messages(project_id, user_id)
-        if not messages:
+        messages, prev_cursor, next_cursor = MessageService.get_project_messages(
+            db, project_id, user_id, limit=limit, before=before, after=after
+        )
+        if not messages and not (before or after):
             raise HTTPException(status_code=404, detail="No messages found for the specified project")
+        if prev_cursor:
+            response.headers["X-Prev-Cursor"] = prev_cursor
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return messages
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e.__cause__.__str__()}")
 
@@ -29,43 +65,93 @@ def get_messages(project_id: str, user_id: str):
 @router.post("/chat/{project_id}/{user_id}")
 async def chat(request: MessageCreate):
     try:
-        # Call the service to handle the chat logic
-        chatService = ChatService(project_id = request.project_id)
-        messageService = MessageService()
-        messageService.create_message(request)
-        response = chatService.handle_chat(user_message = request.content)
+        # Messages are written behind the response, in batches (see message_writer)
+        started = datetime.utcnow()
+        message_writer.submit(request, timestamp=started)
+        # A registry miss resolves the vector store, which may block; keep it off the loop
+        chatService, history = await asyncio.gather(
+            asyncio.to_thread(get_chat_service, request.project_id),
+            ConversationService.get_history_async(request.project_id, request.user_id, before=started),
+        )
+        response = await chatService.handle_chat_async(user_message = request.content, history = history.render())
         messageRequestForAssistant = MessageCreate(project_id=request.project_id, user_id=request.user_id, content=response, role ="assistant")
-        messageService.create_message(messageRequestForAssistant)
+        message_writer.submit(messageRequestForAssistant)
+        ConversationService.schedule_summary_refresh(request.project_id, request.user_id)
         return {"response": response}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/{project_id}/{user_id}/stream")
+async def chat_stream(request: MessageCreate):
+    """
+    Streaming variant of `/chat`, as server-sent events:
+    `sources` (retrieved chunks) first, then a `token` event per piece of the answer,
+    and `done` once the answer is complete. The assistant message is written behind the
+    stream, so `done` carries no message ID.
+    """
+    try:
+        chatService = await asyncio.to_thread(get_chat_service, request.project_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    started = datetime.utcnow()
+    message_writer.submit(request, timestamp=started)
+
+    async def events():
+        # If the client disconnects, the generator is cancelled and the partial answer is not stored
+        answer = []
+        try:
+            history = await ConversationService.get_history_async(request.project_id, request.user_id, before=started)
+            async for event, data in chatService.stream_chat(request.content, history.render()):
+                if event == "token":
+                    answer.append(data)
+                yield sse_event(event, data)
+
+            message_writer.submit(MessageCreate(
+                project_id=request.project_id, user_id=request.user_id, content="".join(answer), role="assistant"
+            ))
+            ConversationService.schedule_summary_refresh(request.project_id, request.user_id)
+            yield sse_event("done", {})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @router.post("/validate_query")
-async def validate_user_query(query: str):
+async def validate_user_query(query: str, project_id: str):
     """
     API endpoint to validate user query before forwarding to LLM.
 
     :param query: User's query string
+    :param project_id: Project whose documents the query is checked against and answered from
     :return: Validation response
     """
 
     # Initialize vector database
+    chatService = await asyncio.to_thread(get_chat_service, project_id)
 
     # Allowed topics/documents the user can query about
     allowed_contexts = ["machine learning", "AI models", "document processing"]
 
     # Create an IntentService instance
-    intent_service = IntentService(vector_database=pc, allowed_contexts=allowed_contexts)
+    intent_service = IntentService(vector_database=chatService.index, allowed_contexts=allowed_contexts)
+
+    # Embed once; validation and the answer share the vector
+    query_embedding = await get_gemini_embedding_async(query)
 
-    is_valid, reason = intent_service.validate_query(query)
+    is_valid, reason = await asyncio.to_thread(intent_service.validate_query, query, query_embedding)
     if not is_valid:
         return {"success": False, "message": reason}
 
     # Query is valid; pass it forward to the LLM
-    chatService = ChatService()
-    response = chatService.handle_chat(user_message = query)
+    response = await chatService.handle_chat_async(user_message = query, query_embedding = query_embedding)
     return {"success": True, "response": response}
 
 # @router.post("/chat-with-gemini/")
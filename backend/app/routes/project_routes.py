@@ -1,23 +1,51 @@
 import json
 import os
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Response
 from typing import List, Optional
 
+from sqlalchemy.orm import Session
 from supabase import create_client
 
+from app.database import get_db
 from app.routes.auth_routes import get_current_user
 from app.schemas.project import ProjectCreate, ProjectResponse, DocumentCreate, ProjectAbstractData
-from app.services.project_service import ProjectService
+from app.services.project_service import ProjectService, PROJECT_LIST_MAX_PAGE_SIZE
+from app.utils.uploads import save_upload, remove_spooled_file
 
 router = APIRouter()
 
+
+def discard_spooled_uploads(file_info_list: List[dict]):
+    """
+    Remove spooled uploads when the request fails before they were queued.
+    """
+    for file_info in file_info_list:
+        remove_spooled_file(file_info["file_path"])
+
 @router.get("/projects", response_model=List[ProjectAbstractData])
-async def get_projects():
+async def get_projects(
+        response: Response,
+        state: Optional[str] = None,
+        access_type: Optional[str] = None,
+        q: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1, le=PROJECT_LIST_MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        db: Session = Depends(get_db),
+):
     """
-    Get all projects.
+    Get projects, most recently updated first, optionally filtered by state, access type
+    and name (`q`). With `limit`, one page is returned and the `X-Next-Cursor` header
+    carries the `cursor` of the next page; it is absent on the last page.
     """
-    projects = ProjectService.get_all_projects()
+    try:
+        projects, next_cursor = ProjectService.list_projects(
+            db, state=state, access_type=access_type, search=q, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return projects
 
 # @router.post("/projects", response_model=ProjectResponse)
@@ -33,14 +61,18 @@ async def get_projects():
 async def create_project_v2(
         project_data: str = Form(...),
         files: Optional[List[UploadFile]] = File(None),
-        groups: Optional[List[str]] = Form("[]")
+        groups: Optional[List[str]] = Form("[]"),
+        db: Session = Depends(get_db)
 ):
     """
     Create a new project with optional document uploads.
 
     - project_data: JSON string containing project information
     - files: Optional list of files to upload
+
+    Files are ingested in the background; poll `/jobs/{job_id}` for progress.
     """
+    file_info_list = []
     try:
         # Parse project data
         groups = json.loads(groups[0]) if isinstance(groups, list) and len(groups) == 1 else groups
@@ -48,13 +80,12 @@ async def create_project_v2(
         project_create = ProjectCreate(**project_dict)
 
         # Process files if provided
-        file_info_list = []
         if files:
             for file in files:
-                # Extract file info
+                # Extract file info and spool the upload for the ingestion workers
                 filename = file.filename
-                content = await file.read()
-                size = len(content)
+                spooled = await save_upload(file)
+                size = spooled["size"]
                 file_extension = filename.split('.')[-1] if '.' in filename else None
 
                 # Create document data
@@ -69,22 +100,24 @@ async def create_project_v2(
                 # Add to file info list
                 file_info_list.append({
                     "file": filename,
-                    "file_obj": content,
+                    "file_path": spooled["path"],
+                    "content_hash": spooled["sha256"],
                     "doc_data": doc_data
                 })
 
         # Create project with documents
-        project = ProjectService.create_project_v2(project_create, groups, file_info_list)
+        project = ProjectService.create_project_v2(db, project_create, groups, file_info_list)
         return project
     except Exception as e:
+        discard_spooled_uploads(file_info_list)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/projects/{project_id}", response_model=ProjectResponse)
-async def update_project(project_id: str, updated_data: dict):
+async def update_project(project_id: str, updated_data: dict, db: Session = Depends(get_db)):
     """
     Edit an existing project.
     """
-    project = ProjectService.update_project(project_id, updated_data)
+    project = ProjectService.update_project(db, project_id, updated_data)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
@@ -93,13 +126,15 @@ async def update_project(project_id: str, updated_data: dict):
 async def update_project2(
         project_id: str,
         project_data: str = Form(...),  # JSON string containing description & access type
-        files: Optional[List[UploadFile]] = File(None)
+        files: Optional[List[UploadFile]] = File(None),
+        db: Session = Depends(get_db)
 ):
     """
     Update an existing project:
     - Update **description** & **access type**.
-    - Add **new documents** if provided.
+    - Add **new documents** if provided; they are ingested in the background (see `job_id`).
     """
+    file_info_list = []
     try:
         # Parse project data (JSON string)
         project_dict = json.loads(project_data)
@@ -108,12 +143,11 @@ async def update_project2(
         name = project_dict.get("name")
 
         # Process files if provided
-        file_info_list = []
         if files:
             for file in files:
                 filename = file.filename
-                content = await file.read()
-                size = len(content)
+                spooled = await save_upload(file)
+                size = spooled["size"]
                 file_extension = filename.split('.')[-1] if '.' in filename else None
 
                 # Create document metadata
@@ -127,47 +161,49 @@ async def update_project2(
 
                 file_info_list.append({
                     "file": filename,
-                    "file_obj": content,
+                    "file_path": spooled["path"],
+                    "content_hash": spooled["sha256"],
                     "doc_data": doc_data
                 })
 
         # Call the service to update the project
         updated_project = ProjectService.update_project_with_files(
-            project_id, name, updated_description, access_type, file_info_list
+            db, project_id, name, updated_description, access_type, file_info_list
         )
         return updated_project
 
     except Exception as e:
+        discard_spooled_uploads(file_info_list)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/projects/{project_id}", response_model=dict)
-async def delete_project(project_id: str):
+async def delete_project(project_id: str, db: Session = Depends(get_db)):
     """
     Delete an existing project.
     """
-    success = ProjectService.delete_project(project_id)
+    success = ProjectService.delete_project(db, project_id)
     if not success:
         raise HTTPException(status_code=404, detail="Project not found")
     return {"message": f"Project '{project_id}' deleted successfully."}
 
 
 @router.get("/projects/{project_id}")
-def get_project_by_id(project_id: int):
+def get_project_by_id(project_id: int, db: Session = Depends(get_db)):
     """
     Get details for a project by its ID.
     """
     # Query the project from the database
-    project_and_groups = ProjectService.getProjectById(project_id)
+    project_and_groups = ProjectService.getProjectById(db, project_id)
     return project_and_groups
 
 @router.put("/projects/{project_id}/publish", response_model=ProjectAbstractData)
-async def publish_project(project_id: str):
+async def publish_project(project_id: str, db: Session = Depends(get_db)):
     """
     Publish an existing project by updating its state to 'published'.
     """
     try:
         # Call the ProjectService method to update the project state
-        project = ProjectService.publish_project(project_id)
+        project = ProjectService.publish_project(db, project_id)
         return project
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -190,16 +226,27 @@ async def publish_project(project_id: str):
 #         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/projects/user/{user_id}", response_model=List[ProjectAbstractData])
-async def get_projects_for_user_v2(user_id: str, user: dict = Depends(get_current_user)):
+async def get_projects_for_user_v2(
+        user_id: str,
+        response: Response,
+        q: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1, le=PROJECT_LIST_MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        user: dict = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
     """
-    Publish an existing project by updating its state to 'published'.
+    Get the published projects shared with the user, paged like `/projects`.
     """
     # user_id is user email
     try:
-        # Call the ProjectService method to update the project state
-        projects = ProjectService.get_projects_for_user(user_id)
+        projects, next_cursor = ProjectService.get_projects_for_user(db, user_id, search=q, limit=limit, cursor=cursor)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return projects
+    except HTTPException:
+        raise
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.routes.auth_routes import get_current_user
+from app.schemas.search import FederatedSearchRequest, FederatedSearchResponse
+from app.services.federated_search_service import FederatedSearchService
+
+router = APIRouter()
+
+
+@router.post("/search", response_model=FederatedSearchResponse)
+async def federated_search(request: FederatedSearchRequest, user: dict = Depends(get_current_user)):
+    """
+    Search all projects the signed-in user can access and return the best chunks overall,
+    with their project and document names.
+    """
+    try:
+        return await FederatedSearchService.search_async(user["email"], request.query, request.top_k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List
+
+
+# Progress of one document through extract -> chunk -> embed -> upsert
+class IngestionJobDocumentResponse(BaseModel):
+    document_id: int
+    file_name: str
+    status: str
+    stage: str
+    num_pages: int
+    num_chunks: int
+    num_embedded: int
+    num_upserted: int
+    num_deleted: int
+    attempts: int
+    error: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    project_id: int
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    total_documents: int
+    completed_documents: int
+    failed_documents: int
+    documents: List[IngestionJobDocumentResponse]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 
 
 class MessageCreate(BaseModel):
@@ -11,7 +11,7 @@ class MessageCreate(BaseModel):
 
 
 class MessageResponse(BaseModel):
-    id: int
+    id: Optional[int]  # None while the message is still buffered for writing
     content: str
     role: Literal['user', 'assistant']
     timestamp: datetime
@@ -46,6 +46,7 @@ class ProjectResponse(BaseModel):
     access_type: Optional[str]
     state: str
     documents: List[DocumentResponse]  # Include documents field
+    job_id: Optional[str] = None  # Background ingestion job for uploaded files, see /jobs/{job_id}
 
     # groups: List[Group]
 
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+
+class FederatedSearchRequest(BaseModel):
+    query: str
+    top_k: int = 10
+
+
+# One chunk in the merged results, with where it came from
+class FederatedSearchSource(BaseModel):
+    id: str
+    score: float
+    project_id: int
+    project_name: Optional[str] = None
+    document_id: Optional[int] = None
+    document_name: Optional[str] = None
+    text: str
+
+
+class FederatedSearchResponse(BaseModel):
+    query: str
+    results: List[FederatedSearchSource]
+    projects_searched: int
+    projects_failed: List[int] = []
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from supabase import create_client, Client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
+
+# How long a user's group memberships and the group -> project links are trusted. Links
+# changed through this process apply at once; changes made elsewhere (membership
+# scripts, other workers) show up within this window.
+ACCESS_CACHE_TTL_SECONDS = int(os.getenv("ACCESS_CACHE_TTL_SECONDS", "300"))
+ACCESS_CACHE_MAX_USERS = int(os.getenv("ACCESS_CACHE_MAX_USERS", "10000"))
+
+# PostgREST returns at most this many rows per request
+SUPABASE_PAGE_SIZE = 1000
+
+supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+class ProjectAccessResolver:
+    """
+    Resolves which projects a user (by email) can access through their groups.
+
+    Two materialised maps replace the per-request Supabase round trips:
+    - email -> group IDs, loaded per user with one embedded select and kept LRU with a TTL
+    - group ID -> project IDs, the whole `project_groups` table, reloaded after the TTL and
+      patched in place when this process links or unlinks a project
+
+    Every entry carries the version it was loaded under; `invalidate_all` bumps the
+    version so everything is reloaded on next use.
+    """
+
+    def __init__(self, ttl: int = ACCESS_CACHE_TTL_SECONDS, max_users: int = ACCESS_CACHE_MAX_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._version = 0
+        self._users = OrderedDict()  # email -> (group IDs or None for unknown emails, version, loaded at)
+        self._group_projects: Optional[Dict[int, Set[int]]] = None
+        self._group_projects_loaded = (0, -1.0)  # (version, loaded at)
+        self._stats = {"hits": 0, "misses": 0, "group_reloads": 0, "invalidations": 0}
+
+    def _fresh(self, version: int, loaded_at: float) -> bool:
+        return version == self._version and time.monotonic() - loaded_at <= self.ttl
+
+    # Remote loads
+
+    @staticmethod
+    def _load_user_groups(email: str) -> Optional[FrozenSet[int]]:
+        response = supabase.from_("emails").select("id, email_groups(group_id)").eq("email", email).execute()
+        if not response.data:
+            return None
+        return frozenset(row["group_id"] for row in response.data[0].get("email_groups") or [])
+
+    @staticmethod
+    def _load_group_projects() -> Dict[int, Set[int]]:
+        group_projects: Dict[int, Set[int]] = {}
+        start = 0
+        while True:
+            rows = (
+                supabase.from_("project_groups")
+                .select("group_id, project_id")
+                .order("project_id")
+                .order("group_id")
+                .range(start, start + SUPABASE_PAGE_SIZE - 1)
+                .execute()
+            ).data or []
+            for row in rows:
+                group_projects.setdefault(row["group_id"], set()).add(row["project_id"])
+            if len(rows) < SUPABASE_PAGE_SIZE:
+                return group_projects
+            start += SUPABASE_PAGE_SIZE
+
+    # Cached views
+
+    def _user_groups(self, email: str) -> Optional[FrozenSet[int]]:
+        with self._lock:
+            entry = self._users.get(email)
+            if entry and self._fresh(entry[1], entry[2]):
+                self._users.move_to_end(email)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+            version = self._version
+
+        groups = self._load_user_groups(email)
+        with self._lock:
+            self._users[email] = (groups, version, time.monotonic())
+            self._users.move_to_end(email)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return groups
+
+    def _group_project_map(self) -> Dict[int, Set[int]]:
+        with self._lock:
+            if self._group_projects is not None and self._fresh(*self._group_projects_loaded):
+                return self._group_projects
+        # One reload at a time; concurrent callers wait for it instead of repeating it
+        with self._load_lock:
+            with self._lock:
+                if self._group_projects is not None and self._fresh(*self._group_projects_loaded):
+                    return self._group_projects
+                version = self._version
+            group_projects = self._load_group_projects()
+            with self._lock:
+                self._group_projects = group_projects
+                self._group_projects_loaded = (version, time.monotonic())
+                self._stats["group_reloads"] += 1
+            return group_projects
+
+    def project_ids_for(self, email: str) -> Optional[Set[int]]:
+        """
+        IDs of the projects linked to any of the user's groups (published or not), or None
+        if the email is unknown.
+        """
+        groups = self._user_groups(email)
+        if groups is None:
+            return None
+        group_projects = self._group_project_map()
+        with self._lock:
+            return {project_id for group_id in groups for project_id in group_projects.get(group_id, ())}
+
+    # Incremental updates
+
+    def link_project(self, project_id: int, group_ids: Iterable[int]):
+        """
+        Record new `project_groups` rows written by this process.
+        """
+        with self._lock:
+            if self._group_projects is not None:
+                for group_id in group_ids:
+                    self._group_projects.setdefault(group_id, set()).add(int(project_id))
+
+    def unlink_project(self, project_id: int):
+        """
+        Forget a deleted project's `project_groups` rows.
+        """
+        with self._lock:
+            if self._group_projects is not None:
+                for projects in self._group_projects.values():
+                    projects.discard(int(project_id))
+
+    def invalidate_user(self, email: str):
+        """
+        Reload a user's groups on next use, e.g. after their membership changed.
+        """
+        with self._lock:
+            self._users.pop(email, None)
+            self._stats["invalidations"] += 1
+
+    def invalidate_all(self):
+        with self._lock:
+            self._version += 1
+            self._stats["invalidations"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["users"] = len(self._users)
+            stats["groups"] = len(self._group_projects) if self._group_projects is not None else 0
+            stats["version"] = self._version
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["ttl_seconds"] = self.ttl
+        return stats
+
+
+project_access = ProjectAccessResolver()
@@ -1,42 +1,173 @@
-from pinecone import Pinecone
 from google.generativeai import GenerativeModel
 import google.generativeai as genai
+import asyncio
 import os
+import threading
+import time
 
-from app.routes.document_routes import get_gemini_embedding
+from app.rerankers import RERANK_CANDIDATES, get_reranker, rerank, rerank_async
+from app.utils.answer_cache import get_answer_cache
+from app.utils.context_builder import build_context, token_budget
+from app.utils.embeddings import get_gemini_embedding, get_gemini_embedding_async
+from app.utils.lexical_index import HYBRID_CANDIDATE_MULTIPLIER, get_lexical_index, reciprocal_rank_fusion
+from app.vectorstores import get_vector_store
+
+GEMINI_CHAT_MODEL = os.getenv("GEMINI_CHAT_MODEL", "gemini-1.5-pro")
+
+# "gemini" (default) or "fake" for load tests without Gemini quota
+CHAT_MODEL_PROVIDER = os.getenv("CHAT_MODEL_PROVIDER", "gemini")
+FAKE_CHAT_LATENCY = float(os.getenv("FAKE_CHAT_LATENCY", "1.0"))
+# A follow-up is rewritten into a standalone question before retrieval; past this the turn
+# falls back to the raw message plus history, without the answer cache
+CHAT_CONDENSE_TIMEOUT_SECONDS = float(os.getenv("CHAT_CONDENSE_TIMEOUT_SECONDS", "5"))
+
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+
+class FakeChatResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeChatModel:
+    """
+    Stand-in for GenerativeModel that waits `latency` seconds and echoes the prompt size,
+    so the chat path can be load tested offline.
+    """
+
+    def __init__(self, latency: float = FAKE_CHAT_LATENCY):
+        self.latency = latency
+
+    def _respond(self, contents) -> FakeChatResponse:
+        return FakeChatResponse(f"Fake answer to a {sum(len(str(part)) for part in contents)}-character prompt.")
+
+    def generate_content(self, contents):
+        time.sleep(self.latency)
+        return self._respond(contents)
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        if stream:
+            return self._stream(contents)
+        await asyncio.sleep(self.latency)
+        return self._respond(contents)
+
+    async def _stream(self, contents):
+        # Spread the latency over the words, like a model producing tokens
+        words = self._respond(contents).text.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            yield FakeChatResponse(word if i == 0 else " " + word)
+
+
+def get_gemini_model() -> GenerativeModel:
+    """
+    The process-wide Gemini chat model; `genai.configure` runs once.
+    """
+    global _gemini_model
+    with _gemini_model_lock:
+        if _gemini_model is None:
+            if CHAT_MODEL_PROVIDER == "fake":
+                _gemini_model = FakeChatModel()
+            else:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _gemini_model = GenerativeModel(GEMINI_CHAT_MODEL)
+        return _gemini_model
 
 
 class ChatService():
+    """
+    Retrieval and generation for one project. Instances hold no per-request state and
+    are shared between requests through `chat_service_registry`.
+    """
+
     def __init__(self,project_id):
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        self.index_name = f"project-{project_id}"
-        self.index = self.pc.Index(self.index_name)
+        self.project_id = project_id
 
-        # Initialize Gemini client
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.gemini_model = GenerativeModel("gemini-1.5-pro")
+        # Resolve the project's vector store (Pinecone index/namespace or local)
+        self.index = get_vector_store(project_id)
+        # BM25 index over the same chunks, or None when hybrid search is off
+        self.lexical_index = get_lexical_index(project_id)
+        # Cross-encoder rescoring the retrieved candidates, or None when reranking is off
+        self.reranker = get_reranker()
 
-    def get_relevant_chunks(self, query: str, top_k: int = 5):
+        # Shared Gemini client
+        self.gemini_model = get_gemini_model()
+
+    def _pool_size(self, top_k: int) -> int:
+        # Candidates kept after fusion; the reranker picks top_k of these
+        return max(top_k, RERANK_CANDIDATES) if self.reranker else top_k
+
+    def _candidate_count(self, top_k: int) -> int:
+        pool = self._pool_size(top_k)
+        return max(pool, top_k * HYBRID_CANDIDATE_MULTIPLIER) if self.lexical_index else pool
+
+    def _lexical_search(self, query: str, top_k: int):
+        try:
+            return self.lexical_index.search(query, top_k)
+        except Exception as e:
+            print(f"Lexical search failed, using vector results only: {str(e)}")
+            return []
+
+    def _fuse(self, vector_matches, lexical_matches, top_k: int):
+        if not self.lexical_index:
+            return vector_matches[:top_k]
+        return reciprocal_rank_fusion([vector_matches, lexical_matches], top_k)
+
+    def retrieve(self, query: str, top_k: int = 5, query_embedding=None):
         """
-        Retrieve relevant chunks from the Pinecone vector store based on the query.
+        The best matching chunks (with metadata) for a query. With hybrid search on, vector
+        and BM25 candidates are merged by reciprocal rank fusion, so exact identifiers
+        (policy numbers, SKUs) rank even when their embedding is not close. With a reranker,
+        RERANK_CANDIDATES are retrieved and the reranker keeps the best `top_k`.
         """
         # Generate embeddings for the query
-        query_embedding = get_gemini_embedding(query)
+        if query_embedding is None:
+            query_embedding = get_gemini_embedding(query)
 
-        # Query Pinecone for relevant chunks
+        # Query the vector store for relevant chunks
+        candidates = self._candidate_count(top_k)
         query_response = self.index.query(
             vector=query_embedding,
-            top_k=top_k,
+            top_k=candidates,
             include_metadata=True
         )
+        lexical_matches = self._lexical_search(query, candidates) if self.lexical_index else []
+        matches = self._fuse(query_response.matches, lexical_matches, self._pool_size(top_k))
+        return rerank(query, matches, top_k) if self.reranker else matches
 
-        # Extract relevant chunks
-        relevant_chunks = []
-        for match in query_response.matches:
-            relevant_chunks.append(match.metadata["text"])
+    def get_relevant_chunks(self, query: str, top_k: int = 5):
+        """
+        Retrieve relevant chunks from the project's vector store based on the query.
+        """
+        return [match.metadata["text"] for match in self.retrieve(query, top_k)]
 
-        return relevant_chunks
+    async def retrieve_async(self, query: str, top_k: int = 5, query_embedding=None):
+        """
+        `retrieve` without blocking the event loop; the vector and BM25 queries run concurrently.
+        """
+        if query_embedding is None:
+            query_embedding = await get_gemini_embedding_async(query)
+        candidates = self._candidate_count(top_k)
+        vector_query = self.index.query_async(
+            vector=query_embedding,
+            top_k=candidates,
+            include_metadata=True
+        )
+        if self.lexical_index:
+            query_response, lexical_matches = await asyncio.gather(
+                vector_query, asyncio.to_thread(self._lexical_search, query, candidates)
+            )
+        else:
+            query_response, lexical_matches = await vector_query, []
+        matches = self._fuse(query_response.matches, lexical_matches, self._pool_size(top_k))
+        return await rerank_async(query, matches, top_k) if self.reranker else matches
+
+    async def get_relevant_chunks_async(self, query: str, top_k: int = 5):
+        """
+        `get_relevant_chunks` without blocking the event loop.
+        """
+        return [match.metadata["text"] for match in await self.retrieve_async(query, top_k)]
 
     def generate_chat_response(self, system_prompt: str, user_prompt: str):
         """
@@ -50,33 +181,182 @@ class ChatService():
         )
         return response.text
 
-    def handle_chat(self, user_message: str):
+    @staticmethod
+    def build_prompts(user_message: str, context: str, history: str = ""):
         """
-        Handle the chat logic:
-        1. Retrieve relevant chunks from Pinecone.
-        2. Generate a response using Gemini's Chat API.
+        The system and user prompts for a question, its assembled context (see `build_context`)
+        and the rendered conversation so far.
         """
-        print("user message is ", user_message)
-        # Step 1: Get relevant chunks from Pinecone
-        relevant_chunks = self.get_relevant_chunks(user_message)
-
-        # Step 2: Create the system prompt and user prompt
         system_prompt = """
         You are a helpful assistant. Use the following information to answer the user's question.
         If the information is not relevant, use your own knowledge to provide a helpful response.
         """
-        user_prompt = f"""
-        User's question: {user_message}
+        user_prompt = f"User's question: {user_message}\n\nRelevant information:\n{context}"
+        if history:
+            user_prompt = f"Conversation so far:\n{history}\n\n{user_prompt}"
+        return system_prompt, user_prompt
+
+    @staticmethod
+    def condense_prompt(user_message: str, history: str) -> str:
+        return f"""
+        Rewrite the user's latest message as a standalone question that can be understood without
+        the conversation: resolve references such as "it" or "the second one" from the conversation,
+        keep names, identifiers and numbers exactly, and do not answer it. If the message already
+        stands on its own, repeat it unchanged. Answer with the question only.
+
+        Conversation so far:
+        {history}
+
+        Latest message: {user_message}
+        """
+
+    @staticmethod
+    def _standalone(user_message: str, history: str, text: str):
+        """
+        `(question, history)` for the rest of the turn: the rewritten question without the
+        history it already folds in, or the raw message and history if the rewrite came back empty.
+        """
+        text = (text or "").strip()
+        return (text, "") if text else (user_message, history)
+
+    def standalone_question(self, user_message: str, history: str = ""):
+        """
+        Rewrite a follow-up into a self-contained question, so retrieval and the answer cache
+        work on what is actually being asked. Returns `(question, history)`; the history is
+        only kept when there was none to fold in or the rewrite failed.
+        """
+        if not history:
+            return user_message, history
+        try:
+            response = self.gemini_model.generate_content([self.condense_prompt(user_message, history)])
+            return self._standalone(user_message, history, response.text)
+        except Exception as e:
+            print(f"Question rewrite failed, answering with the conversation instead: {str(e)}")
+            return user_message, history
 
-        Relevant information:
-         {relevant_chunks}
+    async def standalone_question_async(self, user_message: str, history: str = ""):
+        """
+        `standalone_question` without blocking the event loop, bounded by CHAT_CONDENSE_TIMEOUT_SECONDS.
         """
+        if not history:
+            return user_message, history
+        try:
+            response = await asyncio.wait_for(
+                self.gemini_model.generate_content_async([self.condense_prompt(user_message, history)]),
+                CHAT_CONDENSE_TIMEOUT_SECONDS
+            )
+            return self._standalone(user_message, history, response.text)
+        except Exception as e:
+            print(f"Question rewrite failed, answering with the conversation instead: {str(e)}")
+            return user_message, history
 
-        # Step 3: Generate the response using Gemini
+    def build_context(self, matches) -> str:
+        """
+        The retrieved chunks merged, deduplicated and trimmed to the chat model's context budget.
+        """
+        return build_context(matches, token_budget(GEMINI_CHAT_MODEL))
+
+    def _cached_answer(self, query_embedding, matches, history: str = ""):
+        cache = get_answer_cache()
+        if cache and history:
+            # Only when the question could not be made standalone: the answer then depends on
+            # the conversation, not just the question and chunks
+            cache.record_bypass()
+            return None
+        return cache.get(self.project_id, query_embedding, [match.id for match in matches]) if cache else None
+
+    def _cache_answer(self, query_embedding, matches, answer: str, history: str = ""):
+        cache = get_answer_cache() if not history else None
+        if cache and answer:
+            cache.put(self.project_id, query_embedding, [match.id for match in matches], answer)
+
+    def handle_chat(self, user_message: str, history: str = ""):
+        """
+        Handle the chat logic (`history` is the rendered conversation so far, if any):
+        0. Rewrite a follow-up into a standalone question (see `standalone_question`).
+        1. Retrieve relevant chunks from Pinecone.
+        2. Reuse the answer to a near-identical question over the same chunks, if cached.
+        3. Otherwise generate a response using Gemini's Chat API.
+        """
+        print("user message is ", user_message)
+        user_message, history = self.standalone_question(user_message, history)
+        # Step 1: Get relevant chunks from Pinecone
+        query_embedding = get_gemini_embedding(user_message)
+        matches = self.retrieve(user_message, query_embedding=query_embedding)
+
+        # Step 2: Semantic answer cache
+        cached = self._cached_answer(query_embedding, matches, history)
+        if cached is not None:
+            return cached
+
+        # Step 3: Create the system prompt and user prompt
+        system_prompt, user_prompt = self.build_prompts(user_message, self.build_context(matches), history)
+
+        # Step 4: Generate the response using Gemini
         print("system prompt is ", system_prompt)
         print("user prompt is ", user_prompt)
         response = self.gemini_model.generate_content(
             [system_prompt, user_prompt]  # Gemini expects a list of strings
         )
 
+        self._cache_answer(query_embedding, matches, response.text, history)
         return response.text
+
+    async def handle_chat_async(self, user_message: str, query_embedding=None, history: str = ""):
+        """
+        `handle_chat` for the async chat route: embedding, retrieval and generation
+        all yield to the event loop while they wait. Pass `query_embedding` when the
+        caller has already embedded the message.
+        """
+        question, history = await self.standalone_question_async(user_message, history)
+        if question != user_message:
+            query_embedding = None  # The caller's embedding is of the raw follow-up
+        user_message = question
+        if query_embedding is None:
+            query_embedding = await get_gemini_embedding_async(user_message)
+        matches = await self.retrieve_async(user_message, query_embedding=query_embedding)
+        cached = self._cached_answer(query_embedding, matches, history)
+        if cached is not None:
+            return cached
+
+        system_prompt, user_prompt = self.build_prompts(user_message, self.build_context(matches), history)
+        response = await self.gemini_model.generate_content_async([system_prompt, user_prompt])
+        self._cache_answer(query_embedding, matches, response.text, history)
+        return response.text
+
+    async def stream_chat(self, user_message: str, history: str = ""):
+        """
+        Streaming `handle_chat_async`. Yields `("sources", [...])` once retrieval is done,
+        then `("token", text)` for each piece of the answer as Gemini produces it.
+        """
+        user_message, history = await self.standalone_question_async(user_message, history)
+        query_embedding = await get_gemini_embedding_async(user_message)
+        matches = await self.retrieve_async(user_message, query_embedding=query_embedding)
+        yield "sources", [
+            {
+                "id": match.id,
+                "score": match.score,
+                "document_id": match.metadata.get("document_id"),
+                "document_name": match.metadata.get("document_name"),
+            }
+            for match in matches
+        ]
+
+        cached = self._cached_answer(query_embedding, matches, history)
+        if cached is not None:
+            yield "token", cached
+            return
+
+        system_prompt, user_prompt = self.build_prompts(user_message, self.build_context(matches), history)
+        response = await self.gemini_model.generate_content_async([system_prompt, user_prompt], stream=True)
+        answer = []
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. only safety ratings) carry nothing to show
+                continue
+            if text:
+                answer.append(text)
+                yield "token", text
+        self._cache_answer(query_embedding, matches, "".join(answer), history)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.services.chat_service import ChatService
+
+# Ready ChatService instances are dropped after this long without a request
+CHAT_SERVICE_IDLE_TTL_SECONDS = int(os.getenv("CHAT_SERVICE_IDLE_TTL_SECONDS", "900"))
+CHAT_SERVICE_MAX_PROJECTS = int(os.getenv("CHAT_SERVICE_MAX_PROJECTS", "256"))
+
+
+class ChatServiceRegistry:
+    """
+    Process-wide cache of ready ChatService instances, one per project.
+
+    The first chat turn of a project resolves its vector store and client handles; later
+    turns reuse them until the instance has been idle for `idle_ttl` seconds or the project
+    is invalidated (re-published, updated, deleted). Requests already holding the old
+    instance finish with it.
+    """
+
+    def __init__(self, idle_ttl: int = CHAT_SERVICE_IDLE_TTL_SECONDS, max_entries: int = CHAT_SERVICE_MAX_PROJECTS,
+                 factory=ChatService):
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # project key -> (service, last used)
+        self._key_locks = {}
+        self._generations = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, project_id) -> ChatService:
+        key = str(project_id)
+        service = self._lookup(key)
+        if service:
+            return service
+
+        # One construction per project at a time; concurrent first requests wait for it
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            service = self._lookup(key)
+            if service:
+                return service
+            with self._lock:
+                generation = self._generations.get(key, 0)
+                self._misses += 1
+            service = self.factory(project_id)
+            with self._lock:
+                # Don't cache an instance built from state invalidated while we were building it
+                if self._generations.get(key, 0) == generation:
+                    self._entries[key] = (service, time.monotonic())
+                    self._evict()
+            return service
+
+    def _lookup(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            service, last_used = entry
+            if now - last_used > self.idle_ttl:
+                del self._entries[key]
+                self._evictions += 1
+                return None
+            self._entries[key] = (service, now)
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return service
+
+    def _evict(self):
+        # Caller holds the lock; entries are in least-recently-used order
+        now = time.monotonic()
+        while self._entries:
+            key, (_, last_used) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - last_used <= self.idle_ttl:
+                break
+            del self._entries[key]
+            self._evictions += 1
+
+    def invalidate(self, project_id):
+        """
+        Drop a project's instance so the next request builds a fresh one.
+        """
+        key = str(project_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "projects": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "idle_ttl_seconds": self.idle_ttl,
+            }
+
+
+chat_service_registry = ChatServiceRegistry()
+
+
+def get_chat_service(project_id) -> ChatService:
+    return chat_service_registry.get(project_id)
@@ -0,0 +1,184 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import AsyncSessionLocal
+from app.models.message import Message, ConversationSummary
+from app.services.chat_service import get_gemini_model
+from app.services.message_writer import message_writer
+from app.utils.context_builder import estimate_tokens
+
+CHAT_HISTORY_ENABLED = os.getenv("CHAT_HISTORY_ENABLED", "true").lower() == "true"
+# Prompt tokens for the verbatim recent turns; older turns live on in the summary
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1500"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "400"))
+# Upper bound on the unsummarised messages read per turn
+CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "50"))
+
+# Once the unsummarised turns exceed the budget, the oldest are folded in until they fill
+# this share of it, so the summary is rewritten every few turns rather than every turn
+SUMMARY_REFRESH_TARGET = 0.5
+
+# Background summary refreshes; referenced here so they are not garbage collected mid-run
+_refresh_tasks = {}
+
+
+class ConversationHistory:
+    """
+    What the model sees of earlier turns: the rolling summary plus the latest messages verbatim.
+    """
+
+    def __init__(self, summary: str = "", turns: Optional[List[Tuple[str, str]]] = None):
+        self.summary = summary
+        self.turns = turns or []  # (role, content), oldest first
+
+    def __bool__(self):
+        return bool(self.summary or self.turns)
+
+    def render(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        if self.turns:
+            parts.append("\n".join(f"{role.capitalize()}: {content}" for role, content in self.turns))
+        return "\n\n".join(parts)
+
+
+class ConversationService:
+
+    @staticmethod
+    async def _load(db, project_id: str, user_id: str, before: Optional[datetime] = None, include_buffered: bool = True):
+        pending = message_writer.pending_for(project_id, user_id) if include_buffered else []
+        summary = (await db.execute(
+            select(ConversationSummary)
+            .where(ConversationSummary.project_id == project_id, ConversationSummary.user_id == user_id)
+        )).scalar_one_or_none()
+        query = (
+            select(Message)
+            .where(Message.project_id == project_id, Message.user_id == user_id,
+                   Message.id > (summary.last_message_id if summary else 0))
+            .order_by(Message.timestamp.desc(), Message.id.desc())  # Walks ix_messages_conversation backwards
+            .limit(CHAT_HISTORY_MAX_MESSAGES)
+        )
+        if before is not None:
+            query = query.where(Message.timestamp < before)
+        messages = list(reversed((await db.execute(query)).scalars().all()))
+
+        # Turns still buffered by the message writer are part of the conversation too
+        stored_ids = {message.id for message in messages}
+        buffered = [message for message in pending if message.id not in stored_ids
+                    and (before is None or message.timestamp < before)]
+        if buffered:
+            messages = sorted(messages + buffered, key=lambda message: message.timestamp)
+        return summary, messages
+
+    @staticmethod
+    async def get_history_async(project_id: str, user_id: str, before: Optional[datetime] = None) -> ConversationHistory:
+        """
+        The conversation before `before` (the current turn's start): the summary and as
+        many of the newest unsummarised messages as fit in CHAT_HISTORY_TOKEN_BUDGET.
+        """
+        if not CHAT_HISTORY_ENABLED:
+            return ConversationHistory()
+        async with AsyncSessionLocal() as db:
+            summary, messages = await ConversationService._load(db, project_id, user_id, before)
+
+        turns, used = [], 0
+        for message in reversed(messages):
+            tokens = estimate_tokens(message.content)
+            if used + tokens > CHAT_HISTORY_TOKEN_BUDGET:
+                break
+            turns.append((message.role, message.content))
+            used += tokens
+        turns.reverse()
+        return ConversationHistory(summary.summary if summary else "", turns)
+
+    @staticmethod
+    async def refresh_summary_async(project_id: str, user_id: str) -> bool:
+        """
+        Fold the oldest unsummarised messages into the rolling summary once the unsummarised
+        ones no longer fit the history budget. Returns whether the summary changed.
+        """
+        async with AsyncSessionLocal() as db:
+            # Only stored messages: the summary records the ID of the last one it folded
+            summary, messages = await ConversationService._load(db, project_id, user_id, include_buffered=False)
+        sizes = [estimate_tokens(message.content) for message in messages]
+        if sum(sizes) <= CHAT_HISTORY_TOKEN_BUDGET:
+            return False
+
+        # Keep the newest messages that fill the target, fold everything older
+        kept, target = 0, CHAT_HISTORY_TOKEN_BUDGET * SUMMARY_REFRESH_TARGET
+        split = len(messages)
+        while split > 0 and kept + sizes[split - 1] <= target:
+            split -= 1
+            kept += sizes[split]
+        folded = messages[:split]
+
+        previous = summary.summary if summary else ""
+        transcript = "\n".join(f"{message.role.capitalize()}: {message.content}" for message in folded)
+        prompt = f"""
+        Update the running summary of a conversation between a user and an assistant that answers
+        from the user's project documents. Keep facts, names, identifiers, decisions and open questions;
+        drop pleasantries. Answer with the summary only, in at most {CHAT_SUMMARY_TOKEN_BUDGET * 3 // 4} words.
+
+        Current summary:
+        {previous or "(none)"}
+
+        New turns:
+        {transcript}
+        """
+        # No session is held while the model writes
+        response = await get_gemini_model().generate_content_async([prompt])
+        text = (response.text or "").strip()
+        if not text:
+            return False
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            if summary:
+                # Another worker may have folded these turns meanwhile; only the first write wins
+                result = await db.execute(
+                    update(ConversationSummary)
+                    .where(ConversationSummary.id == summary.id,
+                           ConversationSummary.last_message_id == summary.last_message_id)
+                    .values(summary=text, last_message_id=folded[-1].id, updated_at=now)
+                )
+                changed = result.rowcount == 1
+            else:
+                db.add(ConversationSummary(project_id=project_id, user_id=user_id, summary=text,
+                                           last_message_id=folded[-1].id, updated_at=now))
+                changed = True
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another worker created the summary first
+                await db.rollback()
+                return False
+        return changed
+
+    @staticmethod
+    def schedule_summary_refresh(project_id: str, user_id: str):
+        """
+        Refresh the summary after the answer went out, at most once at a time per conversation.
+        """
+        if not CHAT_HISTORY_ENABLED:
+            return
+        key = (project_id, user_id)
+        if key in _refresh_tasks:
+            return
+
+        async def run():
+            try:
+                # The summary folds messages by ID, so the turn just answered must be written first
+                await message_writer.flush()
+                await ConversationService.refresh_summary_async(project_id, user_id)
+            except Exception as e:
+                print(f"Conversation summary refresh failed for {key}: {str(e)}")
+            finally:
+                _refresh_tasks.pop(key, None)
+
+        _refresh_tasks[key] = asyncio.create_task(run())
@@ -0,0 +1,93 @@
+import asyncio
+import heapq
+import os
+from typing import List
+
+from app.database import SessionLocal
+from app.schemas.search import FederatedSearchResponse, FederatedSearchSource
+from app.services.project_service import ProjectService
+from app.utils.embeddings import get_gemini_embedding_async
+from app.vectorstores import get_vector_store
+
+# Projects queried at once per search
+FEDERATED_SEARCH_CONCURRENCY = int(os.getenv("FEDERATED_SEARCH_CONCURRENCY", "16"))
+# A project that has not answered by then is left out rather than holding up the rest
+FEDERATED_SEARCH_TIMEOUT_SECONDS = float(os.getenv("FEDERATED_SEARCH_TIMEOUT_SECONDS", "5"))
+FEDERATED_SEARCH_MAX_TOP_K = 50
+
+
+class FederatedSearchService:
+
+    @staticmethod
+    def _accessible_projects(email: str):
+        # A short session of its own, so no connection is held while the projects are searched
+        with SessionLocal() as db:
+            projects, _ = ProjectService.get_projects_for_user(db, email)
+            return projects
+
+    @staticmethod
+    async def _query_project(project_id: int, query_embedding, top_k: int):
+        # Resolving a Pinecone index handle may block on its first use
+        index = await asyncio.to_thread(get_vector_store, project_id)
+        response = await index.query_async(vector=query_embedding, top_k=top_k, include_metadata=True)
+        return response.matches
+
+    @staticmethod
+    async def _search_project(project, query_embedding, top_k: int, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            # The timeout starts once the project's turn comes, not while it waits for a slot
+            return await asyncio.wait_for(
+                FederatedSearchService._query_project(project.id, query_embedding, top_k),
+                FEDERATED_SEARCH_TIMEOUT_SECONDS
+            )
+
+    @staticmethod
+    async def search_async(email: str, query: str, top_k: int = 10) -> FederatedSearchResponse:
+        """
+        Search every published project the user can access with one query embedding.
+
+        Projects are queried in parallel (at most FEDERATED_SEARCH_CONCURRENCY at a time)
+        and their matches merged by cosine score, which is comparable across projects since
+        they share the embedding model. Projects that fail or time out are reported in
+        `projects_failed` instead of failing the search.
+        """
+        top_k = max(1, min(top_k, FEDERATED_SEARCH_MAX_TOP_K))
+        projects, query_embedding = await asyncio.gather(
+            asyncio.to_thread(FederatedSearchService._accessible_projects, email),
+            get_gemini_embedding_async(query),
+        )
+
+        semaphore = asyncio.Semaphore(FEDERATED_SEARCH_CONCURRENCY)
+        outcomes = await asyncio.gather(
+            *(FederatedSearchService._search_project(project, query_embedding, top_k, semaphore)
+              for project in projects),
+            return_exceptions=True
+        )
+
+        candidates: List[tuple] = []
+        failed = []
+        for project, outcome in zip(projects, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Federated search skipped project {project.id}: {outcome!r}")
+                failed.append(project.id)
+                continue
+            candidates.extend((match, project) for match in outcome)
+
+        best = heapq.nlargest(top_k, candidates, key=lambda candidate: candidate[0].score)
+        return FederatedSearchResponse(
+            query=query,
+            results=[
+                FederatedSearchSource(
+                    id=match.id,
+                    score=match.score,
+                    project_id=project.id,
+                    project_name=match.metadata.get("project_name") or project.name,
+                    document_id=match.metadata.get("document_id"),
+                    document_name=match.metadata.get("document_name"),
+                    text=match.metadata.get("text", ""),
+                )
+                for match, project in best
+            ],
+            projects_searched=len(projects) - len(failed),
+            projects_failed=failed,
+        )
@@ -0,0 +1,369 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import uuid4
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from sqlalchemy.orm import Session, aliased
+
+from app.database import get_db
+from app.models.ingestion_job import (
+    IngestionJob, IngestionJobDocument,
+    JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED, JOB_STATUS_FAILED,
+    STAGE_UPLOADED, STAGE_EXTRACTED, STAGE_CHUNKED, STAGE_EMBEDDED, STAGE_UPSERTED,
+)
+from app.models.project import Document, DocumentChunk
+from app.schemas.ingestion_job import IngestionJobResponse, IngestionJobDocumentResponse
+from app.utils.content_cache import get_content_cache, file_hash, chunk_hash
+from app.utils.embedding_engine import get_embedding_engine
+from app.utils.embeddings import get_gemini_embeddings
+from app.utils.lexical_index import get_lexical_index
+from app.utils.pdf_extraction import iter_pdf_pages
+from app.utils.supabase import upload_to_supabase
+from app.utils.uploads import remove_spooled_file
+from app.vectorstores import get_vector_store
+
+# File types we extract text from and index
+EXTRACTABLE_EXTENSIONS = {"pdf", "doc", "docx"}
+
+# A document is retried this many times before it is marked FAILED
+MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+
+# Claims older than this are assumed to belong to a dead worker and are re-queued
+CLAIM_TIMEOUT_SECONDS = int(os.getenv("INGESTION_CLAIM_TIMEOUT_SECONDS", "1800"))
+
+UPSERT_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000  # Pinecone's limit of IDs per delete request
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+CHUNK_CONFIG = f"{CHUNK_SIZE}:{CHUNK_OVERLAP}"
+
+
+def chunk_vector_id(project_id: int, document_id: int, content_hash: str) -> str:
+    return f"project_{project_id}_doc_{document_id}_chunk_{content_hash[:32]}"
+
+
+def list_document_vector_ids(index, project_id: int, document_id: int) -> List[str]:
+    """
+    Enumerate every vector ID stored for a document by ID prefix (serverless indexes only).
+    """
+    try:
+        ids = []
+        for page in index.list(prefix=f"project_{project_id}_doc_{document_id}_chunk_"):
+            ids.extend(page)
+        return ids
+    except Exception as e:
+        print(f"Could not list vectors for document {document_id}: {str(e)}")
+        return []
+
+
+class IngestionService:
+
+    @staticmethod
+    def enqueue_documents(db: Session, project_id: int, documents: List[dict]) -> Optional[IngestionJob]:
+        """
+        Create an ingestion job with one work item per document. The caller owns the
+        session and commits, so the job becomes visible together with the documents.
+
+        :param documents: dicts with the flushed `document` row, its spooled `file_path`
+            and the upload's `content_hash`.
+        """
+        if not documents:
+            return None
+
+        job = IngestionJob(id=str(uuid4()), project_id=project_id, status=JOB_STATUS_QUEUED)
+        db.add(job)
+        for item in documents:
+            document = item["document"]
+            db.add(IngestionJobDocument(
+                job_id=job.id,
+                document_id=document.id,
+                file_name=document.name,
+                file_extension=document.file_extension,
+                file_path=item["file_path"],
+                content_hash=item.get("content_hash"),
+                status=JOB_STATUS_QUEUED,
+            ))
+        return job
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[IngestionJobResponse]:
+        """
+        Return the job with per-document progress, or None if it does not exist.
+        """
+        db: Session = next(get_db())
+        try:
+            job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+            if not job:
+                return None
+
+            documents = [IngestionJobDocumentResponse.model_validate(doc) for doc in job.documents]
+            return IngestionJobResponse(
+                id=job.id,
+                project_id=job.project_id,
+                status=job.status,
+                created_at=job.created_at,
+                updated_at=job.updated_at,
+                total_documents=len(documents),
+                completed_documents=sum(1 for doc in documents if doc.status == JOB_STATUS_COMPLETED),
+                failed_documents=sum(1 for doc in documents if doc.status == JOB_STATUS_FAILED),
+                documents=documents,
+            )
+        finally:
+            db.close()
+
+    @staticmethod
+    def claim_next_document(worker_id: str) -> Optional[int]:
+        """
+        Atomically claim the oldest queued document. `SKIP LOCKED` lets any number of
+        worker processes poll the same table without handing out a document twice.
+
+        Versions of one document are processed one at a time and in upload order: a queued
+        row is only claimable when no other row for the same document is running or queued
+        ahead of it, since each run diffs against the chunk manifest the previous one left.
+        """
+        db: Session = next(get_db())
+        try:
+            other = aliased(IngestionJobDocument)
+            blocked = (
+                db.query(other.id)
+                .filter(other.document_id == IngestionJobDocument.document_id,
+                        (other.status == JOB_STATUS_RUNNING)
+                        | ((other.status == JOB_STATUS_QUEUED) & (other.id < IngestionJobDocument.id)))
+                .exists()
+            )
+            job_doc = (
+                db.query(IngestionJobDocument)
+                .filter(IngestionJobDocument.status == JOB_STATUS_QUEUED, ~blocked)
+                .order_by(IngestionJobDocument.id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if not job_doc:
+                db.rollback()
+                return None
+
+            job_doc.status = JOB_STATUS_RUNNING
+            job_doc.claimed_by = worker_id
+            job_doc.claimed_at = datetime.now()
+            job_doc.attempts += 1
+            job_doc.job.status = JOB_STATUS_RUNNING
+            db.commit()
+            return job_doc.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def requeue_stale_documents() -> int:
+        """
+        Put documents whose worker disappeared mid-run back on the queue.
+        """
+        db: Session = next(get_db())
+        try:
+            cutoff = datetime.now() - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)
+            stale = (
+                db.query(IngestionJobDocument)
+                .filter(IngestionJobDocument.status == JOB_STATUS_RUNNING,
+                        IngestionJobDocument.claimed_at < cutoff)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for job_doc in stale:
+                if job_doc.attempts >= MAX_ATTEMPTS:
+                    job_doc.status = JOB_STATUS_FAILED
+                    job_doc.error = "Worker stopped responding"
+                else:
+                    job_doc.status = JOB_STATUS_QUEUED
+                job_doc.claimed_by = None
+            db.commit()
+            return len(stale)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def process_document(job_document_id: int):
+        """
+        Run the ingestion pipeline for one claimed document:
+        upload to Supabase, extract text, chunk, embed and upsert into Pinecone.
+        Progress is committed after every stage so `/jobs/{id}` can report it.
+        """
+        db: Session = next(get_db())
+        job_doc = db.get(IngestionJobDocument, job_document_id)
+        if not job_doc:
+            db.close()
+            return
+
+        try:
+            document = db.get(Document, job_doc.document_id)
+            if not document:
+                raise ValueError(f"Document {job_doc.document_id} no longer exists")
+            project = document.project
+
+            # Upload to Supabase, replacing the previous version of the document if any
+            try:
+                SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME")
+                supabase_url = upload_to_supabase(job_doc.file_path, SUPABASE_BUCKET_NAME, project.id, document.id,
+                                                  upsert=True)
+                if supabase_url:
+                    document.s3_url = supabase_url
+            except Exception as e:
+                print(f"Supabase upload error: {str(e)}")
+            IngestionService._advance(db, job_doc, STAGE_UPLOADED)
+
+            if (job_doc.file_extension or "").lower() in EXTRACTABLE_EXTENSIONS:
+                # Skip extraction and chunking for files we have already processed
+                cache = get_content_cache()
+                doc_hash = job_doc.content_hash or file_hash(job_doc.file_path)
+                cached_doc = cache.get_document(doc_hash, CHUNK_CONFIG) if cache else None
+
+                if cached_doc:
+                    page_texts = cached_doc["page_texts"]
+                else:
+                    # Extract text from PDF on the extraction process pool
+                    page_texts = list(iter_pdf_pages(job_doc.file_path))
+                texts = [page_text for page_text in page_texts if page_text]
+                job_doc.num_pages = len(page_texts)
+                IngestionService._advance(db, job_doc, STAGE_EXTRACTED)
+
+                text_chunks = cached_doc["chunks"] if cached_doc else None
+                if text_chunks is None:
+                    # Split text into chunks
+                    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+                    text_chunks = text_splitter.split_text("\n".join(texts)) if texts else []
+                    if cache:
+                        cache.put_document(doc_hash, page_texts, CHUNK_CONFIG, text_chunks)
+
+                # Diff the new version against the chunks already indexed for this document
+                new_chunks = {}
+                for position, text in enumerate(text_chunks):
+                    new_chunks.setdefault(chunk_hash(text), (position, text))
+                indexed_chunks = {chunk.chunk_hash: chunk for chunk in document.chunks}
+                added_hashes = [key for key in new_chunks if key not in indexed_chunks]
+                removed_chunks = [chunk for key, chunk in indexed_chunks.items() if key not in new_chunks]
+                job_doc.num_chunks = len(text_chunks)
+                IngestionService._advance(db, job_doc, STAGE_CHUNKED)
+
+                # Generate embeddings in batched requests, only for chunks that are new in this version
+                added_texts = [new_chunks[key][1] for key in added_hashes]
+                if not added_texts:
+                    embeddings = []
+                elif cache:
+                    embeddings = cache.embed_with_cache(
+                        added_texts, get_gemini_embeddings, get_embedding_engine().provider.model_key
+                    )
+                else:
+                    embeddings = get_gemini_embeddings(added_texts)
+                job_doc.num_embedded = len(embeddings)
+                IngestionService._advance(db, job_doc, STAGE_EMBEDDED)
+
+                index = get_vector_store(project.id)
+                new_vector_ids = {chunk_vector_id(project.id, document.id, key) for key in new_chunks}
+
+                # Documents indexed before chunk manifests existed used positional IDs
+                stale_ids = [chunk.vector_id for chunk in removed_chunks]
+                if not indexed_chunks:
+                    stale_ids += [vector_id for vector_id in list_document_vector_ids(index, project.id, document.id)
+                                  if vector_id not in new_vector_ids]
+
+                def chunk_metadata(key: str, text: str) -> dict:
+                    return {
+                        "project_id": project.id,
+                        "document_id": document.id,
+                        "chunk_hash": key,
+                        "text": text,
+                        "project_name": project.name,
+                        "document_name": document.name
+                    }
+
+                # Prepare vectors for Pinecone
+                vectors = [
+                    {
+                        "id": chunk_vector_id(project.id, document.id, key),
+                        "values": embedding,
+                        "metadata": chunk_metadata(key, text)
+                    }
+                    for key, text, embedding in zip(added_hashes, added_texts, embeddings)
+                ]
+
+                # Insert vectors in batches
+                for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+                    batch = vectors[i:i + UPSERT_BATCH_SIZE]
+                    index.upsert(vectors=batch)
+                    job_doc.num_upserted += len(batch)
+
+                # Remove chunks that no longer exist in the new version
+                for i in range(0, len(stale_ids), DELETE_BATCH_SIZE):
+                    index.delete(ids=stale_ids[i:i + DELETE_BATCH_SIZE])
+                job_doc.num_deleted = len(stale_ids)
+
+                # Keep the BM25 index in step; unchanged chunks it lacks (indexed before it existed) are added too
+                lexical_index = get_lexical_index(project.id)
+                if lexical_index:
+                    lexical_index.delete(stale_ids)
+                    missing = set(lexical_index.missing_ids(list(new_vector_ids)))
+                    lexical_index.add([
+                        {"id": chunk_vector_id(project.id, document.id, key), "metadata": chunk_metadata(key, text)}
+                        for key, (_, text) in new_chunks.items()
+                        if chunk_vector_id(project.id, document.id, key) in missing
+                    ])
+
+                # Record the new manifest
+                for chunk in removed_chunks:
+                    document.chunks.remove(chunk)
+                for key, (position, _) in new_chunks.items():
+                    if key in indexed_chunks:
+                        indexed_chunks[key].position = position
+                    else:
+                        document.chunks.append(DocumentChunk(
+                            vector_id=chunk_vector_id(project.id, document.id, key),
+                            chunk_hash=key,
+                            position=position
+                        ))
+                IngestionService._advance(db, job_doc, STAGE_UPSERTED)
+
+            job_doc.status = JOB_STATUS_COMPLETED
+            job_doc.error = None
+            db.commit()
+            remove_spooled_file(job_doc.file_path)
+        except Exception as e:
+            db.rollback()
+            print(f"Ingestion error for document {job_doc.document_id}: {str(e)}")
+            job_doc.error = str(e)
+            if job_doc.attempts >= MAX_ATTEMPTS:
+                job_doc.status = JOB_STATUS_FAILED
+                remove_spooled_file(job_doc.file_path)
+            else:
+                job_doc.status = JOB_STATUS_QUEUED
+                job_doc.num_upserted = 0
+            db.commit()
+        finally:
+            try:
+                IngestionService._refresh_job_status(db, job_doc.job_id)
+            finally:
+                db.close()
+
+    @staticmethod
+    def _advance(db: Session, job_doc: IngestionJobDocument, stage: str):
+        job_doc.stage = stage
+        db.commit()
+
+    @staticmethod
+    def _refresh_job_status(db: Session, job_id: str):
+        job = db.get(IngestionJob, job_id)
+        statuses = {doc.status for doc in job.documents}
+        if statuses <= {JOB_STATUS_COMPLETED}:
+            job.status = JOB_STATUS_COMPLETED
+        elif statuses <= {JOB_STATUS_COMPLETED, JOB_STATUS_FAILED}:
+            job.status = JOB_STATUS_FAILED
+        elif JOB_STATUS_RUNNING in statuses:
+            job.status = JOB_STATUS_RUNNING
+        else:
+            job.status = JOB_STATUS_QUEUED
+        db.commit()
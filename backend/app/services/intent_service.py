@@ -1,7 +1,9 @@
 # backend/app/services/intent_service.py
 
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from app.utils.embeddings import get_gemini_embedding
 
 
 class IntentService:
@@ -13,17 +15,18 @@ class IntentService:
         """
         Initializes the intent service.
 
-        :param vector_database: Vector database client (e.g., Pinecone)
+        :param vector_database: The project's vector store
         :param allowed_contexts: List of allowed contexts to validate user intent
         """
         self.vector_database = vector_database
         self.allowed_contexts = allowed_contexts
 
-    def validate_query(self, query: str) -> Tuple[bool, str]:
+    def validate_query(self, query: str, query_embedding: Optional[List[float]] = None) -> Tuple[bool, str]:
         """
         Validates whether the given query is acceptable based on its intent.
 
         :param query: User query
+        :param query_embedding: The query's embedding, if the caller already has it
         :return: A tuple (is_valid: bool, reason: str)
         """
         # Rule 1: Prevent any attempts to modify prompts or inject commands
@@ -31,7 +34,7 @@ class IntentService:
             return False, "Query contains forbidden override patterns or jailbreak attempts."
 
         # Rule 2: Ensure query matches a valid context in vector database
-        if not self._is_query_relevant_to_data(query):
+        if not self._is_query_relevant_to_data(query, query_embedding):
             return False, "Query is not relevant to the uploaded documents."
 
         return True, "Query is valid and passes the intent check."
@@ -55,19 +58,22 @@ class IntentService:
                 return True
         return False
 
-    def _is_query_relevant_to_data(self, query: str) -> bool:
+    def _is_query_relevant_to_data(self, query: str, query_embedding: Optional[List[float]] = None) -> bool:
         """
         Validates if the query is contextually relevant to the data in the vector database.
 
         :param query: User query
+        :param query_embedding: The query's embedding, if the caller already has it
         :return: True if the query matches allowed contexts or relevant data, otherwise False
         """
         # Search in vector database using the query
         # Example: Check if query matches allowed documents/topics
-        search_results = self.vector_database.query(query, top_k=3)
+        if query_embedding is None:
+            query_embedding = get_gemini_embedding(query)
+        search_results = self.vector_database.query(vector=query_embedding, top_k=3, include_metadata=False).matches
 
         # If no results or results with low relevance, the query is invalid
-        if not search_results or all(sr["score"] < 0.5 for sr in search_results):
+        if not search_results or all(sr.score < 0.5 for sr in search_results):
             return False
 
         # Compare query context to a set of allowed predefined contexts
@@ -1,7 +1,12 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.message import Message
 from app.schemas.message import MessageCreate
+from app.services.message_writer import message_writer
+from app.utils.pagination import encode_cursor, decode_cursor
 from datetime import datetime
 import uuid
 
@@ -50,22 +55,81 @@ class MessageService:
             db.close()
 
     @staticmethod
-    def get_project_messages(project_id: str, user_id: str) -> list[Message]:
+    def get_project_messages(
+            db: Session,
+            project_id: str,
+            user_id: str,
+            limit: Optional[int] = None,
+            before: Optional[str] = None,
+            after: Optional[str] = None,
+    ) -> Tuple[List[Message], Optional[str], Optional[str]]:
         """
-        Fetch all messages for a specific project ID.
+        Fetch a user's messages in a project, oldest first, including those still buffered
+        by `message_writer`.
+
+        - `limit` alone: the latest `limit` messages
+        - `before`: up to `limit` messages older than that cursor (the page above)
+        - `after`: up to `limit` messages newer than that cursor (the page below, or new ones)
+        - none of them: the whole conversation
+
+        Returns the messages and two cursors: `prev` for `before` (None once the start of the
+        conversation is reached) and `next` for `after` (the last stored message returned).
+        Every page is one range scan of the (project_id, user_id, timestamp, id) index.
         """
-        db: Session = next(get_db())  # The database dependency is only here
-        try:
-            messages = (
-                db.query(Message)
-                .filter(Message.project_id == project_id)
-                .filter(Message.user_id == user_id)  # Additional filter for user_id
-                .order_by(Message.timestamp.asc())  # Order by timestamp
-                .all()
-            )
-            return messages
-        finally:
-            db.close()
+        if before and after:
+            raise ValueError("Pass either before or after, not both")
+        pending = message_writer.pending_for(project_id, user_id)
+        position = tuple_(Message.timestamp, Message.id)
+        query = (
+            db.query(Message)
+            .filter(Message.project_id == project_id)
+            .filter(Message.user_id == user_id)  # Additional filter for user_id
+        )
+
+        if after:
+            after_timestamp, after_id = decode_cursor(after)
+            query = query.filter(position > tuple_(after_timestamp, after_id))
+            query = query.order_by(Message.timestamp.asc(), Message.id.asc())
+            rows = query.limit(limit + 1).all() if limit else query.all()
+            # The cursor itself is an older message
+            has_older, has_newer = True, bool(limit) and len(rows) > limit
+            messages = rows[:limit]
+        else:
+            if before:
+                query = query.filter(position < tuple_(*decode_cursor(before)))
+            query = query.order_by(Message.timestamp.desc(), Message.id.desc())
+            # One extra row tells whether older messages remain
+            rows = query.limit(limit + 1).all() if limit else query.all()
+            has_older, has_newer = bool(limit) and len(rows) > limit, bool(before)
+            messages = list(reversed(rows[:limit]))
+
+        # Buffered messages are the newest, so they belong to the page that reaches the end
+        if not has_newer:
+            stored_ids = {message.id for message in messages}
+            buffered = [message for message in pending if message.id not in stored_ids
+                        and (not after or message.timestamp > after_timestamp)]
+            if buffered:
+                merged = sorted(messages + buffered, key=lambda message: message.timestamp)
+                if not limit or len(merged) <= limit:
+                    messages = merged
+                elif after:
+                    # Forward pages keep the oldest, so no stored row after the cursor is skipped;
+                    # the buffered messages left out come with the next poll
+                    messages = merged[:limit]
+                elif any(message.id is not None for message in merged[-limit:]):
+                    # Keep the newest; the stored ones dropped from the front stay reachable via
+                    # `prev`, which is taken from the oldest stored message kept
+                    messages = merged[-limit:]
+                    has_older = True
+                else:
+                    # Trimming would keep only buffered messages and leave no cursor to page back
+                    # from, so this page runs over `limit` by the buffered ones instead
+                    messages = merged
+
+        stored = [message for message in messages if message.id is not None]
+        prev_cursor = encode_cursor(stored[0].timestamp, stored[0].id) if stored and has_older else None
+        next_cursor = encode_cursor(stored[-1].timestamp, stored[-1].id) if stored else after
+        return messages, prev_cursor, next_cursor
 
     @staticmethod
     def create_message(message_data: MessageCreate) -> Message:
@@ -86,4 +150,4 @@ class MessageService:
             db.refresh(new_message)
             return new_message
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
@@ -0,0 +1,207 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.database import AsyncSessionLocal
+from app.models.message import Message
+from app.schemas.message import MessageCreate
+
+# A batch is written this long after its first message, or as soon as it is full
+MESSAGE_FLUSH_INTERVAL_MS = float(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", "200"))
+MESSAGE_FLUSH_BATCH_SIZE = int(os.getenv("MESSAGE_FLUSH_BATCH_SIZE", "100"))
+# While the database is unreachable, messages beyond this many are dropped, oldest first
+MESSAGE_BUFFER_MAX = int(os.getenv("MESSAGE_BUFFER_MAX", "10000"))
+
+# Pause before retrying a batch that failed to write
+RETRY_DELAY_SECONDS = 1.0
+
+
+class PendingMessage:
+    """
+    A message accepted by the writer. `id` is set once its batch is inserted.
+    """
+    __slots__ = ("id", "content", "role", "timestamp", "project_id", "user_id")
+
+    def __init__(self, content: str, role: str, timestamp: datetime, project_id: str, user_id: str):
+        self.id: Optional[int] = None
+        self.content = content
+        self.role = role
+        self.timestamp = timestamp
+        self.project_id = project_id
+        self.user_id = user_id
+
+    def row(self) -> dict:
+        return {
+            "content": self.content,
+            "role": self.role,
+            "timestamp": self.timestamp,
+            "project_id": self.project_id,
+            "user_id": self.user_id,
+        }
+
+
+class MessageWriter:
+    """
+    Write-behind buffer for chat messages.
+
+    `submit` returns at once; a background task on the event loop writes the queued
+    messages in multi-row INSERTs, one commit per batch. Until its batch is committed a
+    message stays in a per-conversation tail that readers merge with what they read from
+    the database (`pending_for`), so a user sees their messages straight away.
+    `close` writes whatever is left; call it on shutdown.
+    """
+
+    def __init__(self, interval_ms: float = MESSAGE_FLUSH_INTERVAL_MS, batch_size: int = MESSAGE_FLUSH_BATCH_SIZE,
+                 max_pending: int = MESSAGE_BUFFER_MAX):
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._queue: List[PendingMessage] = []
+        # (project_id, user_id) -> queued or in-flight messages; read from request threads too
+        self._tail: Dict[Tuple[str, str], List[PendingMessage]] = {}
+        self._tail_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._has_messages: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stats = {"submitted": 0, "written": 0, "batches": 0, "failures": 0, "dropped": 0}
+        self._last_flush_ms = 0.0
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._has_messages = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, message_data: MessageCreate, timestamp: Optional[datetime] = None) -> PendingMessage:
+        """
+        Queue a message for writing. Must be called on the event loop.
+        """
+        message = PendingMessage(
+            content=message_data.content,
+            role=message_data.role,
+            timestamp=timestamp or datetime.utcnow(),
+            project_id=message_data.project_id,
+            user_id=message_data.user_id,
+        )
+        self._ensure_running()
+        self._queue.append(message)
+        with self._tail_lock:
+            self._tail.setdefault((message.project_id, message.user_id), []).append(message)
+        self._stats["submitted"] += 1
+        self._has_messages.set()
+        if len(self._queue) >= self.batch_size:
+            self._batch_full.set()
+        return message
+
+    def pending_for(self, project_id: str, user_id: str) -> List[PendingMessage]:
+        """
+        The conversation's messages not yet committed, oldest first. Take this before
+        querying the database and skip the messages whose `id` the query returned; a
+        message committed in between then shows up exactly once.
+        """
+        with self._tail_lock:
+            return list(self._tail.get((project_id, user_id), ()))
+
+    async def _run(self):
+        while True:
+            await self._has_messages.wait()
+            if len(self._queue) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            # Shielded so that `close` never interrupts a batch between its INSERT and commit
+            if not await asyncio.shield(self.flush()):
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+    async def _write(self, batch: List[PendingMessage]):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(Message).returning(Message.id, sort_by_parameter_order=True),
+                [message.row() for message in batch],
+            )
+            # Known before the commit, so a reader that sees the rows can already match them
+            for message, message_id in zip(batch, result.scalars().all()):
+                message.id = message_id
+            try:
+                await db.commit()
+            except Exception:
+                for message in batch:
+                    message.id = None
+                raise
+
+    def _forget(self, batch: List[PendingMessage]):
+        with self._tail_lock:
+            for message in batch:
+                key = (message.project_id, message.user_id)
+                tail = self._tail.get(key)
+                if tail:
+                    tail.remove(message)
+                    if not tail:
+                        del self._tail[key]
+
+    def _drop_overflow(self):
+        overflow = len(self._queue) - self.max_pending
+        if overflow > 0:
+            dropped, self._queue = self._queue[:overflow], self._queue[overflow:]
+            self._forget(dropped)
+            self._stats["dropped"] += len(dropped)
+            print(f"Message buffer full, dropped the {len(dropped)} oldest unwritten messages")
+
+    async def flush(self) -> bool:
+        """
+        Write every queued message now. Returns False if a batch failed; it stays queued.
+        """
+        if self._flush_lock is None:
+            return True
+        async with self._flush_lock:
+            while self._queue:
+                batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+                started = time.perf_counter()
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    print(f"Writing {len(batch)} messages failed, will retry: {str(e)}")
+                    self._queue[:0] = batch
+                    self._stats["failures"] += 1
+                    self._drop_overflow()
+                    return False
+                self._forget(batch)
+                self._last_flush_ms = (time.perf_counter() - started) * 1000
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+            self._has_messages.clear()
+            self._batch_full.clear()
+            return True
+
+    async def close(self):
+        """
+        Stop the background task and write the remaining messages, after any batch in flight.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if not await self.flush():
+            print(f"{len(self._queue)} messages could not be written before shutdown")
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["queued"] = len(self._queue)
+        with self._tail_lock:
+            stats["conversations_pending"] = len(self._tail)
+        stats["avg_batch_size"] = round(stats["written"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["last_flush_ms"] = round(self._last_flush_ms, 2)
+        return stats
+
+
+message_writer = MessageWriter()
@@ -1,26 +1,32 @@
 import os
-import tempfile
 
-import pdfplumber
 from fastapi import HTTPException
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session, joinedload
 from uuid import uuid4
 from datetime import datetime
-from typing import List,Optional
+from typing import Iterable, List, Optional, Tuple
 
 from supabase import create_client, Client
 
-from app.config.pinecone_init import pc, create_project_index
-from app.database import get_db
+from app.vectorstores import create_vector_store, get_vector_store, drop_vector_store
+from app.services.access_service import project_access
 from app.models.project import Project, Document
-from app.routes.document_routes import get_gemini_embedding
 from app.schemas.project import ProjectCreate, ProjectResponse, ProjectAbstractData
-from app.utils.supabase import upload_to_supabase,delete_from_supabase
+from app.services.chat_service_registry import chat_service_registry
+from app.services.ingestion_service import IngestionService
+from app.utils.answer_cache import get_answer_cache
+from app.utils.lexical_index import drop_lexical_index
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.vector_cleanup_service import VectorCleanupService
+from app.utils.supabase import delete_from_supabase
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME")
+
+PROJECT_LIST_MAX_PAGE_SIZE = int(os.getenv("PROJECT_LIST_MAX_PAGE_SIZE", "200"))
 
 # Initialize Supabase client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
@@ -28,35 +34,90 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 class ProjectService:
 
     @staticmethod
-    def get_all_projects() -> List[ProjectAbstractData]:
+    def _invalidate_chat_state(project_id):
+        """
+        Drop the cached ChatService and cached answers of a project whose content or state changed.
+        """
+        chat_service_registry.invalidate(project_id)
+        answer_cache = get_answer_cache()
+        if answer_cache:
+            answer_cache.invalidate(project_id)
+
+    @staticmethod
+    def _document_count():
+        """
+        Per-project document count as a correlated subquery, so listings count in the same
+        query instead of loading every project's documents.
+        """
+        return (
+            select(func.count(Document.id))
+            .where(Document.project_id == Project.id)
+            .correlate(Project)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def _abstract(project: Project, num_documents: int) -> ProjectAbstractData:
+        return ProjectAbstractData(
+            id=project.id,
+            name=project.name,
+            description=project.description,
+            access_type=project.access_type,
+            state=project.state,
+            num_documents=num_documents,
+            updated_at=project.updated_at
+        )
+
+    @staticmethod
+    def list_projects(
+            db: Session,
+            state: Optional[str] = None,
+            access_type: Optional[str] = None,
+            search: Optional[str] = None,
+            project_ids: Optional[Iterable[int]] = None,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> Tuple[List[ProjectAbstractData], Optional[str]]:
+        """
+        Projects with their document counts, most recently updated first, in one query.
+
+        Filters on state, access type, a case-insensitive name search and a set of project IDs.
+        With `limit`, returns one page and the cursor of the next one (None on the last page);
+        pass it back as `cursor` to continue after the last project returned.
+        """
+        query = db.query(Project, ProjectService._document_count())
+        if state:
+            query = query.filter(Project.state == state.upper())
+        if access_type:
+            query = query.filter(Project.access_type == access_type)
+        if search:
+            query = query.filter(Project.name.ilike(f"%{search}%"))
+        if project_ids is not None:
+            query = query.filter(Project.id.in_(list(project_ids)))
+        if cursor:
+            query = query.filter(tuple_(Project.updated_at, Project.id) < tuple_(*decode_cursor(cursor)))
+        query = query.order_by(Project.updated_at.desc(), Project.id.desc())
+        if limit:
+            # One extra row tells whether another page follows
+            query = query.limit(limit + 1)
+
+        rows = query.all()
+        projects = [ProjectService._abstract(project, num_documents) for project, num_documents in rows[:limit]]
+        next_cursor = encode_cursor(projects[-1].updated_at, projects[-1].id) if limit and len(rows) > limit else None
+        return projects, next_cursor
+
+    @staticmethod
+    def get_all_projects(db: Session) -> List[ProjectAbstractData]:
         """
         Fetch all projects from the database and return them as ProjectAbstractData.
         """
-        db: Session = next(get_db())
-        try:
-            projects = db.query(Project).all()  # Retrieve all projects from the database
-            # Transform each Project into ProjectAbstractData
-            return [
-                ProjectAbstractData(
-                    id=project.id,
-                    name=project.name,
-                    description=project.description,
-                    access_type=project.access_type,
-                    state=project.state,
-                    num_documents=len(project.documents),
-                    updated_at=project.updated_at
-                )
-                for project in projects
-            ]
-        finally:
-            db.close()
+        return ProjectService.list_projects(db)[0]
 
     @staticmethod
-    def publish_project(project_id):
+    def publish_project(db: Session, project_id):
         """
         Updates the project's state to 'published' in the database.
         """
-        db: Session = next(get_db())
         # Fetch project by ID
         project = db.query(Project).filter_by(id=project_id).first()
 
@@ -74,22 +135,17 @@ class ProjectService:
             db.rollback()
             raise ValueError(f"Failed to update project state: {str(e)}")
 
-        return ProjectAbstractData(
-                    id=project.id,
-                    name=project.name,
-                    description=project.description,
-                    access_type=project.access_type,
-                    state=project.state,
-                    num_documents=len(project.documents),
-                    updated_at=project.updated_at
-                )
+        # Chat turns after a (re-)publish start from fresh handles and answers
+        ProjectService._invalidate_chat_state(project_id)
+
+        num_documents = db.query(func.count(Document.id)).filter(Document.project_id == project.id).scalar()
+        return ProjectService._abstract(project, num_documents)
 
     @staticmethod
-    def getProjectById(project_id: int) -> dict:
+    def getProjectById(db: Session, project_id: int) -> dict:
 
         groups = ProjectService.get_groups_by_project(project_id)
 
-        db: Session = next(get_db())
         project = db.query(Project).options(joinedload(Project.documents)).filter(Project.id == project_id).first()
 
         # If project not found, raise an HTTP 404 exception
@@ -154,11 +210,10 @@ class ProjectService:
     #         db.close()
 
     @staticmethod
-    def update_project(project_id: str, updated_data: dict) -> ProjectResponse:
+    def update_project(db: Session, project_id: str, updated_data: dict) -> ProjectResponse:
         """
         Update an existing project.
         """
-        db: Session = next(get_db())
         try:
             project = db.query(Project).filter(Project.id == project_id).first()
             if not project:
@@ -173,21 +228,19 @@ class ProjectService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     @staticmethod
     def update_project_with_files(
-        project_id: str, name:str, updated_description: str, access_type: str, files: Optional[List[dict]] = None
+        db: Session, project_id: str, name:str, updated_description: str, access_type: str, files: Optional[List[dict]] = None
     ) -> ProjectResponse:
         """
         Update an existing project's description, access type, and manage document changes:
-        - Overwrites existing document records.
+        - Overwrites existing document records; a file named like an existing document
+          is treated as its new version and re-indexed incrementally.
         - Removes deleted files from database, Supabase & Pinecone.
-        - Only uploads new documents to Supabase & inserts them into DB.
-        - Updates Pinecone index with only new documents.
+        - Inserts new documents into DB and queues them for background ingestion
+          (Supabase upload, embedding and Pinecone upsert); the returned `job_id` tracks it.
         """
-        db: Session = next(get_db())
         try:
             # Fetch the project
             project = db.query(Project).filter(Project.id == project_id).first()
@@ -200,110 +253,73 @@ class ProjectService:
             project.access_type = access_type
             project.updated_at = datetime.now()
 
-            # Fetch project-specific index
-            index_name = f"project-{project_id}"
-            index = pc.Index(index_name)
+            # Fetch the project's vector store
+            index = get_vector_store(project_id)
 
             # Get existing document records (Filter by `id`, NOT `name`)
             existing_docs = {doc.id: doc for doc in project.documents}
+            # An upload with the same file name is a new version of that document
+            existing_docs_by_name = {doc.name: doc for doc in project.documents}
 
             # Track processed document IDs
             processed_doc_ids = set()
 
+            # Documents that need ingestion, handed to the worker queue on commit
+            queued_documents = []
+
             # Process new & existing documents
             if files:
                 for file_info in files:
                     file = file_info.get("file")
-                    file_obj = file_info.get("file_obj")
+                    file_path = file_info.get("file_path")
                     doc_data = file_info.get("doc_data")
 
                     if not file or not doc_data:
                         continue
 
                     # Check if the document already exists based on ID
-                    doc_id = doc_data.id if hasattr(doc_data, "id") else str(uuid4())  
-                    processed_doc_ids.add(doc_id)
-
+                    doc_id = getattr(doc_data, "id", None)
                     if doc_id in existing_docs:
                         # Skip re-uploading existing documents
+                        processed_doc_ids.add(doc_id)
+                        continue
+
+                    replaced_document = existing_docs_by_name.get(doc_data.name)
+                    if replaced_document and file_path:
+                        # Re-index incrementally: only chunks that changed are embedded/deleted
+                        replaced_document.description = doc_data.description
+                        replaced_document.uploaded_at = datetime.now()
+                        replaced_document.size = doc_data.size
+                        processed_doc_ids.add(replaced_document.id)
+                        queued_documents.append({
+                            "document": replaced_document,
+                            "file_path": file_path,
+                            "content_hash": file_info.get("content_hash")
+                        })
                         continue
 
                     # Create a new document record
                     new_document = Document(
-                        id=doc_id,
                         project_id=project_id,
                         name=doc_data.name,
                         description=doc_data.description,
                         uploaded_at=datetime.now(),
                         document_type=doc_data.document_type,
                         file_extension=doc_data.file_extension,
-                        size=doc_data.size
+                        size=doc_data.size,
+                        s3_url="default"
                     )
                     db.add(new_document)
+                    db.flush()  # Ensure ID is populated
+                    processed_doc_ids.add(new_document.id)
 
-                    if file_obj:
-                        # Save file temporarily
-                        suffix = f".{doc_data.file_extension}" if doc_data.file_extension else ""
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                            temp_file.write(file_obj)
-                            temp_file_path = temp_file.name
-
-                        # Upload to Supabase
-                        try:
-                            SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME")
-                            supabase_url = upload_to_supabase(temp_file_path, SUPABASE_BUCKET_NAME,project.id,doc_id)
-                            new_document.s3_url = supabase_url
-                        except Exception as e:
-                            print(f"Supabase upload error: {str(e)}")
-                            new_document.s3_url = "default"
-
-                        # Process PDF files for embeddings
-                        if doc_data.file_extension.lower() == 'pdf':
-                            try:
-                                texts = []
-                                with pdfplumber.open(temp_file_path) as pdf:
-                                    for page in pdf.pages:
-                                        page_text = page.extract_text()
-                                        if page_text:
-                                            texts.append(page_text)
-
-                                if texts:
-                                    # Split text into chunks
-                                    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-                                    text_chunks = text_splitter.split_text("\n".join(texts))
-
-                                    # Generate embeddings
-                                    embeddings = [get_gemini_embedding(chunk) for chunk in text_chunks]
-
-                                    # Prepare vectors for Pinecone
-                                    vectors = [
-                                        {
-                                            "id": f"project_{project_id}_doc_{new_document.id}_chunk_{i}",
-                                            "values": embedding,
-                                            "metadata": {
-                                                "project_id": project_id,
-                                                "document_id": new_document.id,
-                                                "text": text,
-                                                "project_name": project.name,
-                                                "document_name": doc_data.name
-                                            }
-                                        }
-                                        for i, (text, embedding) in enumerate(zip(text_chunks, embeddings))
-                                    ]
-
-                                    # Insert vectors into Pinecone in batches
-                                    batch_size = 100
-                                    for i in range(0, len(vectors), batch_size):
-                                        batch = vectors[i:i + batch_size]
-                                        index.upsert(vectors=batch)
-                            except Exception as e:
-                                print(f"PDF processing error: {str(e)}")
-
-                        # Cleanup temp file
-                        try:
-                            os.remove(temp_file_path)
-                        except Exception as e:
-                            print(f"Error deleting temp file: {e}")
+                    # Upload, extraction and embedding run in the ingestion workers
+                    if file_path:
+                        queued_documents.append({
+                            "document": new_document,
+                            "file_path": file_path,
+                            "content_hash": file_info.get("content_hash")
+                        })
 
             # Find and delete removed documents (Filter by ID, NOT name)
             removed_docs = set(existing_docs.keys()) - processed_doc_ids
@@ -312,61 +328,88 @@ class ProjectService:
 
                 # Delete from Supabase
                 try:
-                    delete_from_supabase(doc_to_remove.s3_url)
+                    delete_from_supabase(doc_to_remove.s3_url, SUPABASE_BUCKET_NAME)
                 except Exception as e:
                     print(f"Supabase deletion error: {str(e)}")
 
-                # Delete from Pinecone
+                # Delete every chunk vector (manifest + ID prefix); leftovers are purged by reconcile_vectors
                 try:
-                    index.delete(ids=[f"project_{project_id}_doc_{doc_to_remove.id}"])
+                    VectorCleanupService.delete_document_vectors(
+                        index, project.id, doc_to_remove.id, [chunk.vector_id for chunk in doc_to_remove.chunks]
+                    )
                 except Exception as e:
-                    print(f"Pinecone deletion error: {str(e)}")
+                    print(f"Vector deletion error: {str(e)}")
 
                 # Remove from database
                 db.delete(doc_to_remove)
 
+            job = IngestionService.enqueue_documents(db, project.id, queued_documents)
+
             # Commit all changes
             db.commit()
+            ProjectService._invalidate_chat_state(project_id)
             db.refresh(project)
-            return ProjectResponse.model_validate(project)
+            response = ProjectResponse.model_validate(project)
+            response.job_id = job.id if job else None
+            return response
 
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     @staticmethod
-    def get_published_projects() -> List[ProjectAbstractData]:
+    def delete_project(db: Session, project_id: int) -> bool:
         """
-        Fetch all projects from the database and return them as ProjectAbstractData.
+        Delete a project with its documents, stored files, group links and vectors.
+        Storage cleanup runs after the database commit; anything it misses is
+        picked up by `python -m app.reconcile_vectors`.
         """
-        db: Session = next(get_db())
         try:
-            projects = db.query(Project).filter(Project.state == "PUBLISHED").all()  # Retrieve all projects from the database
-            # Transform each Project into ProjectAbstractData
-            return [
-                ProjectAbstractData(
-                    id=project.id,
-                    name=project.name,
-                    description=project.description,
-                    access_type=project.access_type,
-                    state=project.state,
-                    num_documents=len(project.documents),
-                    updated_at=project.updated_at
-                )
-                for project in projects
-            ]
-        finally:
-            db.close()
+            project = db.query(Project).filter(Project.id == project_id).first()
+            if not project:
+                return False
+            file_urls = [document.s3_url for document in project.documents]
+
+            db.delete(project)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+        ProjectService._invalidate_chat_state(project_id)
+        try:
+            drop_vector_store(project_id)
+        except Exception as e:
+            print(f"Vector store deletion error: {str(e)}")
+        try:
+            drop_lexical_index(project_id)
+        except Exception as e:
+            print(f"Lexical index deletion error: {str(e)}")
+
+        for file_url in file_urls:
+            delete_from_supabase(file_url, SUPABASE_BUCKET_NAME)
+
+        try:
+            supabase.table("project_groups").delete().eq("project_id", project_id).execute()
+            project_access.unlink_project(project_id)
+        except Exception as e:
+            print(f"Project group deletion error: {str(e)}")
+        return True
+
+    @staticmethod
+    def get_published_projects(db: Session) -> List[ProjectAbstractData]:
+        """
+        Fetch all published projects and return them as ProjectAbstractData.
+        """
+        return ProjectService.list_projects(db, state="PUBLISHED")[0]
 
 
     @staticmethod
-    def create_project_v2(project_data: ProjectCreate, groups: List[str], files: List[dict] = None ) -> ProjectResponse:
+    def create_project_v2(db: Session, project_data: ProjectCreate, groups: List[str], files: List[dict] = None ) -> ProjectResponse:
         """
         Create a new project in the database with associated documents.
+        Document ingestion is queued; the returned `job_id` can be polled at `/jobs/{id}`.
         """
-        db: Session = next(get_db())
 
         existing_project = db.query(Project).filter_by(name=project_data.name).first()
         if existing_project:
@@ -392,24 +435,18 @@ class ProjectService:
             project_id = new_project.id
 
             try:
-                index_name = create_project_index(project_id)
+                create_vector_store(project_id)
             except Exception as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
-            index = None  # Initialize index to avoid NameError
-            # Initialize Pinecone if files are provided
-            if files:
-                try:
-                    index = pc.Index(index_name)
-                except Exception as e:
-                    print(f"Error initializing Pinecone: {str(e)}")
-                    # Continue anyway, we'll skip vector storage if Pinecone fails
+            # Documents that need ingestion, handed to the worker queue on commit
+            queued_documents = []
 
             # Process documents if any
             if files:
                 for file_info in files:
                     file = file_info.get("file")
-                    file_obj = file_info.get("file_obj")
+                    file_path = file_info.get("file_path")
                     doc_data = file_info.get("doc_data")
 
                     if not file or not doc_data:
@@ -429,80 +466,14 @@ class ProjectService:
                     db.add(new_document)
                     db.flush()
                     db.refresh(new_document)  # Ensure ID is populated
-                    doc_id = new_document.id
-                    # Process the file if it exists
-                    if file_obj:
-                        # Save file temporarily
-                        suffix = f".{doc_data.file_extension}" if doc_data.file_extension else ""
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                            temp_file.write(file_obj)
-                            temp_file_path = temp_file.name
-
-                        # Upload to S3
-                        # try:
-                        #     s3_url = upload_to_s3(temp_file_path, doc_data.name)
-                        #     new_document.s3_url = s3_url  # Add this field to your Document model
-                        # except Exception as e:
-                        #     print(f"S3 upload error: {str(e)}")
-                        # new_document.s3_url = "default"
-
-                        # Upload to Supabase
-                        try:
-                            SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME")
-                            supabase_url = upload_to_supabase(temp_file_path, SUPABASE_BUCKET_NAME, project_id, doc_id)
-                            if supabase_url:
-                                new_document.s3_url = supabase_url
-                        except Exception as e:
-                            print(f"Supabase upload error: {str(e)}")
-
-                        # For PDF files, extract text and create embeddings
-                        if doc_data.file_extension and (doc_data.file_extension.lower() == 'pdf' or doc_data.file_extension.lower() == 'doc' or doc_data.file_extension.lower() == 'docx'):
-                            try:
-                                # Extract text from PDF
-                                texts = []
-                                with pdfplumber.open(temp_file_path) as pdf:
-                                    for page in pdf.pages:
-                                        page_text = page.extract_text()
-                                        if page_text:
-                                            texts.append(page_text)
-
-                                if texts and index:
-                                    # Split text into chunks
-                                    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-                                    text_chunks = text_splitter.split_text("\n".join(texts))
-
-                                    # Generate embeddings
-                                    embeddings = [get_gemini_embedding(chunk) for chunk in text_chunks]
-
-                                    # Prepare vectors for Pinecone
-                                    vectors = [
-                                        {
-                                            "id": f"project_{project_id}_doc_{doc_id}_chunk_{i}",
-                                            "values": embedding,
-                                            "metadata": {
-                                                "project_id": project_id,
-                                                "document_id": doc_id,
-                                                "text": text,
-                                                "project_name": project_data.name,
-                                                "document_name": doc_data.name
-                                            }
-                                        }
-                                        for i, (text, embedding) in enumerate(zip(text_chunks, embeddings))
-                                    ]
-
-                                    # Insert vectors in batches
-                                    batch_size = 100
-                                    for i in range(0, len(vectors), batch_size):
-                                        batch = vectors[i:i + batch_size]
-                                        index.upsert(vectors=batch)
-                            except Exception as e:
-                                print(f"PDF processing error: {str(e)}")
-
-                        # Cleanup temp file
-                        try:
-                            os.remove(temp_file_path)
-                        except:
-                            pass
+
+                    # Supabase upload, text extraction and embeddings run in the ingestion workers
+                    if file_path:
+                        queued_documents.append({
+                            "document": new_document,
+                            "file_path": file_path,
+                            "content_hash": file_info.get("content_hash")
+                        })
 
             # Step 2: Fetch group IDs based on the provided group names
             group_query = supabase.table("groups").select("id").in_("name", groups).execute()
@@ -518,76 +489,39 @@ class ProjectService:
 
             if not group_project_response.data:
                 raise HTTPException(status_code=500, detail="Failed to associate groups with project")
+            project_access.link_project(project_id, group_ids)
+
+            job = IngestionService.enqueue_documents(db, project_id, queued_documents)
 
             # Commit all changes
             db.commit()
             db.refresh(new_project)
-            return ProjectResponse.model_validate(new_project)
+            response = ProjectResponse.model_validate(new_project)
+            response.job_id = job.id if job else None
+            return response
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
 
     @staticmethod
-    def get_projects_for_user(email: str) -> List[ProjectAbstractData]:
-        # Step 1: Get email ID from emails table
-        email_response = supabase.from_("emails").select("id").eq("email", email).single().execute()
-        email_data = email_response.data
-
-        if not email_data:
+    def get_projects_for_user(
+            db: Session,
+            email: str,
+            search: Optional[str] = None,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> Tuple[List[ProjectAbstractData], Optional[str]]:
+        """
+        Published projects shared with any of the user's groups, paged like `list_projects`.
+        Group memberships and project links come from `project_access`'s cache, so a warm
+        call costs one query.
+        """
+        project_ids = project_access.project_ids_for(email)
+        if project_ids is None:
             raise HTTPException(status_code=404, detail="Email not found")
-
-        email_id = email_data["id"]
-
-        # Step 2: Get group IDs from email_groups table
-        email_groups_response = (
-            supabase.from_("email_groups").select("group_id").eq("email_id", email_id).execute()
+        if not project_ids:
+            return [], None
+        return ProjectService.list_projects(
+            db, state="PUBLISHED", search=search, project_ids=project_ids, limit=limit, cursor=cursor
         )
-        email_groups_data = email_groups_response.data
-
-        if not email_groups_data:
-            return {"groups": []}  # No groups found for this email
-
-        group_ids = [eg["group_id"] for eg in email_groups_data]
-
-        if not group_ids:
-            return []
-
-            # Step 1: Get all project_ids associated with the given group_ids
-        project_groups_response = (
-            supabase
-            .from_("project_groups")
-            .select("project_id")
-            .in_("group_id", group_ids)
-            .execute()
-        )
-
-        if not project_groups_response.data:
-            return []
-
-        project_ids = list({entry["project_id"] for entry in project_groups_response.data})
-        db: Session = next(get_db())
-        # Step 2: Fetch projects with state="published"
-        projects_response  = (
-            db.query(Project)
-            .filter(Project.id.in_(project_ids), Project.state == "PUBLISHED")
-            .all()
-        )
-
-        return [
-            ProjectAbstractData(
-                id=project.id,
-                name=project.name,
-                description=project.description,
-                access_type=project.access_type,
-                state=project.state,
-                num_documents=len(project.documents),
-                updated_at=project.updated_at
-            )
-            for project in projects_response
-            ]
-
-
-
@@ -0,0 +1,161 @@
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.ingestion_job import IngestionJobDocument, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING
+from app.models.project import Project, Document, DocumentChunk
+from app.services.ingestion_service import DELETE_BATCH_SIZE
+from app.utils.lexical_index import get_lexical_index, drop_lexical_index, list_lexical_index_project_ids
+from app.vectorstores import VectorStore, get_vector_store, drop_vector_store, list_vector_store_project_ids
+
+# Chunk vector IDs: `project_{p}_doc_{d}_chunk_{hash}` (or `_chunk_{i}` for documents indexed before manifests)
+CHUNK_VECTOR_ID_PATTERN = re.compile(r"^project_(\d+)_doc_(\d+)_chunk_.+$")
+
+
+def document_vector_prefix(project_id: int, document_id: int) -> str:
+    # The trailing underscore keeps doc_1 from matching doc_10
+    return f"project_{project_id}_doc_{document_id}_"
+
+
+class VectorCleanupService:
+
+    @staticmethod
+    def delete_document_vectors(index: VectorStore, project_id: int, document_id: int,
+                                vector_ids: Optional[List[str]] = None) -> int:
+        """
+        Delete every chunk vector of a document and return how many IDs were deleted.
+
+        The document's chunk manifest (`vector_ids`) is deleted first; the ID prefix then
+        catches vectors the manifest does not know about (documents indexed before manifests,
+        interrupted ingestion). Indexes that cannot list IDs fall back to a metadata filter.
+        """
+        ids = list(vector_ids or [])
+        try:
+            listed = set(ids)
+            for page in index.list(prefix=document_vector_prefix(project_id, document_id)):
+                ids.extend(vector_id for vector_id in page if vector_id not in listed)
+        except Exception as e:
+            print(f"Listing vectors of document {document_id} failed, deleting by filter: {str(e)}")
+            index.delete(filter={"document_id": int(document_id)})
+
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            index.delete(ids=ids[i:i + DELETE_BATCH_SIZE])
+
+        lexical_index = get_lexical_index(project_id)
+        if lexical_index:
+            lexical_index.delete_prefix(document_vector_prefix(project_id, document_id))
+        return len(ids)
+
+    @staticmethod
+    def remove_document_vectors(project_id: int, document_id: int) -> int:
+        """
+        Delete a document's vectors and clear its chunk manifest, so the next upload of the
+        document is embedded from scratch.
+        """
+        db: Session = next(get_db())
+        try:
+            vector_ids = [vector_id for (vector_id,) in
+                          db.query(DocumentChunk.vector_id).filter(DocumentChunk.document_id == document_id)]
+            deleted = VectorCleanupService.delete_document_vectors(
+                get_vector_store(project_id), project_id, document_id, vector_ids
+            )
+            db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete()
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            raise e
+        finally:
+            db.close()
+
+    @staticmethod
+    def reconcile_project(db: Session, project_id: int, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Purge vectors of a project that no document manifest accounts for: chunks of deleted
+        documents and stale chunks of re-indexed ones. Documents still being ingested are
+        skipped, since their vectors are written before their manifest.
+        """
+        # List before reading the database: a listed vector's document row, job status or
+        # manifest entry is then already committed and visible to the queries below
+        index = get_vector_store(project_id)
+        vector_ids = [vector_id for page in index.list(prefix=f"project_{project_id}_") for vector_id in page]
+        # The lexical index follows the same manifests
+        lexical_index = get_lexical_index(project_id)
+        lexical_ids = lexical_index.list_ids(f"project_{project_id}_") if lexical_index else []
+
+        document_ids = {document_id for (document_id,) in
+                        db.query(Document.id).filter(Document.project_id == project_id)}
+        in_flight = {document_id for (document_id,) in (
+            db.query(IngestionJobDocument.document_id)
+            .join(Document, Document.id == IngestionJobDocument.document_id)
+            .filter(Document.project_id == project_id,
+                    IngestionJobDocument.status.in_([JOB_STATUS_QUEUED, JOB_STATUS_RUNNING]))
+        )}
+        manifest_rows = (
+            db.query(DocumentChunk.document_id, DocumentChunk.vector_id)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .filter(Document.project_id == project_id)
+            .all()
+        )
+        manifest = {vector_id for _, vector_id in manifest_rows}
+        # Documents indexed before manifests existed have none; their vectors are kept
+        documents_with_manifest = {document_id for document_id, _ in manifest_rows}
+
+        def orphans(chunk_ids: List[str]) -> List[str]:
+            found = []
+            for vector_id in chunk_ids:
+                match = CHUNK_VECTOR_ID_PATTERN.match(vector_id)
+                if not match:
+                    continue
+                document_id = int(match.group(2))
+                if document_id in in_flight or vector_id in manifest:
+                    continue
+                if document_id not in document_ids or document_id in documents_with_manifest:
+                    found.append(vector_id)
+            return found
+
+        orphaned = orphans(vector_ids)
+        stats = {
+            "scanned": len(vector_ids),
+            "orphaned": len(orphaned),
+            "unrecognised": sum(1 for vector_id in vector_ids if not CHUNK_VECTOR_ID_PATTERN.match(vector_id)),
+        }
+        if not dry_run:
+            for i in range(0, len(orphaned), DELETE_BATCH_SIZE):
+                index.delete(ids=orphaned[i:i + DELETE_BATCH_SIZE])
+
+        if lexical_index:
+            lexical_orphaned = orphans(lexical_ids)
+            stats["lexical_orphaned"] = len(lexical_orphaned)
+            if not dry_run:
+                lexical_index.delete(lexical_orphaned)
+        return stats
+
+    @staticmethod
+    def reconcile_all(dry_run: bool = False) -> Dict[int, Dict[str, int]]:
+        """
+        Reconcile every project, and drop the vector storage and lexical index of projects
+        that no longer exist.
+        """
+        db: Session = next(get_db())
+        try:
+            project_ids = {project_id for (project_id,) in db.query(Project.id)}
+            results = {}
+            for project_id in sorted(project_ids):
+                results[project_id] = VectorCleanupService.reconcile_project(db, project_id, dry_run)
+
+            for project_id in list_vector_store_project_ids():
+                if project_id not in project_ids:
+                    if not dry_run:
+                        drop_vector_store(project_id)
+                    results[project_id] = {"dropped": 1}
+            for project_id in list_lexical_index_project_ids():
+                if project_id not in project_ids:
+                    if not dry_run:
+                        drop_lexical_index(project_id)
+                    results[project_id] = {"dropped": 1}
+            return results
+        finally:
+            db.close()
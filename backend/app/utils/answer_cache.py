@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity two questions need to share an answer
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+
+class SemanticAnswerCache:
+    """
+    Per-project cache of generated answers, looked up by question embedding.
+
+    An answer is reused when a new question is at least `threshold` cosine-similar to a
+    cached one *and* retrieval returned the same chunk vectors. Chunk vector IDs are
+    derived from chunk content, so matching IDs mean the answer was generated from the
+    same text. Entries expire after `ttl` seconds, each project keeps at most
+    `max_entries`, and a project's entries are dropped when it is updated or re-published.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: int = SEMANTIC_CACHE_TTL_SECONDS,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # project -> OrderedDict(chunk key -> [(embedding, answer, created_at)]), least recently used first
+        self._projects = {}
+        self._sizes = {}
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _chunk_key(chunk_ids: List[str]) -> tuple:
+        return tuple(sorted(chunk_ids))
+
+    def get(self, project_id, query_embedding, chunk_ids: List[str]) -> Optional[str]:
+        """
+        The cached answer for a question whose retrieval returned `chunk_ids`, if any.
+        """
+        project_key, chunk_key = str(project_id), self._chunk_key(chunk_ids)
+        query = self._normalize(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._projects.get(project_key)
+            bucket = buckets.get(chunk_key) if buckets else None
+            if bucket:
+                live = [entry for entry in bucket if now - entry[2] <= self.ttl]
+                if len(live) != len(bucket):
+                    self._sizes[project_key] -= len(bucket) - len(live)
+                    self._stats["evictions"] += len(bucket) - len(live)
+                    if live:
+                        buckets[chunk_key] = bucket = live
+                    else:
+                        del buckets[chunk_key]
+                        bucket = None
+            if bucket:
+                similarities = np.stack([entry[0] for entry in bucket]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    buckets.move_to_end(chunk_key)
+                    self._stats["hits"] += 1
+                    return bucket[best][1]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, project_id, query_embedding, chunk_ids: List[str], answer: str):
+        project_key, chunk_key = str(project_id), self._chunk_key(chunk_ids)
+        query = self._normalize(query_embedding)
+        with self._lock:
+            buckets = self._projects.setdefault(project_key, OrderedDict())
+            bucket = buckets.setdefault(chunk_key, [])
+            buckets.move_to_end(chunk_key)
+            bucket.append((query, answer, time.monotonic()))
+            self._sizes[project_key] = self._sizes.get(project_key, 0) + 1
+            self._stats["stores"] += 1
+
+            while self._sizes[project_key] > self.max_entries:
+                oldest_key, oldest = next(iter(buckets.items()))
+                oldest.pop(0)
+                self._sizes[project_key] -= 1
+                self._stats["evictions"] += 1
+                if not oldest:
+                    del buckets[oldest_key]
+
+    def record_bypass(self):
+        """
+        Count a chat turn that skipped the cache (one with conversation history).
+        """
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def invalidate(self, project_id):
+        with self._lock:
+            self._projects.pop(str(project_id), None)
+            self._sizes.pop(str(project_id), None)
+            self._stats["invalidations"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(self._sizes.values())
+            stats["projects"] = len(self._projects)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        # hit_rate covers lookups only; this is the share of all chat turns the cache answered
+        turns = lookups + stats["bypassed"]
+        stats["turn_hit_rate"] = round(stats["hits"] / turns, 4) if turns else 0.0
+        stats["threshold"] = self.threshold
+        stats["ttl_seconds"] = self.ttl
+        return stats
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Process-wide cache, or None when SEMANTIC_CACHE_ENABLED is false.
+    """
+    global _cache
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticAnswerCache()
+    return _cache
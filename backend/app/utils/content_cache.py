@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTENT_CACHE_ENABLED = os.getenv("CONTENT_CACHE_ENABLED", "true").lower() == "true"
+CONTENT_CACHE_PATH = os.getenv(
+    "CONTENT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "sherlock-cache", "content_cache.sqlite3")
+)
+CONTENT_CACHE_MAX_MB = int(os.getenv("CONTENT_CACHE_MAX_MB", "1024"))
+
+# After eviction the cache is trimmed to this fraction of the bound, so a full cache
+# does not evict on every single insert
+EVICTION_TARGET = 0.9
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for chunk keys: NFKC, collapsed whitespace, trimmed.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_boundaries(text: str, chunks: List[str]) -> Optional[List[List[int]]]:
+    """
+    Locate each chunk in the text it was split from. Returns [start, end) offsets, or
+    None if a chunk is not a verbatim substring (then the chunks cannot be rebuilt).
+    """
+    boundaries = []
+    cursor = 0
+    for chunk in chunks:
+        start = text.find(chunk, cursor)
+        if start < 0:
+            return None
+        boundaries.append([start, start + len(chunk)])
+        cursor = start + 1
+    return boundaries
+
+
+class ContentCache:
+    """
+    Content-addressed cache shared by the ingestion workers on one host.
+
+    - documents: SHA-256 of the uploaded file -> extracted page texts and chunk boundaries
+    - embeddings: SHA-256 of a chunk's normalized text (+ model) -> embedding vector
+
+    Entries are evicted least-recently-used once the stored bytes exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str = CONTENT_CACHE_PATH, max_bytes: int = CONTENT_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # several worker processes share the file
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                hash TEXT PRIMARY KEY,
+                page_texts TEXT NOT NULL,
+                chunk_config TEXT,
+                boundaries TEXT,
+                size_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS embeddings (
+                hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (hash, model)
+            );
+            CREATE INDEX IF NOT EXISTS documents_last_access ON documents (last_access);
+            CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access);
+        """)
+        self._conn.commit()
+        self._stats = {
+            "document_hits": 0, "document_misses": 0,
+            "embedding_hits": 0, "embedding_misses": 0,
+            "evictions": 0,
+        }
+
+    # Documents
+
+    def get_document(self, doc_hash: str, chunk_config: str) -> Optional[dict]:
+        """
+        Return {"page_texts": [...], "chunks": [...] or None} for a known document.
+        Chunks are only rebuilt when they were produced with the same splitter config.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_texts, chunk_config, boundaries FROM documents WHERE hash = ?", (doc_hash,)
+            ).fetchone()
+            if row is None:
+                self._stats["document_misses"] += 1
+                return None
+            self._stats["document_hits"] += 1
+            self._conn.execute("UPDATE documents SET last_access = ? WHERE hash = ?", (time.time(), doc_hash))
+            self._conn.commit()
+
+        page_texts = json.loads(row[0])
+        chunks = None
+        if row[1] == chunk_config and row[2]:
+            text = "\n".join(text for text in page_texts if text)
+            chunks = [text[start:end] for start, end in json.loads(row[2])]
+        return {"page_texts": page_texts, "chunks": chunks}
+
+    def put_document(self, doc_hash: str, page_texts: List[str], chunk_config: str, chunks: List[str]):
+        text = "\n".join(page_text for page_text in page_texts if page_text)
+        boundaries = chunk_boundaries(text, chunks)
+        page_json = json.dumps(page_texts)
+        boundaries_json = json.dumps(boundaries) if boundaries is not None else None
+        size = len(page_json) + len(boundaries_json or "")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (hash, page_texts, chunk_config, boundaries, size_bytes, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (doc_hash, page_json, chunk_config, boundaries_json, size, time.time())
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    # Chunk embeddings
+
+    def get_embeddings(self, hashes: List[str], model: str) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE hash = ? AND model = ?",
+                    [(now, key, model) for key in found]
+                )
+                self._conn.commit()
+            self._stats["embedding_hits"] += len(found)
+            self._stats["embedding_misses"] += len(unique) - len(found)
+        return found
+
+    def put_embeddings(self, vectors: Dict[str, List[float]], model: str):
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, model, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, vector, size_bytes, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def embed_with_cache(self, texts: List[str], embed: Callable[[List[str]], List[List[float]]],
+                         model: str) -> List[List[float]]:
+        """
+        Return embeddings for `texts`, calling `embed` only for chunks not seen before.
+        Duplicate chunks within `texts` are embedded once.
+        """
+        hashes = [chunk_hash(text) for text in texts]
+        cached = self.get_embeddings(hashes, model)
+
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            fresh = embed(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), fresh))
+            self.put_embeddings(new_vectors, model)
+            cached.update(new_vectors)
+
+        return [cached[key] for key in hashes]
+
+    # Bookkeeping
+
+    def _evict_if_needed(self):
+        # Caller holds self._lock
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICTION_TARGET
+        rows = self._conn.execute("""
+            SELECT 'documents', hash, NULL, size_bytes, last_access FROM documents
+            UNION ALL
+            SELECT 'embeddings', hash, model, size_bytes, last_access FROM embeddings
+            ORDER BY last_access ASC
+        """).fetchall()
+        evicted = 0
+        for table, key, model, size, _ in rows:
+            if total <= target:
+                break
+            if table == "documents":
+                self._conn.execute("DELETE FROM documents WHERE hash = ?", (key,))
+            else:
+                self._conn.execute("DELETE FROM embeddings WHERE hash = ? AND model = ?", (key, model))
+            total -= size
+            evicted += 1
+        self._conn.commit()
+        self._stats["evictions"] += evicted
+        logger.info(f"Content cache evicted {evicted} entries, {total / (1024 * 1024):.1f} MB remain")
+
+    def _total_bytes(self) -> int:
+        row = self._conn.execute(
+            "SELECT (SELECT COALESCE(SUM(size_bytes), 0) FROM documents) + "
+            "(SELECT COALESCE(SUM(size_bytes), 0) FROM embeddings)"
+        ).fetchone()
+        return row[0]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size_bytes"] = self._total_bytes()
+        stats["max_bytes"] = self.max_bytes
+        for kind in ("document", "embedding"):
+            lookups = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = stats[f"{kind}_hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache: Optional[ContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> Optional[ContentCache]:
+    """
+    Process-wide cache, or None when CONTENT_CACHE_ENABLED is false.
+    """
+    global _cache
+    if not CONTENT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ContentCache()
+    return _cache
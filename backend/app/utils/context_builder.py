@@ -0,0 +1,192 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.utils.content_cache import normalize_text
+
+# Prompt tokens the retrieved context may use, for models without an override
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Per-model overrides, e.g. "gemini-1.5-pro=6000,gemini-1.5-flash=3000"
+CONTEXT_TOKEN_BUDGETS = os.getenv("CONTEXT_TOKEN_BUDGETS", "")
+# Share of a block's word trigrams already in a better-ranked block above which it counts as a duplicate
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.85"))
+
+# Gemini averages about four characters per token on English text; close enough for a budget
+CHARS_PER_TOKEN = 4
+# Shorter shared edges are coincidence, not splitter overlap
+MIN_OVERLAP_CHARS = 20
+# A block that would be cut below this is left out instead
+MIN_TRUNCATED_TOKENS = 50
+
+_WORD = re.compile(r"\w+")
+
+_stats_lock = threading.Lock()
+_stats = {"builds": 0, "chunks": 0, "merged": 0, "duplicates": 0, "truncated": 0, "dropped": 0,
+          "tokens_in": 0, "tokens_out": 0}
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = {}
+    for item in spec.split(","):
+        model, _, budget = item.partition("=")
+        if model.strip() and budget.strip():
+            budgets[model.strip()] = int(budget)
+    return budgets
+
+
+_MODEL_BUDGETS = _parse_budgets(CONTEXT_TOKEN_BUDGETS)
+
+
+def token_budget(model: str) -> int:
+    return _MODEL_BUDGETS.get(model, CONTEXT_TOKEN_BUDGET)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def merge_overlapping(first: str, second: str) -> Optional[str]:
+    """
+    `first` followed by `second` when the end of `first` is the start of `second` (as
+    with neighbouring splitter chunks) or one contains the other, else None.
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return None
+    start = first.find(probe, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first + second[len(first) - start:]
+        start = first.find(probe, start + 1)
+    return None
+
+
+def _shingles(text: str) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    cut = text[:max_chars]
+    # Prefer ending on a sentence, then on a word
+    for boundary in (". ", "\n", " "):
+        position = cut.rfind(boundary)
+        if position > max_chars // 2:
+            return cut[:position + 1].rstrip() + " ..."
+    return cut + " ..."
+
+
+class ContextBlock:
+    """
+    Contiguous text from one document: a chunk, or neighbouring chunks merged on their overlap.
+    """
+
+    def __init__(self, text: str, score: float, document_id=None, document_name: Optional[str] = None):
+        self.text = text
+        self.score = score
+        self.document_id = document_id
+        self.document_name = document_name
+
+    def render(self, number: int, text: Optional[str] = None) -> str:
+        header = f"[{number}] {self.document_name}" if self.document_name else f"[{number}]"
+        return f"{header}\n{text if text is not None else self.text}"
+
+
+def build_context(matches, max_tokens: int) -> str:
+    """
+    The retrieved chunks as prompt text within `max_tokens`.
+
+    Chunks of the same document that overlap (the splitter repeats up to `CHUNK_OVERLAP`
+    characters between neighbours) are merged into one block, exact and near-duplicate
+    chunks are dropped, and blocks are emitted best score first, as numbered passages
+    headed by their document name. The last block that does not fit is cut at a sentence
+    boundary; the rest are left out.
+    """
+    counts = {"chunks": 0, "merged": 0, "duplicates": 0, "truncated": 0, "dropped": 0, "tokens_in": 0}
+    blocks: List[ContextBlock] = []
+    seen_texts = set()
+    for match in sorted(matches, key=lambda match: match.score, reverse=True):
+        text = (match.metadata.get("text") or "").strip()
+        if not text:
+            continue
+        counts["chunks"] += 1
+        counts["tokens_in"] += estimate_tokens(text)
+        key = normalize_text(text)
+        if key in seen_texts:
+            counts["duplicates"] += 1
+            continue
+        seen_texts.add(key)
+        blocks.append(ContextBlock(text, match.score, match.metadata.get("document_id"),
+                                   match.metadata.get("document_name")))
+
+    # Merge overlapping neighbours until no pair of the same document joins up
+    merged = True
+    while merged:
+        merged = False
+        for i, block in enumerate(blocks):
+            for j in range(i + 1, len(blocks)):
+                other = blocks[j]
+                if other.document_id != block.document_id:
+                    continue
+                text = merge_overlapping(block.text, other.text) or merge_overlapping(other.text, block.text)
+                if text is not None:
+                    block.text = text
+                    block.score = max(block.score, other.score)
+                    del blocks[j]
+                    counts["merged"] += 1
+                    merged = True
+                    break
+            if merged:
+                break
+
+    # Near-duplicates (the same passage in two documents, re-exported versions) keep the best-ranked copy
+    kept, kept_shingles = [], []
+    for block in sorted(blocks, key=lambda block: block.score, reverse=True):
+        shingles = _shingles(block.text)
+        if any(len(shingles & other) / len(shingles) >= CONTEXT_DEDUP_THRESHOLD for other in kept_shingles):
+            counts["duplicates"] += 1
+            continue
+        kept.append(block)
+        kept_shingles.append(shingles)
+
+    parts, used = [], 0
+    for block in kept:
+        rendered = block.render(len(parts) + 1)
+        tokens = estimate_tokens(rendered) + 1
+        if used + tokens <= max_tokens:
+            parts.append(rendered)
+            used += tokens
+            continue
+        # Room left for text, less the header, the separator and the " ..." marker
+        remaining = max_tokens - used - estimate_tokens(block.render(len(parts) + 1, "")) - 2
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            parts.append(block.render(len(parts) + 1, _truncate(block.text, remaining * CHARS_PER_TOKEN)))
+            used += estimate_tokens(parts[-1]) + 1
+            counts["truncated"] += 1
+        counts["dropped"] += len(kept) - len(parts)
+        break
+
+    with _stats_lock:
+        _stats["builds"] += 1
+        _stats["tokens_out"] += used
+        for key, value in counts.items():
+            _stats[key] += value
+    return "\n\n".join(parts)
+
+
+def get_context_stats() -> dict:
+    """
+    Cumulative context assembly counters for this process.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["token_savings"] = round(1 - stats["tokens_out"] / stats["tokens_in"], 4) if stats["tokens_in"] else 0.0
+    stats["default_budget"] = CONTEXT_TOKEN_BUDGET
+    return stats
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/embedding-001"
+EMBEDDING_DIMENSION = 768
+
+# Gemini's batchEmbedContents accepts at most 100 texts per request
+MAX_PROVIDER_BATCH_SIZE = 100
+
+
+class TransientEmbeddingError(Exception):
+    """
+    Raised by providers for failures that are worth retrying (rate limits, timeouts, 5xx).
+    """
+
+
+class EmbeddingProvider:
+    """
+    A backend that turns a batch of texts into embedding vectors in a single request.
+    """
+    name = "base"
+
+    @property
+    def model_key(self) -> str:
+        """
+        Identifies the vector space, so cached vectors from another model are never reused.
+        """
+        return self.name
+
+    def embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        raise NotImplementedError
+
+    async def embed_batch_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """
+        Non-blocking variant for the chat path. Providers without an async client run
+        the blocking call on the event loop's thread pool.
+        """
+        return await asyncio.to_thread(self.embed_batch, texts, task_type)
+
+    def is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, (TransientEmbeddingError, ConnectionError, TimeoutError))
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeds batches through the Gemini API. `genai.configure` runs once per process.
+    """
+    name = "gemini"
+    _configure_lock = threading.Lock()
+    _configured = False
+
+    def __init__(self, model: str = EMBEDDING_MODEL, api_key: Optional[str] = None):
+        import google.generativeai as genai
+
+        self.model = model
+        self._genai = genai
+        with GeminiEmbeddingProvider._configure_lock:
+            if not GeminiEmbeddingProvider._configured:
+                genai.configure(api_key=api_key or os.environ.get("GEMINI_API_KEY"))
+                GeminiEmbeddingProvider._configured = True
+
+    @property
+    def model_key(self) -> str:
+        return f"gemini:{self.model}"
+
+    def embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        result = self._genai.embed_content(
+            model=self.model,
+            content=texts,
+            task_type=task_type
+        )
+        return result["embedding"]
+
+    async def embed_batch_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        embed_content_async = getattr(self._genai, "embed_content_async", None)
+        if embed_content_async is None:
+            return await super().embed_batch_async(texts, task_type)
+        result = await embed_content_async(
+            model=self.model,
+            content=texts,
+            task_type=task_type
+        )
+        return result["embedding"]
+
+    def is_retryable(self, error: Exception) -> bool:
+        if super().is_retryable(error):
+            return True
+        try:
+            from google.api_core import exceptions as google_exceptions
+        except ImportError:
+            return False
+        return isinstance(error, (
+            google_exceptions.ResourceExhausted,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.InternalServerError,
+        ))
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """
+    Offline provider for tests and benchmarks.
+
+    Vectors are deterministic unit vectors derived from the text hash, so identical
+    texts always embed identically. `latency` simulates the per-request round trip and
+    `failure_rate` injects transient errors to exercise the retry path.
+    """
+    name = "fake"
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, latency: float = 0.0, failure_rate: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+
+    @property
+    def model_key(self) -> str:
+        return f"fake:{self.dimension}"
+
+    def embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        self._maybe_fail()
+        return [self._vector_for(text) for text in texts]
+
+    async def embed_batch_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        return [self._vector_for(text) for text in texts]
+
+    def _maybe_fail(self):
+        if self.failure_rate:
+            with self._lock:
+                failed = self._random.random() < self.failure_rate
+            if failed:
+                raise TransientEmbeddingError("Simulated provider failure")
+
+    def _vector_for(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        generator = random.Random(seed)
+        vector = [generator.gauss(0.0, 1.0) for _ in range(self.dimension)]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+
+class EmbeddingEngine:
+    """
+    Embeds lists of texts with batched provider requests, bounded concurrency and
+    exponential backoff on transient failures. Output order always matches input order.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        batch_size: int = MAX_PROVIDER_BATCH_SIZE,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self.provider = provider
+        self.batch_size = max(1, min(batch_size, MAX_PROVIDER_BATCH_SIZE))
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding")
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "texts": 0, "retries": 0, "failures": 0, "seconds": 0.0}
+
+    def embed_documents(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """
+        Embed every text, sending at most `batch_size` texts per request and running
+        at most `max_concurrency` requests at once.
+        """
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return self._embed_with_retry(batches[0], task_type)
+
+        futures = [self._executor.submit(self._embed_with_retry, batch, task_type) for batch in batches]
+        embeddings = []
+        for future in futures:
+            embeddings.extend(future.result())
+        return embeddings
+
+    def embed_query(self, text: str, task_type: str = "retrieval_document") -> List[float]:
+        """
+        Embed a single text. Uses the same task type as ingestion so query and
+        document vectors stay comparable.
+        """
+        return self._embed_with_retry([text], task_type)[0]
+
+    async def embed_query_async(self, text: str, task_type: str = "retrieval_document") -> List[float]:
+        """
+        `embed_query` without blocking the event loop, with the same retry policy.
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                embeddings = await self.provider.embed_batch_async([text], task_type)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, 1)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._record(requests=1, texts=1, seconds=time.perf_counter() - started)
+            return embeddings[0]
+
+    def _embed_with_retry(self, batch: List[str], task_type: str) -> List[List[float]]:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                embeddings = self.provider.embed_batch(batch, task_type)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, len(batch))
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Provider returned {len(embeddings)} embeddings for {len(batch)} texts")
+            self._record(requests=1, texts=len(batch), seconds=time.perf_counter() - started)
+            return embeddings
+
+    def _retry_delay(self, error: Exception, attempt: int, batch_size: int) -> float:
+        """
+        Backoff before the next attempt; re-raises `error` once it is not worth retrying.
+        """
+        if attempt >= self.max_retries or not self.provider.is_retryable(error):
+            self._record(failures=1)
+            logger.error(f"Embedding batch of {batch_size} failed after {attempt + 1} attempts: {error}")
+            raise error
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(delay / 2, delay)  # jitter so parallel batches don't retry in lockstep
+        logger.warning(f"Embedding batch failed ({error}), retrying in {delay:.2f}s")
+        self._record(retries=1)
+        return delay
+
+    def _record(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["provider"] = self.provider.name
+        stats["batch_size"] = self.batch_size
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_engine: Optional[EmbeddingEngine] = None
+_engine_lock = threading.Lock()
+
+
+def create_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    name = (name or os.getenv("EMBEDDING_PROVIDER", "gemini")).lower()
+    if name == "fake":
+        return FakeEmbeddingProvider(latency=float(os.getenv("FAKE_EMBEDDING_LATENCY", "0")))
+    if name == "gemini":
+        return GeminiEmbeddingProvider()
+    raise ValueError(f"Unknown embedding provider: {name}")
+
+
+def get_embedding_engine() -> EmbeddingEngine:
+    """
+    Process-wide engine configured from the environment:
+    EMBEDDING_PROVIDER, EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_CONCURRENCY, EMBEDDING_MAX_RETRIES.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EmbeddingEngine(
+                    provider=create_provider(),
+                    batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", str(MAX_PROVIDER_BATCH_SIZE))),
+                    max_concurrency=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4")),
+                    max_retries=int(os.getenv("EMBEDDING_MAX_RETRIES", "5")),
+                )
+    return _engine
+
+
+__all__ = [
+    "EmbeddingEngine",
+    "EmbeddingProvider",
+    "GeminiEmbeddingProvider",
+    "FakeEmbeddingProvider",
+    "TransientEmbeddingError",
+    "get_embedding_engine",
+    "EMBEDDING_DIMENSION",
+]
@@ -1,27 +1,47 @@
-import os
-import google.generativeai as genai
+from app.utils.embedding_engine import get_embedding_engine
+from app.utils.query_embedding_cache import get_query_embedding_cache
 
 
 def get_gemini_embedding(text):
     """
     Generate embeddings for text using Gemini API.
+
+    Kept for single-text callers; goes through the shared embedding engine so the
+    client is configured once and transient errors are retried. Repeated and
+    concurrent identical texts are served from the query embedding cache.
     """
     try:
-        # Configure the Gemini API
-        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-
-        # Get embeddings model
-        embedding_model = "models/embedding-001"  # Update this with the correct model name
+        engine = get_embedding_engine()
+        cache = get_query_embedding_cache()
+        if cache:
+            return cache.get_or_embed(text, engine.provider.model_key, engine.embed_query)
+        return engine.embed_query(text)
+    except Exception as e:
+        print(f"Error generating embedding: {e}")
+        raise e
 
-        # Generate embedding
-        result = genai.embed_content(
-            model=embedding_model,
-            content=text,
-            task_type="retrieval_document"
-        )
 
-        # Return the embedding values
-        return result["embedding"]
+async def get_gemini_embedding_async(text):
+    """
+    Generate the embedding for one text without blocking the event loop.
+    """
+    try:
+        engine = get_embedding_engine()
+        cache = get_query_embedding_cache()
+        if cache:
+            return await cache.get_or_embed_async(text, engine.provider.model_key, engine.embed_query_async)
+        return await engine.embed_query_async(text)
     except Exception as e:
         print(f"Error generating embedding: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+
+def get_gemini_embeddings(texts):
+    """
+    Generate embeddings for a list of texts in batched requests.
+    """
+    try:
+        return get_embedding_engine().embed_documents(texts)
+    except Exception as e:
+        print(f"Error generating embeddings: {e}")
+        raise e
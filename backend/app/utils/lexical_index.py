@@ -0,0 +1,265 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from app.vectorstores import VectorMatch, project_namespace
+
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+# Written by the ingestion workers and read by the API, so it must be shared between them
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", os.path.join(os.getcwd(), "lexical_index"))
+# k in the reciprocal rank fusion score 1 / (k + rank)
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Each retriever contributes top_k * this many candidates to the fusion
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "4"))
+
+# Porter stemming for prose; unicode61 splits identifiers like POL-2023-17 into a phrase of tokens
+TOKENIZER = "porter unicode61 remove_diacritics 2"
+# Words, optionally joined by - . / into one identifier (SKU-1042, 4.2.1, HR/2024/17)
+_QUERY_TERM = re.compile(r"\w+(?:[-./]\w+)*")
+MAX_QUERY_TERMS = 32
+_STOPWORDS = frozenset("""
+a about all also an and any are as at be been but by can could did do does for from give has have how i if in
+into is it its me my of on or our please should so some tell than that the their them then there these they this
+to us was we were what when where which who why will with would you your
+""".split())
+
+PROJECT_INDEX_FILE_PATTERN = re.compile(r"^project-(\d+)\.sqlite3$")
+
+
+def match_query(text: str) -> Optional[str]:
+    """
+    An FTS5 query OR-ing the terms of a question. Identifiers become phrase queries, so
+    `POL-2023-17` only matches those tokens in that order. None if nothing is searchable.
+    """
+    terms = []
+    for term in _QUERY_TERM.findall(text.lower()):
+        if term in _STOPWORDS or term in terms:
+            continue
+        terms.append(term)
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms[:MAX_QUERY_TERMS])
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[VectorMatch]], top_k: int, k: int = HYBRID_RRF_K) -> List[VectorMatch]:
+    """
+    Merge ranked match lists by reciprocal rank fusion: a chunk scores the sum of
+    1 / (k + rank) over the lists it appears in. Scores of the inputs are not comparable
+    (cosine vs BM25), ranks are. The returned matches carry the fused score.
+    """
+    fused: Dict[str, float] = {}
+    matches: Dict[str, VectorMatch] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            fused[match.id] = fused.get(match.id, 0.0) + 1.0 / (k + rank)
+            # The first list's match wins, so vector metadata is kept where both have it
+            matches.setdefault(match.id, match)
+    best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [VectorMatch(vector_id, fused[vector_id], matches[vector_id].metadata) for vector_id in best]
+
+
+class LexicalIndex:
+    """
+    BM25 full-text index over one project's chunks, in an SQLite FTS5 table.
+
+    Chunks are keyed by their vector ID and carry the same metadata as the vector, so
+    lexical hits can be fused with vector hits and passed to the prompt as they are.
+    Several processes can share the file: ingestion workers write, the API reads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                metadata TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, tokenize='{TOKENIZER}');
+        """)
+        self._stats = {"searches": 0, "hits": 0}
+
+    def _delete_rows(self, rowids: List[int]):
+        # Caller holds the lock inside a transaction
+        self._conn.executemany("DELETE FROM chunks_fts WHERE rowid = ?", [(rowid,) for rowid in rowids])
+        self._conn.executemany("DELETE FROM chunks WHERE rowid = ?", [(rowid,) for rowid in rowids])
+
+    def _rowids(self, ids: List[str]) -> List[int]:
+        rowids = []
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rowids.extend(rowid for (rowid,) in self._conn.execute(
+                f"SELECT rowid FROM chunks WHERE id IN ({placeholders})", batch))
+        return rowids
+
+    def add(self, chunks: List[dict]):
+        """
+        Index chunks given as `{"id", "metadata": {"text", ...}}` (ingestion's vector dicts;
+        `values` is ignored). Existing IDs are replaced.
+        """
+        latest = {chunk["id"]: chunk.get("metadata") or {} for chunk in chunks}
+        if not latest:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_rows(self._rowids(list(latest)))
+                for vector_id, metadata in latest.items():
+                    metadata = dict(metadata)
+                    text = metadata.pop("text", "") or ""
+                    rowid = self._conn.execute(
+                        "INSERT INTO chunks (id, metadata) VALUES (?, ?)", (vector_id, json.dumps(metadata))
+                    ).lastrowid
+                    self._conn.execute("INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)", (rowid, text))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rowids = self._rowids(list(ids))
+                self._delete_rows(rowids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rowids)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete every chunk whose ID starts with `prefix` (e.g. all chunks of one document).
+        """
+        return self.delete(self.list_ids(prefix))
+
+    def list_ids(self, prefix: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if prefix:
+                rows = self._conn.execute("SELECT id FROM chunks WHERE substr(id, 1, ?) = ? ORDER BY id",
+                                          (len(prefix), prefix)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT id FROM chunks ORDER BY id").fetchall()
+        return [vector_id for (vector_id,) in rows]
+
+    def missing_ids(self, ids: List[str]) -> List[str]:
+        """
+        The IDs in `ids` that are not indexed yet.
+        """
+        with self._lock:
+            present = set()
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                present.update(vector_id for (vector_id,) in self._conn.execute(
+                    f"SELECT id FROM chunks WHERE id IN ({placeholders})", batch))
+        return [vector_id for vector_id in ids if vector_id not in present]
+
+    def search(self, query: str, top_k: int) -> List[VectorMatch]:
+        """
+        The `top_k` chunks ranked by BM25 for a question; `score` is the BM25 score
+        (higher is better).
+        """
+        expression = match_query(query)
+        if not expression or top_k <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunks.id, chunks.metadata, chunks_fts.text, bm25(chunks_fts) AS rank "
+                "FROM chunks_fts JOIN chunks ON chunks.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+                (expression, top_k)
+            ).fetchall()
+            self._stats["searches"] += 1
+            self._stats["hits"] += len(rows)
+
+        matches = []
+        for vector_id, metadata, text, rank in rows:
+            metadata = json.loads(metadata or "{}")
+            metadata["text"] = text
+            # FTS5's bm25() is negated so that ORDER BY ascending ranks best first
+            matches.append(VectorMatch(vector_id, -rank, metadata))
+        return matches
+
+    def chunk_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["chunks"] = self.chunk_count()
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_path(project_id) -> str:
+    return os.path.join(LEXICAL_INDEX_DIR, f"{project_namespace(project_id)}.sqlite3")
+
+
+def get_lexical_index(project_id) -> Optional[LexicalIndex]:
+    """
+    The project's lexical index, opened once per process, or None when
+    HYBRID_SEARCH_ENABLED is false.
+    """
+    if not HYBRID_SEARCH_ENABLED:
+        return None
+    key = project_namespace(project_id)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = LexicalIndex(_index_path(project_id))
+        return _indexes[key]
+
+
+def drop_lexical_index(project_id):
+    """
+    Delete a project's lexical index file.
+    """
+    with _indexes_lock:
+        index = _indexes.pop(project_namespace(project_id), None)
+    if index:
+        index.close()
+    path = _index_path(project_id)
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def list_lexical_index_project_ids() -> List[int]:
+    """
+    IDs of the projects that have a lexical index file, whether or not they still exist.
+    """
+    if not os.path.isdir(LEXICAL_INDEX_DIR):
+        return []
+    return [int(match.group(1)) for match in map(PROJECT_INDEX_FILE_PATTERN.match, os.listdir(LEXICAL_INDEX_DIR))
+            if match]
+
+
+def get_lexical_index_stats() -> Dict[str, dict]:
+    """
+    Size and search counters of every lexical index opened by this process.
+    """
+    with _indexes_lock:
+        indexes = dict(_indexes)
+    return {key: index.get_stats() for key, index in indexes.items()}
@@ -0,0 +1,119 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# Pages handled by one worker task; small enough to balance load, large enough to
+# amortise re-opening the PDF in every shard
+PAGES_PER_SHARD = int(os.getenv("PDF_PAGES_PER_SHARD", "16"))
+
+# Size of the extraction process pool; 0 extracts in the calling process
+EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"documents": 0, "pages": 0, "seconds": 0.0}
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """
+    Extract pages [start, stop) in a worker process. Each page is closed as soon as its
+    text is read so the layout cache never holds more than one page.
+    """
+    texts = []
+    with pdfplumber.open(file_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        for page in pdf.pages:
+            texts.append(page.extract_text() or "")
+            page.close()
+    return texts
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: the API process runs threads (ingestion workers, uvicorn)
+                _executor = ProcessPoolExecutor(
+                    max_workers=EXTRACTION_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+
+def count_pages(file_path: str) -> int:
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_pdf_pages(file_path: str, pages_per_shard: int = PAGES_PER_SHARD) -> Iterator[str]:
+    """
+    Yield the text of every page in order (empty string for pages without text).
+
+    Page ranges are extracted in parallel on the process pool. At most two shards per
+    worker are in flight, so memory stays bounded for very large documents.
+    """
+    started = time.perf_counter()
+    page_count = count_pages(file_path)
+    shards = [(start, min(start + pages_per_shard, page_count)) for start in range(0, page_count, pages_per_shard)]
+
+    if EXTRACTION_WORKERS <= 0:
+        for start, stop in shards:
+            yield from _extract_page_range(file_path, start, stop)
+    else:
+        executor = _get_executor()
+        max_in_flight = EXTRACTION_WORKERS * 2
+        pending = deque()
+        remaining = iter(shards)
+        for start, stop in remaining:
+            pending.append(executor.submit(_extract_page_range, file_path, start, stop))
+            if len(pending) >= max_in_flight:
+                break
+        while pending:
+            texts = pending.popleft().result()
+            next_shard = next(remaining, None)
+            if next_shard:
+                pending.append(executor.submit(_extract_page_range, file_path, *next_shard))
+            yield from texts
+
+    elapsed = time.perf_counter() - started
+    _record(page_count, elapsed)
+    logger.info(f"Extracted {page_count} pages from {file_path} in {elapsed:.2f}s "
+                f"({page_count / elapsed if elapsed else 0:.1f} pages/s)")
+
+
+def _record(pages: int, seconds: float):
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["pages"] += pages
+        _stats["seconds"] += seconds
+
+
+def get_extraction_stats() -> dict:
+    """
+    Cumulative extraction throughput for this process, used to size the pool.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["pages_per_second"] = stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["workers"] = EXTRACTION_WORKERS
+    stats["pages_per_shard"] = PAGES_PER_SHARD
+    return stats
+
+
+def shutdown_extraction_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, List, Optional
+
+from app.utils.content_cache import chunk_hash, get_content_cache
+
+QUERY_EMBEDDING_CACHE_ENABLED = os.getenv("QUERY_EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+# Also look up / store query vectors in the content cache (SQLite), shared by every process on the host
+QUERY_EMBEDDING_CACHE_SHARED = os.getenv("QUERY_EMBEDDING_CACHE_SHARED", "false").lower() == "true"
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query text -> embedding with a TTL, keyed by the normalised text and
+    the embedding model.
+
+    Concurrent lookups of the same text share one embedding call: the first caller
+    embeds, the others wait for its result (`get_or_embed` across threads,
+    `get_or_embed_async` across tasks). With `shared=True` misses fall through to the
+    content cache, so worker processes on one host reuse each other's vectors.
+    """
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE, ttl: int = QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+                 shared: bool = QUERY_EMBEDDING_CACHE_SHARED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (embedding, stored at)
+        self._in_flight = {}  # key -> concurrent.futures.Future
+        self._in_flight_async = {}  # key -> asyncio.Task
+        self._stats = {"hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        return f"{model}:{chunk_hash(text)}"
+
+    def _get(self, key: str) -> Optional[List[float]]:
+        # Caller holds the lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        embedding, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self._stats["evictions"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _put(self, key: str, embedding: List[float]):
+        # Caller holds the lock
+        self._entries[key] = (embedding, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _get_shared(self, key: str, model: str) -> Optional[List[float]]:
+        content_cache = get_content_cache() if self.shared else None
+        if not content_cache:
+            return None
+        text_hash = key[len(model) + 1:]
+        return content_cache.get_embeddings([text_hash], model).get(text_hash)
+
+    def _put_shared(self, key: str, model: str, embedding: List[float]):
+        content_cache = get_content_cache() if self.shared else None
+        if content_cache:
+            content_cache.put_embeddings({key[len(model) + 1:]: embedding}, model)
+
+    def _lookup_or_claim(self, key: str, model: str, in_flight: dict):
+        """
+        Returns (embedding, None) on a hit, (None, pending) when another caller is already
+        embedding this text, or (None, None) when the caller must embed it.
+        """
+        with self._lock:
+            embedding = self._get(key)
+            if embedding is not None:
+                self._stats["hits"] += 1
+                return embedding, None
+            pending = in_flight.get(key)
+            if pending is not None:
+                self._stats["coalesced"] += 1
+                return None, pending
+
+        embedding = self._get_shared(key, model)
+        with self._lock:
+            if embedding is not None:
+                self._stats["shared_hits"] += 1
+                self._put(key, embedding)
+                return embedding, None
+            self._stats["misses"] += 1
+        return None, None
+
+    def get_or_embed(self, text: str, model: str, embed: Callable[[str], List[float]]) -> List[float]:
+        key = self.key(text, model)
+        embedding, pending = self._lookup_or_claim(key, model, self._in_flight)
+        if embedding is not None:
+            return embedding
+        if pending is not None:
+            return pending.result()
+
+        with self._lock:
+            # Re-check: another thread may have claimed the key since our lookup
+            pending = self._in_flight.get(key)
+            if pending is None:
+                future = self._in_flight[key] = Future()
+        if pending is not None:
+            return pending.result()
+
+        try:
+            embedding = embed(text)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        self._store(key, model, embedding, self._in_flight)
+        future.set_result(embedding)
+        return embedding
+
+    async def get_or_embed_async(self, text: str, model: str,
+                                 embed: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        key = self.key(text, model)
+        embedding, pending = self._lookup_or_claim(key, model, self._in_flight_async)
+        if embedding is not None:
+            return embedding
+        if pending is None:
+            with self._lock:
+                pending = self._in_flight_async.get(key)
+                if pending is None:
+                    pending = self._in_flight_async[key] = asyncio.ensure_future(self._embed_async(key, model, text, embed))
+        # Shielded so one cancelled request doesn't cancel the call the others are waiting for
+        return await asyncio.shield(pending)
+
+    async def _embed_async(self, key: str, model: str, text: str, embed) -> List[float]:
+        try:
+            embedding = await embed(text)
+        except Exception:
+            with self._lock:
+                self._in_flight_async.pop(key, None)
+            raise
+        self._store(key, model, embedding, self._in_flight_async)
+        return embedding
+
+    def _store(self, key: str, model: str, embedding: List[float], in_flight: dict):
+        with self._lock:
+            self._put(key, embedding)
+            in_flight.pop(key, None)
+        self._put_shared(key, model, embedding)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["shared_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["shared"] = self.shared
+        return stats
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> Optional[QueryEmbeddingCache]:
+    """
+    Process-wide cache, or None when QUERY_EMBEDDING_CACHE_ENABLED is false.
+    """
+    global _cache
+    if not QUERY_EMBEDDING_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryEmbeddingCache()
+    return _cache
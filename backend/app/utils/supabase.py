@@ -7,7 +7,7 @@ SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")  # Store this securely
 # Initialize Supabase client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def upload_to_supabase(file_path: str, bucket_name: str, project_id: str, doc_id: str) -> str:
+def upload_to_supabase(file_path: str, bucket_name: str, project_id: str, doc_id: str, upsert: bool = False) -> str:
     """
     Uploads a file to Supabase Storage using `project_id-doc_id` as the filename.
     
@@ -15,6 +15,7 @@ def upload_to_supabase(file_path: str, bucket_name: str, project_id: str, doc_id
     :param bucket_name: Supabase storage bucket name.
     :param project_id: Unique identifier of the project.
     :param doc_id: Unique identifier of the document.
+    :param upsert: Overwrite an existing object (new version of a document).
     :return: Public URL of the uploaded file.
     """
     try:
@@ -22,7 +23,9 @@ def upload_to_supabase(file_path: str, bucket_name: str, project_id: str, doc_id
         supabase_filename = f"projectid-{project_id}-docid-{doc_id}.pdf"
 
         with open(file_path, "rb") as file:
-            response = supabase.storage.from_(bucket_name).upload(supabase_filename, file)
+            response = supabase.storage.from_(bucket_name).upload(
+                supabase_filename, file, file_options={"upsert": "true" if upsert else "false"}
+            )
 
         if hasattr(response, "error") and response.error:
             raise Exception(f"Failed to upload file: {response.error['message']}")
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import tempfile
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+# Uploaded files wait here until an ingestion worker picks them up. When workers run
+# on other machines this must point at storage they share with the API.
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "sherlock-uploads"))
+
+# Bytes read from the request per iteration; bounds memory per upload regardless of file size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def save_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> dict:
+    """
+    Stream an uploaded file to the spool directory chunk by chunk, hashing as it goes.
+
+    The spooled file is the only copy: ingestion workers extract text from it and
+    upload it to Supabase directly.
+
+    :param file: The incoming upload.
+    :return: dict with the spooled `path`, its `size` in bytes and its `sha256` hex digest.
+    """
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    file_extension = file.filename.split('.')[-1] if '.' in file.filename else None
+    suffix = f".{file_extension}" if file_extension else ""
+    path = os.path.join(UPLOAD_SPOOL_DIR, f"{uuid4().hex}{suffix}")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as spooled:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                spooled.write(chunk)
+                size += len(chunk)
+    except Exception:
+        remove_spooled_file(path)
+        raise
+    finally:
+        await file.close()
+
+    return {"path": path, "size": size, "sha256": digest.hexdigest()}
+
+
+def remove_spooled_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error deleting spooled file {path}: {e}")
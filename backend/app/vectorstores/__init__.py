@@ -0,0 +1,103 @@
+import os
+import re
+import shutil
+import threading
+from typing import Dict, List
+
+from app.vectorstores.base import VectorStore, VectorMatch, QueryResult
+
+# "pinecone" (default) or "local" for the on-disk NumPy backend
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_DIR = os.getenv("LOCAL_VECTOR_STORE_DIR", os.path.join(os.getcwd(), "vector_store"))
+
+PROJECT_NAMESPACE_PATTERN = re.compile(r"^project-(\d+)$")
+
+_local_stores: Dict[str, VectorStore] = {}
+_local_stores_lock = threading.Lock()
+
+
+def project_namespace(project_id) -> str:
+    return f"project-{project_id}"
+
+
+def get_vector_store(project_id) -> VectorStore:
+    """
+    The vector store holding a project's chunks, for the configured backend.
+    """
+    if VECTOR_STORE_BACKEND == "local":
+        namespace = project_namespace(project_id)
+        with _local_stores_lock:
+            if namespace not in _local_stores:
+                from app.vectorstores.local_store import LocalVectorStore
+                _local_stores[namespace] = LocalVectorStore(os.path.join(LOCAL_VECTOR_STORE_DIR, namespace))
+            return _local_stores[namespace]
+
+    # Imported lazily so the local backend runs without Pinecone credentials
+    from app.config.pinecone_init import get_project_index
+    return get_project_index(project_id)
+
+
+def get_local_store_stats() -> Dict[str, dict]:
+    """
+    Size and ANN index state of every local store opened by this process.
+    """
+    with _local_stores_lock:
+        stores = dict(_local_stores)
+    return {namespace: store.get_index_stats() for namespace, store in stores.items()}
+
+
+def create_vector_store(project_id):
+    """
+    Provision storage for a new project (a Pinecone index, unless namespaces or the
+    local backend are in use).
+    """
+    if VECTOR_STORE_BACKEND == "local":
+        get_vector_store(project_id)
+        return project_namespace(project_id)
+
+    from app.config.pinecone_init import create_project_index
+    return create_project_index(project_id)
+
+
+def drop_vector_store(project_id):
+    """
+    Delete every vector of a project along with its storage (index, namespace or local directory).
+    """
+    if VECTOR_STORE_BACKEND == "local":
+        namespace = project_namespace(project_id)
+        with _local_stores_lock:
+            store = _local_stores.pop(namespace, None)
+        if store:
+            store.close()
+        shutil.rmtree(os.path.join(LOCAL_VECTOR_STORE_DIR, namespace), ignore_errors=True)
+        return
+
+    from app.config.pinecone_init import delete_project_index
+    delete_project_index(project_id)
+
+
+def list_vector_store_project_ids() -> List[int]:
+    """
+    IDs of the projects that currently have vector storage, whether or not they still exist.
+    """
+    if VECTOR_STORE_BACKEND == "local":
+        if not os.path.isdir(LOCAL_VECTOR_STORE_DIR):
+            return []
+        return [int(match.group(1)) for match in map(PROJECT_NAMESPACE_PATTERN.match, os.listdir(LOCAL_VECTOR_STORE_DIR))
+                if match]
+
+    from app.config.pinecone_init import list_project_ids
+    return list_project_ids()
+
+
+__all__ = [
+    "VectorStore",
+    "VectorMatch",
+    "QueryResult",
+    "get_vector_store",
+    "create_vector_store",
+    "get_local_store_stats",
+    "drop_vector_store",
+    "list_vector_store_project_ids",
+    "project_namespace",
+]
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Dict, Iterator, List, Optional
+
+
+class VectorMatch:
+    """
+    One query hit. Mirrors the attributes of a Pinecone match (`id`, `score`, `metadata`)
+    so callers work the same against every backend.
+    """
+
+    def __init__(self, id: str, score: float, metadata: Optional[dict] = None, values: Optional[List[float]] = None):
+        self.id = id
+        self.score = score
+        self.metadata = metadata or {}
+        self.values = values
+
+    def __repr__(self):
+        return f"VectorMatch(id={self.id!r}, score={self.score:.4f})"
+
+
+class QueryResult:
+    def __init__(self, matches: List[VectorMatch]):
+        self.matches = matches
+
+
+class VectorStore:
+    """
+    Storage for one project's chunk vectors.
+
+    Vectors are dicts with `id`, `values` and `metadata`, as produced by ingestion.
+    Filters use the Pinecone metadata filter syntax (`{"document_id": 3}`,
+    `{"document_id": {"$in": [3, 4]}}`).
+    """
+
+    def upsert(self, vectors: List[dict]):
+        raise NotImplementedError
+
+    def query(self, vector: List[float], top_k: int, include_metadata: bool = True,
+              filter: Optional[dict] = None) -> QueryResult:
+        raise NotImplementedError
+
+    async def query_async(self, vector: List[float], top_k: int, include_metadata: bool = True,
+                          filter: Optional[dict] = None) -> QueryResult:
+        """
+        `query` for async callers; runs on the event loop's thread pool so the loop stays free.
+        """
+        return await asyncio.to_thread(self.query, vector, top_k, include_metadata, filter)
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorMatch]:
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, filter: Optional[dict] = None):
+        raise NotImplementedError
+
+    def list(self, prefix: Optional[str] = None) -> Iterator[List[str]]:
+        """
+        Yield pages of vector IDs, optionally restricted to an ID prefix.
+        """
+        raise NotImplementedError
+
+    def delete_by_prefix(self, prefix: str, batch_size: int = 1000) -> int:
+        """
+        Delete every vector whose ID starts with `prefix`. Returns the number deleted.
+        """
+        deleted = 0
+        for page in list(self.list(prefix=prefix)):
+            for i in range(0, len(page), batch_size):
+                batch = page[i:i + batch_size]
+                self.delete(ids=batch)
+                deleted += len(batch)
+        return deleted
+
+    def vector_count(self) -> int:
+        raise NotImplementedError
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Defaults for every local project; override per project with LocalVectorStore.configure_index()
+DEFAULT_INDEX_PARAMS = {
+    # Below this many live vectors brute force is fast enough and exact
+    "min_rows": int(os.getenv("LOCAL_ANN_MIN_ROWS", "50000")),
+    # Number of clusters; 0 picks ~4 * sqrt(rows)
+    "nlist": int(os.getenv("LOCAL_ANN_NLIST", "0")),
+    # Clusters scanned per query: the recall/latency knob
+    "nprobe": int(os.getenv("LOCAL_ANN_NPROBE", "16")),
+    # Retrain once the live set has grown this much since the last training
+    "retrain_growth": float(os.getenv("LOCAL_ANN_RETRAIN_GROWTH", "4")),
+}
+
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_LIST = 32
+MAX_NLIST = 4096
+ASSIGN_BATCH_ROWS = 8192
+# Rows appended since the inverted lists were built are scanned directly until the tail grows past this
+MAX_TAIL_ROWS = 50000
+
+
+def auto_nlist(rows: int) -> int:
+    return int(max(1, min(MAX_NLIST, 4 * np.sqrt(rows))))
+
+
+class IVFIndex:
+    """
+    Inverted-file index over a LocalVectorStore's vector file.
+
+    Rows are clustered around `nlist` centroids (spherical k-means on a sample); a query
+    scores only the rows in its `nprobe` closest clusters. The index stores one cluster id
+    per row of the vector file (`ivf_assign.i32`, same row numbering) next to the centroids
+    (`ivf_centroids.npy`), so new rows are assigned incrementally and deletes rely on the
+    store's tombstones.
+    """
+
+    def __init__(self, directory: str, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self.params_path = os.path.join(directory, "index.json")
+        self.centroids_path = os.path.join(directory, "ivf_centroids.npy")
+        self.assign_path = os.path.join(directory, "ivf_assign.i32")
+
+        self.params = dict(DEFAULT_INDEX_PARAMS)
+        self.trained_rows = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists = []
+        self._built_upto = 0
+        self.load()
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    # Persistence
+
+    def load(self):
+        """
+        Read parameters, centroids and assignments from disk (after this or another process wrote them).
+        """
+        self.params = dict(DEFAULT_INDEX_PARAMS)
+        self.trained_rows = 0
+        if os.path.exists(self.params_path):
+            with open(self.params_path) as params_file:
+                stored = json.load(params_file)
+            self.trained_rows = stored.pop("trained_rows", 0)
+            self.params.update({key: value for key, value in stored.items() if key in DEFAULT_INDEX_PARAMS})
+
+        if os.path.exists(self.centroids_path) and os.path.exists(self.assign_path):
+            self.centroids = np.load(self.centroids_path)
+            self.assignments = np.fromfile(self.assign_path, dtype=np.int32)
+        else:
+            self.centroids = None
+            self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists = []
+        self._built_upto = 0
+
+    def save_params(self):
+        stored = {key: self.params[key] for key in DEFAULT_INDEX_PARAMS}
+        stored["trained_rows"] = self.trained_rows
+        temp_path = self.params_path + ".tmp"
+        with open(temp_path, "w") as params_file:
+            json.dump(stored, params_file)
+        os.replace(temp_path, self.params_path)
+
+    def drop(self):
+        for path in (self.centroids_path, self.assign_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.trained_rows = 0
+        self.save_params()
+        self.load()
+
+    # Training and assignment
+
+    def needs_training(self, live_rows: int) -> bool:
+        if live_rows < self.params["min_rows"]:
+            return False
+        if not self.trained:
+            return True
+        return live_rows >= self.trained_rows * self.params["retrain_growth"]
+
+    def train(self, matrix: np.ndarray, live: np.ndarray, seed: int = 0):
+        """
+        Cluster the live rows of `matrix` and assign every row of it to a cluster.
+        """
+        rows = np.flatnonzero(live[:matrix.shape[0]])
+        nlist = self.params["nlist"] or auto_nlist(rows.size)
+        nlist = min(nlist, rows.size)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(rows.size, nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(matrix[np.sort(rng.choice(rows, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            present, starts = np.unique(labels[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids[present] = sums / np.where(norms == 0, 1, norms)
+            empty = np.setdiff1d(np.arange(nlist), present)
+            if empty.size:
+                # Re-seed empty clusters with random sample points
+                centroids[empty] = sample[rng.choice(sample_size, empty.size, replace=False)]
+
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = self.assign(matrix)
+        self.trained_rows = int(rows.size)
+
+        temp_centroids = self.centroids_path + ".tmp.npy"
+        np.save(temp_centroids, self.centroids)
+        temp_assign = self.assign_path + ".tmp"
+        self.assignments.tofile(temp_assign)
+        os.replace(temp_centroids, self.centroids_path)
+        os.replace(temp_assign, self.assign_path)
+        self.save_params()
+        self._lists = []
+        self._built_upto = 0
+        logger.info(f"Trained IVF index for {self.directory}: {rows.size} rows, {nlist} lists")
+
+    def assign(self, values: np.ndarray) -> np.ndarray:
+        labels = np.empty(values.shape[0], dtype=np.int32)
+        for i in range(0, values.shape[0], ASSIGN_BATCH_ROWS):
+            labels[i:i + ASSIGN_BATCH_ROWS] = np.argmax(
+                np.asarray(values[i:i + ASSIGN_BATCH_ROWS]) @ self.centroids.T, axis=1
+            )
+        return labels
+
+    def append(self, start: int, values: np.ndarray, matrix: np.ndarray):
+        """
+        Assign the rows written at `start` and persist their cluster ids. Called by the store
+        while it holds the write transaction; rows written before the index was trained or by
+        a writer that died are assigned from `matrix` first.
+        """
+        if not self.trained:
+            return
+        on_disk = os.path.getsize(self.assign_path) // 4 if os.path.exists(self.assign_path) else 0
+        if on_disk != self.assignments.size:
+            self.assignments = np.fromfile(self.assign_path, dtype=np.int32)
+        if self.assignments.size < start:
+            self.assignments = np.concatenate([self.assignments, self.assign(matrix[self.assignments.size:start])])
+        rewrite = self.assignments.size != on_disk or self.assignments.size > start
+        self.assignments = np.concatenate([self.assignments[:start], self.assign(values)])
+
+        if rewrite:
+            temp_assign = self.assign_path + ".tmp"
+            self.assignments.tofile(temp_assign)
+            os.replace(temp_assign, self.assign_path)
+            self._lists = []
+            self._built_upto = 0
+        else:
+            with open(self.assign_path, "ab") as assign_file:
+                assign_file.write(self.assignments[start:].tobytes())
+
+    def compacted(self, live_rows: np.ndarray):
+        """
+        Renumber assignments after the store rewrote its vector file with `live_rows` only.
+        """
+        if not self.trained:
+            return
+        live_rows = live_rows[live_rows < self.assignments.size]
+        self.assignments = self.assignments[live_rows]
+        temp_assign = self.assign_path + ".tmp"
+        self.assignments.tofile(temp_assign)
+        os.replace(temp_assign, self.assign_path)
+        self._lists = []
+        self._built_upto = 0
+
+    # Search
+
+    def _build_lists(self):
+        order = np.argsort(self.assignments, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        self._built_upto = self.assignments.size
+
+    def candidates(self, query_vector: np.ndarray, rows_in_file: int) -> np.ndarray:
+        """
+        Row numbers in the `nprobe` clusters closest to the query (tombstoned rows included).
+        """
+        if not self._lists or self.assignments.size - self._built_upto > MAX_TAIL_ROWS:
+            self._build_lists()
+        nprobe = min(self.params["nprobe"], len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+
+        parts = [self._lists[probe] for probe in probes]
+        tail = self.assignments[self._built_upto:]
+        if tail.size:
+            parts.append(np.flatnonzero(np.isin(tail, probes)) + self._built_upto)
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        # Rows appended by another process but not yet assigned here are scanned exactly
+        if rows_in_file > self.assignments.size:
+            rows = np.concatenate([rows, np.arange(self.assignments.size, rows_in_file)])
+        return rows[rows < rows_in_file]
+
+    def get_stats(self) -> dict:
+        return {
+            **{key: self.params[key] for key in DEFAULT_INDEX_PARAMS},
+            "trained": self.trained,
+            "trained_rows": self.trained_rows,
+            "lists": 0 if self.centroids is None else len(self.centroids),
+            "assigned_rows": int(self.assignments.size),
+        }
@@ -0,0 +1,402 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.vectorstores.base import VectorStore, VectorMatch, QueryResult
+from app.vectorstores.ivf_index import IVFIndex, DEFAULT_INDEX_PARAMS
+
+logger = logging.getLogger(__name__)
+
+# Compact once this share of the rows in the vector file are dead
+COMPACTION_DEAD_RATIO = 0.3
+COMPACTION_MIN_ROWS = 1000
+
+LIST_PAGE_SIZE = 100
+
+_FILTER_KEY = re.compile(r"^[A-Za-z0-9_]+$")
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _filter_to_sql(filter: dict) -> Tuple[str, list]:
+    """
+    Translate a Pinecone-style metadata filter into a WHERE clause over `records.metadata`.
+    """
+    clauses, params = [], []
+    for key, condition in filter.items():
+        if key in ("$and", "$or"):
+            parts = [_filter_to_sql(part) for part in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(clause for clause, _ in parts) + ")")
+            for _, part_params in parts:
+                params.extend(part_params)
+            continue
+
+        if not _FILTER_KEY.match(key):
+            raise ValueError(f"Unsupported metadata filter key: {key}")
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        field = f"json_extract(metadata, '$.{key}')"
+        for operator, value in condition.items():
+            if operator in _COMPARISONS:
+                clauses.append(f"{field} {_COMPARISONS[operator]} ?")
+                params.append(value)
+            elif operator in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(value)) or "NULL"
+                clauses.append(f"{field} {'IN' if operator == '$in' else 'NOT IN'} ({placeholders})")
+                params.extend(value)
+            else:
+                raise ValueError(f"Unsupported metadata filter operator: {operator}")
+    return " AND ".join(clauses) or "1", params
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store for offline runs, load tests and small deployments.
+
+    Vectors are L2-normalised float32 rows appended to `vectors.f32` and memory-mapped
+    for queries, so cosine similarity is a single matrix-vector product. IDs and metadata
+    live in `records.sqlite3`; an upsert or delete only tombstones the old row, and the
+    vector file is compacted once enough rows are dead. Several processes can share a
+    directory: writers are serialised by SQLite and readers reload when it changes.
+
+    Once a project holds `min_rows` vectors, unfiltered queries go through an IVF index
+    (see ivf_index.py) and only score the rows of the closest clusters.
+    """
+
+    def __init__(self, directory: str, dimension: int = 768):
+        self.directory = directory
+        self.dimension = dimension
+        self.row_bytes = dimension * 4
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "records.sqlite3"), check_same_thread=False,
+                                     timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                metadata TEXT,
+                deleted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS records_id ON records (id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._index = IVFIndex(directory, dimension)
+
+        self._data_version = None
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._reload()
+
+    # In-memory view
+
+    def _reload(self):
+        """
+        Rebuild the id/row maps from SQLite and re-map the vector file. Caller holds the lock.
+        """
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        rows = self._conn.execute("SELECT row, id FROM records WHERE deleted = 0").fetchall()
+        size = max((row for row, _ in rows), default=-1) + 1
+        self._live = np.zeros(size, dtype=bool)
+        self._ids = [None] * size
+        self._row_of = {}
+        for row, vector_id in rows:
+            self._live[row] = True
+            self._ids[row] = vector_id
+            self._row_of[vector_id] = row
+        # The file may have been replaced by a compaction in another process
+        self._remap(force=True)
+        self._index.load()
+
+    def _remap(self, force: bool = False):
+        file_rows = os.path.getsize(self.vectors_path) // self.row_bytes if os.path.exists(self.vectors_path) else 0
+        if file_rows == 0:
+            self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+        elif force or file_rows != self._matrix.shape[0]:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(file_rows, self.dimension))
+
+    def _refresh(self):
+        # data_version only changes when another connection (process) committed
+        if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._reload()
+        elif len(self._live) > self._matrix.shape[0]:
+            self._remap()
+
+    def _mark_dead(self, vector_ids):
+        for vector_id in vector_ids:
+            row = self._row_of.pop(vector_id, None)
+            if row is not None:
+                self._live[row] = False
+                self._ids[row] = None
+
+    # VectorStore
+
+    def upsert(self, vectors: List[dict]):
+        latest = {vector["id"]: vector for vector in vectors}  # last write wins within a batch
+        if not latest:
+            return
+        values = np.asarray([vector["values"] for vector in latest.values()], dtype=np.float32)
+        if values.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {values.shape[1]}")
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values = values / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # serialises writers across processes
+            try:
+                with open(self.vectors_path, "a+b") as vector_file:
+                    size = vector_file.seek(0, os.SEEK_END)
+                    if size % self.row_bytes:
+                        # A previous writer died mid-append; drop the partial row
+                        size -= size % self.row_bytes
+                        vector_file.truncate(size)
+                    start = size // self.row_bytes
+                    vector_file.write(values.tobytes())
+                self._remap()
+                self._index.append(start, values, self._matrix)
+
+                ids = list(latest.keys())
+                self._conn.executemany("UPDATE records SET deleted = 1 WHERE id = ? AND deleted = 0",
+                                       [(vector_id,) for vector_id in ids])
+                self._conn.executemany(
+                    "INSERT INTO records (row, id, metadata) VALUES (?, ?, ?)",
+                    [(start + i, vector_id, json.dumps(latest[vector_id].get("metadata") or {}))
+                     for i, vector_id in enumerate(ids)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._mark_dead(ids)
+            end = start + len(ids)
+            if end > len(self._live):
+                self._live = np.concatenate([self._live, np.zeros(end - len(self._live), dtype=bool)])
+                self._ids.extend([None] * (end - len(self._ids)))
+            for i, vector_id in enumerate(ids):
+                self._live[start + i] = True
+                self._ids[start + i] = vector_id
+                self._row_of[vector_id] = start + i
+            if self._index.needs_training(len(self._row_of)):
+                self.build_index()
+
+    def query(self, vector: List[float], top_k: int, include_metadata: bool = True,
+              filter: Optional[dict] = None) -> QueryResult:
+        query_vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+
+        with self._lock:
+            self._refresh()
+            matrix, live, ids = self._matrix, self._live, list(self._ids)
+            rows_in_file = min(len(live), matrix.shape[0])
+            if filter:
+                # Filters (one document, a few documents) are selective: score the matches exactly
+                clause, params = _filter_to_sql(filter)
+                candidate_rows = np.fromiter(
+                    (row for (row,) in self._conn.execute(
+                        f"SELECT row FROM records WHERE deleted = 0 AND {clause}", params)),
+                    dtype=np.int64
+                )
+                candidate_rows = candidate_rows[candidate_rows < rows_in_file]
+            elif self._index.trained:
+                candidate_rows = self._index.candidates(query_vector, rows_in_file)
+                candidate_rows = candidate_rows[live[candidate_rows]]
+            else:
+                candidate_rows = None
+
+        if top_k <= 0:
+            return QueryResult([])
+        if candidate_rows is None:
+            # Full scan: score the mapped file in place instead of gathering the live rows first
+            candidate_rows = np.arange(rows_in_file)
+            scores = matrix[:rows_in_file] @ query_vector
+            scores[~live[:rows_in_file]] = -np.inf
+            k = min(top_k, int(live[:rows_in_file].sum()))
+        else:
+            scores = matrix[candidate_rows] @ query_vector
+            k = min(top_k, scores.size)
+        if k == 0:
+            return QueryResult([])
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        hits = [(ids[candidate_rows[i]], float(scores[i])) for i in top]
+        return QueryResult(self._with_metadata(hits, include_metadata))
+
+    def _with_metadata(self, hits, include_metadata: bool) -> List[VectorMatch]:
+        if not include_metadata:
+            return [VectorMatch(vector_id, score) for vector_id, score in hits if vector_id]
+        metadata = self._metadata_for([vector_id for vector_id, _ in hits if vector_id])
+        # Vectors deleted by another process since the scan have no metadata and are dropped
+        return [VectorMatch(vector_id, score, metadata[vector_id]) for vector_id, score in hits
+                if vector_id in metadata]
+
+    def _metadata_for(self, ids: List[str]) -> Dict[str, dict]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, metadata FROM records WHERE deleted = 0 AND id IN ({placeholders})", ids
+            ).fetchall()
+        return {vector_id: json.loads(metadata or "{}") for vector_id, metadata in rows}
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorMatch]:
+        with self._lock:
+            self._refresh()
+            rows = {vector_id: self._row_of[vector_id] for vector_id in ids if vector_id in self._row_of}
+            matrix = self._matrix
+        metadata = self._metadata_for(list(rows))
+        return {
+            vector_id: VectorMatch(vector_id, 1.0, metadata[vector_id], matrix[row].tolist())
+            for vector_id, row in rows.items()
+            if vector_id in metadata and row < matrix.shape[0]
+        }
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, filter: Optional[dict] = None):
+        with self._lock:
+            if delete_all:
+                self._conn.execute("UPDATE records SET deleted = 1 WHERE deleted = 0")
+                self._index.drop()
+                self._reload()
+            elif filter is not None:
+                clause, params = _filter_to_sql(filter)
+                self._conn.execute(f"UPDATE records SET deleted = 1 WHERE deleted = 0 AND {clause}", params)
+                self._reload()
+            elif ids:
+                self._conn.executemany("UPDATE records SET deleted = 1 WHERE id = ? AND deleted = 0",
+                                       [(vector_id,) for vector_id in ids])
+                self._mark_dead(ids)
+            self._compact_if_needed()
+
+    def list(self, prefix: Optional[str] = None) -> Iterator[List[str]]:
+        with self._lock:
+            if prefix:
+                rows = self._conn.execute(
+                    "SELECT id FROM records WHERE deleted = 0 AND substr(id, 1, ?) = ? ORDER BY id",
+                    (len(prefix), prefix)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT id FROM records WHERE deleted = 0 ORDER BY id").fetchall()
+        ids = [vector_id for (vector_id,) in rows]
+        for i in range(0, len(ids), LIST_PAGE_SIZE):
+            yield ids[i:i + LIST_PAGE_SIZE]
+
+    def vector_count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._row_of)
+
+    # Maintenance
+
+    def _compact_if_needed(self):
+        total = self._matrix.shape[0]
+        if total >= COMPACTION_MIN_ROWS and (total - len(self._row_of)) / total >= COMPACTION_DEAD_RATIO:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrite the vector file with live rows only and renumber them in order.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM records WHERE deleted = 1")
+                live_rows = [row for (row,) in self._conn.execute("SELECT row FROM records ORDER BY row")]
+                file_rows = os.path.getsize(self.vectors_path) // self.row_bytes if os.path.exists(self.vectors_path) else 0
+                source = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                   shape=(file_rows, self.dimension)) if file_rows else None
+
+                temp_path = self.vectors_path + ".compact"
+                with open(temp_path, "wb") as compacted:
+                    for i in range(0, len(live_rows), 10000):
+                        compacted.write(np.ascontiguousarray(source[live_rows[i:i + 10000]]).tobytes())
+                # Ascending order means the target row number is always free
+                self._conn.executemany("UPDATE records SET row = ? WHERE row = ?",
+                                       [(new_row, old_row) for new_row, old_row in enumerate(live_rows)])
+                os.replace(temp_path, self.vectors_path)
+                if len(live_rows) < self._index.params["min_rows"]:
+                    self._index.drop()
+                else:
+                    self._index.compacted(np.asarray(live_rows, dtype=np.int64))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._reload()
+            logger.info(f"Compacted {self.directory}: {file_rows} -> {len(live_rows)} rows")
+
+    def build_index(self):
+        """
+        (Re)train the IVF index on the current live vectors.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._reload()
+                if self._row_of:
+                    self._index.train(self._matrix, self._live)
+                self._bump_index_version()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def configure_index(self, **params):
+        """
+        Override this project's ANN parameters (`min_rows`, `nlist`, `nprobe`, `retrain_growth`).
+        Changing `nlist` or `min_rows` retrains or drops the index; `nprobe` applies immediately.
+        """
+        unknown = set(params) - set(DEFAULT_INDEX_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown index parameters: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._refresh()
+            retrain = any(key in params and params[key] != self._index.params[key] for key in ("nlist", "min_rows"))
+            self._index.params.update(params)
+            self._index.save_params()
+            if not retrain:
+                self._bump_index_version()
+            elif len(self._row_of) >= self._index.params["min_rows"]:
+                self.build_index()
+            else:
+                self._index.drop()
+                self._bump_index_version()
+
+    def _bump_index_version(self):
+        # A committed write changes PRAGMA data_version, so other processes reload the index
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('index_version', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+        )
+
+    def get_index_stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                "live_vectors": len(self._row_of),
+                "rows_in_file": int(self._matrix.shape[0]),
+                "ivf": self._index.get_stats(),
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,52 @@
+from typing import Dict, Iterator, List, Optional
+
+from app.vectorstores.base import VectorStore, VectorMatch, QueryResult
+
+
+class PineconeVectorStore(VectorStore):
+    """
+    A project's slice of Pinecone: its own index, or its namespace in the shared index.
+    """
+
+    def __init__(self, project_id, index, namespace: str = ""):
+        self.project_id = project_id
+        self.index = index
+        self.namespace = namespace
+
+    def upsert(self, vectors: List[dict]):
+        return self.index.upsert(vectors=vectors, namespace=self.namespace)
+
+    def query(self, vector: List[float], top_k: int, include_metadata: bool = True,
+              filter: Optional[dict] = None) -> QueryResult:
+        return self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=include_metadata,
+            filter=filter,
+            namespace=self.namespace
+        )
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorMatch]:
+        fetched = self.index.fetch(ids=ids, namespace=self.namespace)
+        return {
+            vector_id: VectorMatch(vector_id, 1.0, vector.metadata, vector.values)
+            for vector_id, vector in fetched.vectors.items()
+        }
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, filter: Optional[dict] = None):
+        if delete_all:
+            return self.index.delete(delete_all=True, namespace=self.namespace)
+        if filter is not None:
+            # Only pod-based indexes support delete-by-filter; serverless callers use delete_by_prefix
+            return self.index.delete(filter=filter, namespace=self.namespace)
+        return self.index.delete(ids=ids, namespace=self.namespace)
+
+    def list(self, prefix: Optional[str] = None) -> Iterator[List[str]]:
+        return self.index.list(prefix=prefix, namespace=self.namespace)
+
+    def vector_count(self) -> int:
+        stats = self.index.describe_index_stats()
+        if self.namespace:
+            namespace_stats = stats.namespaces.get(self.namespace)
+            return namespace_stats.vector_count if namespace_stats else 0
+        return stats.total_vector_count
@@ -0,0 +1,142 @@
+"""
+Ingestion workers: poll the `ingestion_job_documents` queue and run the pipeline.
+
+Run dedicated worker processes (any number, on any host that shares the upload spool):
+    python -m app.workers.ingestion_worker --processes 4
+
+The API process can also run a few worker threads itself; see INGESTION_INPROCESS_WORKERS.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from app.services.ingestion_service import IngestionService
+from app.utils import pdf_extraction
+from app.utils.lexical_index import HYBRID_SEARCH_ENABLED, LEXICAL_INDEX_DIR
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = float(os.getenv("INGESTION_POLL_INTERVAL_SECONDS", "2"))
+STALE_CHECK_INTERVAL_SECONDS = 60
+
+
+class IngestionWorker:
+    """
+    Claims one queued document at a time and processes it until told to stop.
+    """
+
+    def __init__(self, worker_id: str, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+
+    def run_once(self) -> bool:
+        """
+        Process at most one document. Returns False when the queue was empty.
+        """
+        job_document_id = IngestionService.claim_next_document(self.worker_id)
+        if job_document_id is None:
+            return False
+        logger.info(f"[{self.worker_id}] processing job document {job_document_id}")
+        IngestionService.process_document(job_document_id)
+        return True
+
+    def run_forever(self, stop_event: threading.Event):
+        last_stale_check = 0.0
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL_SECONDS:
+                    last_stale_check = time.monotonic()
+                    requeued = IngestionService.requeue_stale_documents()
+                    if requeued:
+                        logger.warning(f"[{self.worker_id}] re-queued {requeued} stale documents")
+                if not self.run_once():
+                    stop_event.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"[{self.worker_id}] ingestion worker error: {e}")
+                stop_event.wait(self.poll_interval)
+
+
+_stop_event = threading.Event()
+_threads: List[threading.Thread] = []
+
+
+def start_background_workers(count: Optional[int] = None) -> List[threading.Thread]:
+    """
+    Start ingestion worker threads inside the current (API) process.
+    """
+    if count is None:
+        count = int(os.getenv("INGESTION_INPROCESS_WORKERS", "1"))
+    _stop_event.clear()
+    for i in range(count):
+        worker = IngestionWorker(worker_id=f"{socket.gethostname()}-{os.getpid()}-t{i}")
+        thread = threading.Thread(target=worker.run_forever, args=(_stop_event,), daemon=True,
+                                  name=f"ingestion-worker-{i}")
+        thread.start()
+        _threads.append(thread)
+    return _threads
+
+
+def stop_background_workers(timeout: float = 10.0):
+    _stop_event.set()
+    for thread in _threads:
+        thread.join(timeout=timeout)
+    _threads.clear()
+
+
+def _run_worker_process(index: int, extraction_workers: int):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    # Read when the extraction pool is first created, so this sizes the pool of this process
+    pdf_extraction.EXTRACTION_WORKERS = extraction_workers
+    worker = IngestionWorker(worker_id=f"{socket.gethostname()}-{os.getpid()}-p{index}")
+    stop_event = threading.Event()
+    try:
+        worker.run_forever(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingestion worker processes")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--extraction-workers", type=int, default=None,
+                        help="PDF extraction processes per worker process (default: PDF_EXTRACTION_WORKERS "
+                             "if set, else the CPUs divided among the worker processes)")
+    args = parser.parse_args()
+
+    if HYBRID_SEARCH_ENABLED and "LEXICAL_INDEX_DIR" not in os.environ:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        logger.warning(
+            "LEXICAL_INDEX_DIR is not set; BM25 indexes go to %s on this host. Unless the API runs here from the "
+            "same directory, it will not see them and chat retrieval is vector-only. Point LEXICAL_INDEX_DIR "
+            "at a directory shared with the API.", LEXICAL_INDEX_DIR
+        )
+
+    # Every worker process has its own extraction pool; split the CPUs between them
+    # instead of giving each one a pool of cpu_count processes
+    extraction_workers = args.extraction_workers
+    if extraction_workers is None:
+        if "PDF_EXTRACTION_WORKERS" in os.environ:
+            extraction_workers = pdf_extraction.EXTRACTION_WORKERS
+        else:
+            extraction_workers = max(1, (os.cpu_count() or 1) // max(1, args.processes))
+
+    processes = [multiprocessing.Process(target=_run_worker_process, args=(i, extraction_workers),
+                                         name=f"ingestion-worker-{i}")
+                 for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
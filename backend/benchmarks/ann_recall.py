@@ -0,0 +1,72 @@
+"""
+Recall@k and QPS of the local IVF index against exact search, for a sweep of nprobe.
+
+Vectors are drawn around random topic centres, which clusters them roughly the way
+chunk embeddings of a document collection are. Run from the backend directory:
+    python -m benchmarks.ann_recall --vectors 200000 --nprobe 4 8 16 32 64
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.vectorstores.local_store import LocalVectorStore
+
+
+def clustered_vectors(rng, count, centres, spread):
+    labels = rng.integers(0, len(centres), count)
+    return (centres[labels] + spread * rng.standard_normal((count, centres.shape[1]))).astype(np.float32)
+
+
+def run_queries(store, queries, top_k):
+    results = []
+    started = time.perf_counter()
+    for query in queries:
+        results.append([match.id for match in store.query(query, top_k=top_k, include_metadata=False).matches])
+    return results, len(queries) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=0.05)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=0, help="0 picks ~4 * sqrt(vectors)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((args.topics, args.dimension)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+
+    store = LocalVectorStore(tempfile.mkdtemp(prefix="ann-recall-"), dimension=args.dimension)
+    # Load everything first, then train once
+    store.configure_index(min_rows=args.vectors + 1, nlist=args.nlist)
+    for start in range(0, args.vectors, 5000):
+        values = clustered_vectors(rng, min(5000, args.vectors - start), centres, args.spread)
+        store.upsert([{"id": f"v{start + i}", "values": row} for i, row in enumerate(values)])
+
+    queries = clustered_vectors(rng, args.queries, centres, args.spread)
+    exact, exact_qps = run_queries(store, queries, args.top_k)
+    print(f"{args.vectors} vectors, {args.dimension} dims, top_k={args.top_k}")
+    print(f"exact:        recall 1.000  {exact_qps:8.1f} QPS")
+
+    started = time.perf_counter()
+    store.configure_index(min_rows=0)
+    lists = store.get_index_stats()["ivf"]["lists"]
+    print(f"trained {lists} lists in {time.perf_counter() - started:.1f}s")
+
+    for nprobe in args.nprobe:
+        store.configure_index(nprobe=nprobe)
+        approximate, qps = run_queries(store, queries, args.top_k)
+        recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approximate, exact) if e])
+        print(f"nprobe={nprobe:<5} recall {recall:.3f}  {qps:8.1f} QPS  ({qps / exact_qps:.1f}x)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
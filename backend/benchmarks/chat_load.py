@@ -0,0 +1,79 @@
+"""
+Closed-loop load test for POST /chat/{project_id}/{user_id}.
+
+Each connection sends its next request as soon as the previous one returns, for a sweep
+of connection counts. With a non-blocking chat path, throughput grows with connections
+until the upstreams saturate; with a blocking one it stays flat at about one request per
+worker per LLM round trip.
+
+Start the API against offline providers, then run from the backend directory:
+    CHAT_MODEL_PROVIDER=fake FAKE_CHAT_LATENCY=1.0 EMBEDDING_PROVIDER=fake VECTOR_STORE_BACKEND=local \\
+        uvicorn app.main:app --workers 1
+    python -m benchmarks.chat_load --project-id 1 --connections 1 4 16 64 --duration 20
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def send_chat(url: str, project_id: str, user_id: str, question: str) -> float:
+    body = json.dumps({"content": question, "project_id": project_id, "user_id": user_id, "role": "user"})
+    request = urllib.request.Request(url, data=body.encode("utf-8"), headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def run_level(args, connections: int):
+    url = f"{args.base_url}/chat/{args.project_id}/{args.user_id}"
+    deadline = time.perf_counter() + args.duration
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def connection_loop(connection: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            try:
+                latency = send_chat(url, args.project_id, args.user_id, f"{args.question} ({connection}.{i})")
+                with lock:
+                    latencies.append(latency)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+            i += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        list(executor.map(connection_loop, range(connections)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    if latencies:
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        print(f"{connections:>5} connections: {len(latencies) / elapsed:7.2f} req/s  "
+              f"p50 {statistics.median(latencies) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  errors {len(errors)}")
+    else:
+        print(f"{connections:>5} connections: no successful requests, errors {len(errors)}: {errors[:1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--project-id", default="1")
+    parser.add_argument("--user-id", default="load-test")
+    parser.add_argument("--question", default="What does the onboarding guide say about laptops?")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per connection level")
+    args = parser.parse_args()
+
+    for connections in args.connections:
+        run_level(args, connections)
+
+
+if __name__ == "__main__":
+    main()
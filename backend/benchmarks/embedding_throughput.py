@@ -0,0 +1,57 @@
+"""
+Offline embedding throughput benchmark.
+
+Compares the old one-request-per-chunk loop against the batched engine using the
+fake provider, which simulates a fixed network round trip per request.
+
+Run from the backend directory:
+    python -m benchmarks.embedding_throughput --chunks 1200 --latency 0.05
+"""
+import argparse
+import time
+
+from app.utils.embedding_engine import EmbeddingEngine, FakeEmbeddingProvider
+
+
+def make_chunks(count: int):
+    return [f"Chunk {i}: policy text paragraph number {i} " * 20 for i in range(count)]
+
+
+def run(label: str, engine: EmbeddingEngine, chunks, per_chunk: bool):
+    started = time.perf_counter()
+    if per_chunk:
+        vectors = [engine.embed_query(chunk) for chunk in chunks]
+    else:
+        vectors = engine.embed_documents(chunks)
+    elapsed = time.perf_counter() - started
+    assert len(vectors) == len(chunks)
+    stats = engine.get_stats()
+    print(f"{label:<32} {elapsed:8.2f}s  {len(chunks) / elapsed:10.1f} chunks/s  "
+          f"requests={stats['requests']} retries={stats['retries']}")
+    engine.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per provider request")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    print(f"{args.chunks} chunks, {args.latency * 1000:.0f} ms simulated latency per request\n")
+
+    def provider():
+        return FakeEmbeddingProvider(latency=args.latency, failure_rate=args.failure_rate)
+
+    run("per-chunk (baseline)", EmbeddingEngine(provider(), batch_size=1, max_concurrency=1, backoff_base=0.01), chunks, True)
+    run("batched, sequential", EmbeddingEngine(provider(), batch_size=args.batch_size, max_concurrency=1, backoff_base=0.01), chunks, False)
+    run(f"batched, concurrency={args.concurrency}",
+        EmbeddingEngine(provider(), batch_size=args.batch_size, max_concurrency=args.concurrency, backoff_base=0.01),
+        chunks, False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Query latency of the local vector store for a given number of chunks.
+
+Run from the backend directory:
+    python -m benchmarks.local_retrieval --vectors 100000 --queries 200
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.vectorstores.local_store import LocalVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp(prefix="local-retrieval-")
+    store = LocalVectorStore(directory, dimension=args.dimension)
+
+    started = time.perf_counter()
+    for start in range(0, args.vectors, 1000):
+        count = min(1000, args.vectors - start)
+        values = rng.standard_normal((count, args.dimension), dtype=np.float32)
+        store.upsert([
+            {"id": f"project_1_doc_{(start + i) // 100}_chunk_{start + i}", "values": values[i],
+             "metadata": {"document_id": (start + i) // 100, "text": f"chunk {start + i}"}}
+            for i in range(count)
+        ])
+    print(f"Upserted {args.vectors} vectors in {time.perf_counter() - started:.2f}s")
+
+    queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query(query, top_k=args.top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"query top_k={args.top_k}: p50 {statistics.median(latencies):.2f} ms, p95 {p95:.2f} ms, "
+          f"{1000 / statistics.mean(latencies):.0f} QPS")
+
+    started = time.perf_counter()
+    store.query(queries[0], top_k=args.top_k, filter={"document_id": {"$in": [1, 2, 3]}})
+    print(f"filtered query: {(time.perf_counter() - started) * 1000:.2f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+PDF extraction throughput for different pool sizes, used to size PDF_EXTRACTION_WORKERS.
+
+Run from the backend directory:
+    python -m benchmarks.pdf_extraction path/to/large.pdf --workers 0 2 4 8
+"""
+import argparse
+import importlib
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--pages-per-shard", type=int, default=16)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        # The pool size is read at import time, so reload the module for every setting
+        os.environ["PDF_EXTRACTION_WORKERS"] = str(workers)
+        from app.utils import pdf_extraction
+        pdf_extraction = importlib.reload(pdf_extraction)
+
+        pages = sum(1 for _ in pdf_extraction.iter_pdf_pages(args.pdf, pages_per_shard=args.pages_per_shard))
+        stats = pdf_extraction.get_extraction_stats()
+        pdf_extraction.shutdown_extraction_pool()
+        print(f"workers={workers:<3} pages={pages:<6} {stats['seconds']:8.2f}s  {stats['pages_per_second']:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
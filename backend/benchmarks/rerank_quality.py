@@ -0,0 +1,93 @@
+"""
+Latency the rerank stage adds against the retrieval quality it buys, on a fixture corpus.
+
+Each fixture query is embedded with the configured provider, the top `--candidates`
+passages are retrieved from a local store, and recall@k / MRR@k are compared between
+retrieval order and reranked order. Rerank latency is measured over `--repeats` runs
+of every query. With the cross-encoder (see README for the model files), from the
+backend directory:
+    RERANKER=onnx python -m benchmarks.rerank_quality --candidates 20 --top-k 5
+Offline, with hash embeddings (random retrieval order) and the word-overlap reranker:
+    EMBEDDING_PROVIDER=fake RERANKER=fake python -m benchmarks.rerank_quality
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from app.rerankers import RERANKER, create_reranker
+from app.utils.embedding_engine import get_embedding_engine
+from app.vectorstores.local_store import LocalVectorStore
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "rerank_corpus.json")
+
+
+def quality(ranked_ids, relevant, top_k):
+    top = ranked_ids[:top_k]
+    recall = len(set(top) & relevant) / len(relevant)
+    reciprocal_rank = next((1 / (rank + 1) for rank, passage_id in enumerate(top) if passage_id in relevant), 0.0)
+    return recall, reciprocal_rank
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[max(0, int(len(values) * share) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE_PATH)
+    parser.add_argument("--reranker", default=RERANKER if RERANKER != "none" else "onnx")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.fixture) as fixture:
+        corpus = json.load(fixture)
+    passages = {passage["id"]: passage for passage in corpus["passages"]}
+    reranker = create_reranker(args.reranker)
+
+    engine = get_embedding_engine()
+    embeddings = engine.embed_documents([passage["text"] for passage in corpus["passages"]])
+    store = LocalVectorStore(tempfile.mkdtemp(prefix="rerank-quality-"), dimension=len(embeddings[0]))
+    store.upsert([
+        {"id": passage["id"], "values": embedding, "metadata": {"text": passage["text"]}}
+        for passage, embedding in zip(corpus["passages"], embeddings)
+    ])
+
+    base_recall, base_rr, reranked_recall, reranked_rr, latencies = [], [], [], [], []
+    for item in corpus["queries"]:
+        relevant = set(item["relevant"])
+        query_embedding = engine.embed_query(item["query"])
+        candidates = [match.id for match in store.query(query_embedding, top_k=args.candidates).matches]
+        texts = [passages[passage_id]["text"] for passage_id in candidates]
+
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            scores = reranker.score(item["query"], texts)
+            latencies.append(time.perf_counter() - started)
+        reranked = [candidates[i] for i in sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)]
+
+        recall, reciprocal_rank = quality(candidates, relevant, args.top_k)
+        base_recall.append(recall)
+        base_rr.append(reciprocal_rank)
+        recall, reciprocal_rank = quality(reranked, relevant, args.top_k)
+        reranked_recall.append(recall)
+        reranked_rr.append(reciprocal_rank)
+    store.close()
+
+    print(f"{len(corpus['queries'])} queries, {len(passages)} passages, {args.candidates} candidates, "
+          f"top_k={args.top_k}, embeddings {engine.provider.model_key}, reranker {reranker.name}")
+    print(f"retrieval order: recall@{args.top_k} {statistics.mean(base_recall):.3f}  "
+          f"MRR@{args.top_k} {statistics.mean(base_rr):.3f}")
+    print(f"reranked:        recall@{args.top_k} {statistics.mean(reranked_recall):.3f}  "
+          f"MRR@{args.top_k} {statistics.mean(reranked_rr):.3f}")
+    print(f"added latency:   p50 {percentile(latencies, 0.5) * 1000:.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms  per query of {args.candidates} candidates")
+
+
+if __name__ == "__main__":
+    main()
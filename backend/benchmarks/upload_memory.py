@@ -0,0 +1,93 @@
+"""
+Peak Python memory for one multi-file upload request: the old read-everything path
+versus streaming uploads to the spool directory.
+
+Run from the backend directory:
+    python -m benchmarks.upload_memory --files 10 --size-mb 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import tracemalloc
+
+from app.utils.uploads import save_upload, remove_spooled_file
+
+
+class FakeUpload:
+    """
+    Minimal stand-in for `UploadFile`: multipart bodies are already spooled to a temp
+    file by Starlette, so the source here is a file on disk as well.
+    """
+
+    def __init__(self, path: str, filename: str):
+        self.filename = filename
+        self._file = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    async def close(self):
+        self._file.close()
+
+
+async def read_whole_files(sources):
+    """
+    The previous route + service behaviour: every file read into memory, then copied
+    into a NamedTemporaryFile.
+    """
+    blobs = []
+    for path in sources:
+        upload = FakeUpload(path, os.path.basename(path))
+        blobs.append(await upload.read())
+        await upload.close()
+    temp_paths = []
+    for blob in blobs:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+            temp_file.write(blob)
+            temp_paths.append(temp_file.name)
+    for path in temp_paths:
+        os.remove(path)
+
+
+async def stream_files(sources):
+    spooled = [await save_upload(FakeUpload(path, os.path.basename(path))) for path in sources]
+    for item in spooled:
+        remove_spooled_file(item["path"])
+
+
+def measure(label, coroutine_factory, sources):
+    tracemalloc.start()
+    asyncio.run(coroutine_factory(sources))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} peak {peak / (1024 * 1024):10.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--size-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    source_dir = tempfile.mkdtemp(prefix="upload-bench-")
+    sources = []
+    for i in range(args.files):
+        path = os.path.join(source_dir, f"doc-{i}.pdf")
+        with open(path, "wb") as source:
+            for _ in range(args.size_mb):
+                source.write(os.urandom(1024 * 1024))
+        sources.append(path)
+
+    print(f"{args.files} files x {args.size_mb} MB\n")
+    try:
+        measure("read whole files", read_whole_files, sources)
+        measure("streamed to spool", stream_files, sources)
+    finally:
+        for path in sources:
+            os.remove(path)
+        os.rmdir(source_dir)
+
+
+if __name__ == "__main__":
+    main()